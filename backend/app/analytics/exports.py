@@ -0,0 +1,122 @@
+# app/analytics/exports.py
+
+import csv
+import json
+import zlib
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+# 每次从数据库游标读取的行数
+CHUNK_SIZE = 2000
+# 累积多少行再向客户端输出一次
+ROWS_PER_WRITE = 500
+
+LOG_FIELDS = [
+    'id', 'user__username', 'user_id', 'ip_address', 'method', 'path',
+    'status_code', 'response_time', 'timestamp', 'user_agent',
+]
+CSV_HEADER = ['ID', '用户', '用户ID', 'IP地址', '请求方法', '访问路径', '状态码', '响应时间(ms)', '访问时间', '用户代理']
+
+
+class _Echo:
+    """csv.writer 的伪文件对象，write 直接返回写入的内容"""
+
+    def write(self, value):
+        return value
+
+
+def _format_time(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def iter_log_rows(queryset, fields):
+    """按块读取日志，只取需要的列，用户名随 JOIN 一起查出"""
+    return queryset.values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+
+
+def csv_chunks(queryset):
+    """逐块生成 CSV 内容"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+
+    buffer = []
+    for (log_id, username, user_id, ip, method, path,
+         status_code, response_time, timestamp, user_agent) in iter_log_rows(queryset, LOG_FIELDS):
+        buffer.append(writer.writerow([
+            log_id,
+            username if user_id else '匿名用户',
+            user_id or '',
+            ip,
+            method,
+            path,
+            status_code,
+            response_time,
+            _format_time(timestamp),
+            user_agent,
+        ]))
+        if len(buffer) >= ROWS_PER_WRITE:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _json_records(queryset):
+    keys = ['id', 'user', 'user_id', 'ip_address', 'method', 'path',
+            'status_code', 'response_time', 'timestamp', 'user_agent', 'request_data']
+    for row in iter_log_rows(queryset, LOG_FIELDS + ['request_data']):
+        record = dict(zip(keys, row))
+        record['timestamp'] = _format_time(record['timestamp'])
+        yield json.dumps(record, ensure_ascii=False, default=str)
+
+
+def json_chunks(queryset):
+    """逐块生成 JSON 数组"""
+    yield '['
+    buffer = []
+    first = True
+    for record in _json_records(queryset):
+        buffer.append(record if first else ',' + record)
+        first = False
+        if len(buffer) >= ROWS_PER_WRITE:
+            yield ''.join(buffer)
+            buffer = []
+    buffer.append(']')
+    yield ''.join(buffer)
+
+
+def ndjson_chunks(queryset):
+    """逐块生成 NDJSON（每行一条 JSON 记录）"""
+    buffer = []
+    for record in _json_records(queryset):
+        buffer.append(record + '\n')
+        if len(buffer) >= ROWS_PER_WRITE:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def gzip_chunks(chunks):
+    """把文本块流式压缩为 gzip"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def streaming_export(chunks, basename, extension, content_type, compress=False):
+    """构造流式下载响应，compress 为 True 时输出 .gz 文件"""
+    filename = f"{basename}_{timezone.now().strftime('%Y%m%d%H%M%S')}.{extension}"
+    if compress:
+        chunks = gzip_chunks(chunks)
+        content_type = 'application/gzip'
+        filename += '.gz'
+    else:
+        content_type = f'{content_type}; charset=utf-8'
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
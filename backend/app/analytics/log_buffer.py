@@ -0,0 +1,232 @@
+# app/analytics/log_buffer.py
+
+import atexit
+import json
+import logging
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import APIAccessLog
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可在 settings.ANALYTICS_LOG_BUFFER 中覆盖
+DEFAULT_CONFIG = {
+    'ENABLED': True,            # 关闭后退化为同步写入
+    'BACKEND': 'memory',        # memory: 进程内环形缓冲区; redis: Redis 列表（多进程共享）
+    'MAX_SIZE': 10000,          # 缓冲区容量，写满后丢弃最旧的记录
+    'BATCH_SIZE': 200,          # 每次 bulk_create 的条数
+    'FLUSH_INTERVAL': 2.0,      # 最长刷新间隔（秒）
+    'REDIS_KEY': 'analytics:access_logs',
+}
+
+
+class MemoryLogQueue:
+    """进程内环形缓冲区"""
+
+    def __init__(self, max_size):
+        self._items = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+
+    def push(self, record):
+        """写入一条记录，返回 (当前长度, 被挤掉的记录数)"""
+        with self._lock:
+            dropped = 1 if len(self._items) == self._items.maxlen else 0
+            self._items.append(record)
+            return len(self._items), dropped
+
+    def pop_batch(self, size):
+        with self._lock:
+            count = min(size, len(self._items))
+            return [self._items.popleft() for _ in range(count)]
+
+    def __len__(self):
+        return len(self._items)
+
+
+class RedisLogQueue:
+    """基于 Redis 列表的缓冲区，多个工作进程共用一个队列"""
+
+    def __init__(self, key, max_size):
+        self.key = key
+        self.max_size = max_size
+
+    def _client(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    def push(self, record):
+        pipe = self._client().pipeline()
+        pipe.rpush(self.key, json.dumps(record, ensure_ascii=False, default=str))
+        pipe.ltrim(self.key, -self.max_size, -1)
+        length, _ = pipe.execute()
+        return min(length, self.max_size), max(0, length - self.max_size)
+
+    def pop_batch(self, size):
+        # MULTI 中取出并截断，保证多个进程不会重复消费
+        pipe = self._client().pipeline()
+        pipe.lrange(self.key, 0, size - 1)
+        pipe.ltrim(self.key, size, -1)
+        items, _ = pipe.execute()
+        return [json.loads(item) for item in items]
+
+    def __len__(self):
+        return self._client().llen(self.key)
+
+
+class AccessLogBuffer:
+    """
+    API访问日志缓冲写入器
+    请求线程只负责把记录放入缓冲区，后台线程按批次大小或时间窗口用 bulk_create 写库
+    """
+
+    def __init__(self, config=None):
+        self.config = {**DEFAULT_CONFIG, **(config or getattr(settings, 'ANALYTICS_LOG_BUFFER', {}))}
+        if self.config['BACKEND'] == 'redis':
+            self.queue = RedisLogQueue(self.config['REDIS_KEY'], self.config['MAX_SIZE'])
+        else:
+            self.queue = MemoryLogQueue(self.config['MAX_SIZE'])
+
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stats = {'enqueued': 0, 'dropped': 0, 'flushed': 0, 'failed': 0, 'flushes': 0}
+
+    def push(self, record):
+        """放入一条访问记录（字段见 build_record）"""
+        if not self.config['ENABLED']:
+            self._write([record])
+            return
+
+        self._ensure_started()
+        try:
+            size, dropped = self.queue.push(record)
+        except Exception as e:
+            # Redis 不可用时直接丢弃，不能影响正常请求
+            self._incr('dropped')
+            logger.warning(f"访问日志入队失败: {e}")
+            return
+
+        self._incr('enqueued')
+        if dropped:
+            self._incr('dropped', dropped)
+        if size >= self.config['BATCH_SIZE']:
+            self._wakeup.set()
+
+    def flush(self):
+        """把缓冲区中的记录全部写入数据库，返回写入条数"""
+        batch_size = self.config['BATCH_SIZE']
+        total = 0
+        with self._flush_lock:
+            while True:
+                try:
+                    batch = self.queue.pop_batch(batch_size)
+                except Exception as e:
+                    logger.warning(f"读取访问日志缓冲区失败: {e}")
+                    break
+                if not batch:
+                    break
+                total += self._write(batch)
+                if len(batch) < batch_size:
+                    break
+        return total
+
+    def shutdown(self):
+        """停止后台线程并写出剩余记录（进程退出时调用）"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=self.config['FLUSH_INTERVAL'] * 2)
+        self.flush()
+
+    def get_stats(self):
+        """返回缓冲区计数器，用于观察积压和丢弃情况"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        try:
+            stats['pending'] = len(self.queue)
+        except Exception:
+            stats['pending'] = None
+        stats['backend'] = self.config['BACKEND']
+        return stats
+
+    def _ensure_started(self):
+        # 按进程启动后台线程，兼容 fork 模式的 worker
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            first_start = self._pid is None
+            self._pid = os.getpid()
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='access-log-flusher', daemon=True)
+            self._thread.start()
+            if first_start:
+                atexit.register(self.shutdown)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.config['FLUSH_INTERVAL'])
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"访问日志刷新失败: {e}")
+            finally:
+                close_old_connections()
+
+    def _write(self, records):
+        try:
+            APIAccessLog.objects.bulk_create(
+                [APIAccessLog(**self._to_fields(record)) for record in records],
+                batch_size=self.config['BATCH_SIZE'],
+            )
+        except Exception as e:
+            self._incr('failed', len(records))
+            logger.error(f"访问日志批量写入失败({len(records)}条): {e}")
+            return 0
+        self._incr('flushed', len(records))
+        self._incr('flushes')
+        return len(records)
+
+    @staticmethod
+    def _to_fields(record):
+        fields = dict(record)
+        timestamp = fields.get('timestamp')
+        if isinstance(timestamp, str):
+            fields['timestamp'] = parse_datetime(timestamp)
+        return fields
+
+    def _incr(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+
+def build_record(request, response, ip, response_time, request_data):
+    """把一次请求整理成可序列化的日志记录"""
+    return {
+        'user_id': request.user.id if request.user.is_authenticated else None,
+        'ip_address': ip,
+        'method': request.method,
+        'path': request.path,
+        'status_code': response.status_code,
+        'response_time': response_time,
+        'user_agent': request.META.get('HTTP_USER_AGENT', ''),
+        'request_data': request_data,
+        # 记录请求发生的时间，而不是批量写入的时间
+        'timestamp': timezone.now().isoformat(),
+    }
+
+
+access_log_buffer = AccessLogBuffer()
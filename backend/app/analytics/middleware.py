@@ -3,7 +3,7 @@
 import time
 import json
 from django.conf import settings
-from .models import APIAccessLog
+from .log_buffer import access_log_buffer, build_record
 
 class AnalyticsMiddleware:
     def __init__(self, get_response):
@@ -27,7 +27,7 @@ class AnalyticsMiddleware:
 
         # 排除静态文件和媒体文件的访问记录
         path = request.path
-        excluded_prefixes = ['/static/', '/media/', '/admin/jsi18n/']
+        excluded_prefixes = ['/static/', '/media/', '/assets/', '/images/', '/admin/jsi18n/']
         is_excluded = any(path.startswith(prefix) for prefix in excluded_prefixes)
         
         # 只记录API访问,排除静态资源和特定路径
@@ -53,17 +53,8 @@ class AnalyticsMiddleware:
                             if field in request_data:
                                 request_data[field] = '******'
 
-                # 创建访问日志
-                APIAccessLog.objects.create(
-                    user=request.user if request.user.is_authenticated else None,
-                    ip_address=ip,
-                    method=request.method,
-                    path=path,
-                    status_code=response.status_code,
-                    response_time=response_time,
-                    user_agent=request.META.get('HTTP_USER_AGENT', ''),
-                    request_data=request_data
-                )
+                # 放入缓冲区，由后台线程批量写入
+                access_log_buffer.push(build_record(request, response, ip, response_time, request_data))
             except Exception as e:
                 print(f"Error logging API access: {e}")
 
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_apiaccesslog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APITrafficHour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(verbose_name='时间段起点')),
+                ('path', models.CharField(max_length=255, verbose_name='访问路径')),
+                ('method', models.CharField(max_length=10, verbose_name='请求方法')),
+                ('status_class', models.PositiveSmallIntegerField(verbose_name='状态码类别')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='访问次数')),
+                ('total_time', models.FloatField(default=0, verbose_name='总响应时间(ms)')),
+                ('min_time', models.FloatField(default=0, verbose_name='最短响应时间(ms)')),
+                ('max_time', models.FloatField(default=0, verbose_name='最长响应时间(ms)')),
+                ('histogram', models.JSONField(default=list, verbose_name='响应时间分布')),
+            ],
+            options={
+                'verbose_name': 'API流量(小时)',
+                'verbose_name_plural': 'API流量(小时)',
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='APITrafficMinute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(verbose_name='时间段起点')),
+                ('path', models.CharField(max_length=255, verbose_name='访问路径')),
+                ('method', models.CharField(max_length=10, verbose_name='请求方法')),
+                ('status_class', models.PositiveSmallIntegerField(verbose_name='状态码类别')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='访问次数')),
+                ('total_time', models.FloatField(default=0, verbose_name='总响应时间(ms)')),
+                ('min_time', models.FloatField(default=0, verbose_name='最短响应时间(ms)')),
+                ('max_time', models.FloatField(default=0, verbose_name='最长响应时间(ms)')),
+                ('histogram', models.JSONField(default=list, verbose_name='响应时间分布')),
+            ],
+            options={
+                'verbose_name': 'API流量(分钟)',
+                'verbose_name_plural': 'API流量(分钟)',
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='apiaccesslog',
+            index=models.Index(fields=['timestamp'], name='analytics_a_timesta_4434e4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apitrafficminute',
+            index=models.Index(fields=['bucket'], name='analytics_a_bucket_815ca8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apitrafficminute',
+            index=models.Index(fields=['path', 'bucket'], name='analytics_a_path_a761cf_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='apitrafficminute',
+            unique_together={('bucket', 'path', 'method', 'status_class')},
+        ),
+        migrations.AddIndex(
+            model_name='apitraffichour',
+            index=models.Index(fields=['bucket'], name='analytics_a_bucket_d71dfa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apitraffichour',
+            index=models.Index(fields=['path', 'bucket'], name='analytics_a_path_9b7265_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='apitraffichour',
+            unique_together={('bucket', 'path', 'method', 'status_class')},
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_api_traffic_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APITrafficRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_log_id', models.BigIntegerField(default=0, verbose_name='已汇总的最大日志ID')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': 'API流量汇总进度',
+                'verbose_name_plural': 'API流量汇总进度',
+            },
+        ),
+    ]
@@ -1,6 +1,7 @@
 # app/analytics/models.py
 
 from django.db import models
+from django.utils import timezone
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 
@@ -23,7 +24,7 @@ class APIAccessLog(models.Model):
     response_time = models.FloatField(verbose_name='响应时间(ms)')
     user_agent = models.TextField(verbose_name='用户代理')
     request_data = models.JSONField(null=True, blank=True, verbose_name='请求数据')
-    timestamp = models.DateTimeField(auto_now_add=True, verbose_name='访问时间')
+    timestamp = models.DateTimeField(default=timezone.now, verbose_name='访问时间')
 
     class Meta:
         verbose_name = 'API访问日志'
@@ -31,6 +32,7 @@ class APIAccessLog(models.Model):
         indexes = [
             models.Index(fields=['user', '-timestamp']),
             models.Index(fields=['path', '-timestamp']),
+            models.Index(fields=['timestamp']),
         ]
 
 
@@ -151,4 +153,53 @@ class PopularContent(models.Model):
         indexes = [
             models.Index(fields=['-score']),
             models.Index(fields=['content_type', '-score']),
-        ]
\ No newline at end of file
+        ]
+
+
+class APITrafficBucket(models.Model):
+    """API流量汇总桶（按 路径、方法、状态码类别 汇总一个时间段内的访问）"""
+    bucket = models.DateTimeField(verbose_name='时间段起点')
+    path = models.CharField(max_length=255, verbose_name='访问路径')
+    method = models.CharField(max_length=10, verbose_name='请求方法')
+    status_class = models.PositiveSmallIntegerField(verbose_name='状态码类别')  # 2 表示 2xx，以此类推
+
+    count = models.PositiveIntegerField(default=0, verbose_name='访问次数')
+    total_time = models.FloatField(default=0, verbose_name='总响应时间(ms)')
+    min_time = models.FloatField(default=0, verbose_name='最短响应时间(ms)')
+    max_time = models.FloatField(default=0, verbose_name='最长响应时间(ms)')
+    # 响应时间直方图，各区间上界见 app/analytics/rollup.py 中的 LATENCY_BOUNDS
+    histogram = models.JSONField(default=list, verbose_name='响应时间分布')
+
+    class Meta:
+        abstract = True
+        unique_together = ['bucket', 'path', 'method', 'status_class']
+        indexes = [
+            models.Index(fields=['bucket']),
+            models.Index(fields=['path', 'bucket']),
+        ]
+
+
+class APITrafficMinute(APITrafficBucket):
+    """API流量分钟汇总"""
+
+    class Meta(APITrafficBucket.Meta):
+        verbose_name = 'API流量(分钟)'
+        verbose_name_plural = 'API流量(分钟)'
+
+
+class APITrafficHour(APITrafficBucket):
+    """API流量小时汇总"""
+
+    class Meta(APITrafficBucket.Meta):
+        verbose_name = 'API流量(小时)'
+        verbose_name_plural = 'API流量(小时)'
+
+
+class APITrafficRollupState(models.Model):
+    """API流量汇总进度：已汇总到的原始访问日志 id（单行记录）"""
+    last_log_id = models.BigIntegerField(default=0, verbose_name='已汇总的最大日志ID')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = 'API流量汇总进度'
+        verbose_name_plural = 'API流量汇总进度'
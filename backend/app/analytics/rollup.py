@@ -0,0 +1,308 @@
+# app/analytics/rollup.py
+
+import logging
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, IntegerField, Max, Min, Q, Sum
+from django.db.models.functions import TruncHour, TruncMinute
+from django.utils import timezone
+
+from .models import APIAccessLog, APITrafficMinute, APITrafficHour, APITrafficRollupState
+
+logger = logging.getLogger(__name__)
+
+# 响应时间直方图各区间上界(ms)，最后一个区间为 >= 最后一个上界
+LATENCY_BOUNDS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# 默认配置，可在 settings.ANALYTICS_ROLLUP 中覆盖
+DEFAULT_CONFIG = {
+    'LAG_MINUTES': 2,               # 只汇总若干分钟之前的数据，给缓冲写入留出时间
+    'CHUNK_MINUTES': 60,            # 每次汇总查询覆盖的分钟数
+    'MAX_LOGS_PER_RUN': 200000,     # 单次任务最多汇总的原始日志数
+    'RAW_RETENTION_DAYS': 30,       # 原始访问日志保留天数
+    'MINUTE_RETENTION_DAYS': 7,     # 分钟汇总保留天数
+    'HOUR_RETENTION_DAYS': 365,     # 小时汇总保留天数
+    'PRUNE_BATCH_SIZE': 5000,       # 清理时每批删除的行数
+}
+
+BUCKET_FIELDS = ['count', 'total_time', 'min_time', 'max_time', 'histogram']
+KEY_FIELDS = ['bucket', 'path', 'method', 'status_class']
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'ANALYTICS_ROLLUP', {}))
+    return config
+
+
+def _floor_minute(value):
+    return value.replace(second=0, microsecond=0)
+
+
+def _floor_hour(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _histogram_annotations():
+    annotations = {}
+    lower = None
+    for i, upper in enumerate(LATENCY_BOUNDS + [None]):
+        condition = Q()
+        if lower is not None:
+            condition &= Q(response_time__gte=lower)
+        if upper is not None:
+            condition &= Q(response_time__lt=upper)
+        annotations[f'h{i}'] = Count('id', filter=condition)
+        lower = upper
+    return annotations
+
+
+def _aggregate_logs(logs, trunc):
+    """把原始日志按 (trunc 截取的时间段, 路径, 方法, 状态码类别) 聚合，返回 {键: [桶字段值]}"""
+    histogram_keys = [f'h{i}' for i in range(len(LATENCY_BOUNDS) + 1)]
+    rows = logs.annotate(
+        period=trunc('timestamp', tzinfo=dt_timezone.utc),
+        status_class=ExpressionWrapper(F('status_code') / 100, output_field=IntegerField()),
+    ).values('period', 'path', 'method', 'status_class').annotate(
+        count=Count('id'),
+        total_time=Sum('response_time'),
+        min_time=Min('response_time'),
+        max_time=Max('response_time'),
+        **_histogram_annotations()
+    ).order_by()
+    return {
+        (row['period'], row['path'], row['method'], row['status_class']): [
+            row['count'],
+            row['total_time'] or 0,
+            row['min_time'] or 0,
+            row['max_time'] or 0,
+            [row[key] for key in histogram_keys],
+        ]
+        for row in rows
+    }
+
+
+def _save_buckets(model, merged):
+    """按 {键: [桶字段值]} 写入汇总表，已有的桶整体覆盖，返回写入的桶数"""
+    buckets = [
+        model(
+            bucket=bucket, path=path, method=method, status_class=status_class,
+            count=count, total_time=total_time, min_time=min_time, max_time=max_time, histogram=histogram,
+        )
+        for (bucket, path, method, status_class), (count, total_time, min_time, max_time, histogram) in merged.items()
+    ]
+    if buckets:
+        model.objects.bulk_create(
+            buckets, batch_size=500, update_conflicts=True,
+            unique_fields=KEY_FIELDS, update_fields=BUCKET_FIELDS,
+        )
+    return len(buckets)
+
+
+def _merge_into(merged, key, count, total_time, min_time, max_time, histogram):
+    item = merged.get(key)
+    if item is None:
+        merged[key] = [count, total_time, min_time, max_time, list(histogram)]
+        return
+    item[0] += count
+    item[1] += total_time
+    item[2] = min(item[2], min_time)
+    item[3] = max(item[3], max_time)
+    item[4] = [a + b for a, b in zip(item[4], histogram)]
+
+
+def rollup_minutes(start, end):
+    """把 [start, end) 内的原始日志按分钟汇总写入分钟表，返回写入的桶数"""
+    logs = APIAccessLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+    return _save_buckets(APITrafficMinute, _aggregate_logs(logs, TruncMinute))
+
+
+def rollup_hours_from_logs(start, end):
+    """分钟表已过保留期、但原始日志完整的时间段：直接用原始日志重算 [start, end) 内的小时桶"""
+    logs = APIAccessLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+    return _save_buckets(APITrafficHour, _aggregate_logs(logs, TruncHour))
+
+
+def merge_hours_from_logs(logs):
+    """
+    原始日志也已部分清理的时间段无法重算，只把这些新日志累加到已有的小时桶上
+    调用方保证每条日志只累加一次（与水位在同一事务中提交）
+    """
+    merged = _aggregate_logs(logs, TruncHour)
+    if not merged:
+        return 0
+    existing = APITrafficHour.objects.filter(bucket__in={key[0] for key in merged}).values_list(
+        'bucket', 'path', 'method', 'status_class', *BUCKET_FIELDS
+    )
+    for bucket, path, method, status_class, *values in existing:
+        key = (bucket, path, method, status_class)
+        if key in merged:
+            _merge_into(merged, key, *values)
+    return _save_buckets(APITrafficHour, merged)
+
+
+def rollup_hours(start, end):
+    """用分钟表重新计算 [start, end) 覆盖到的小时桶，返回写入的桶数"""
+    start, end = _floor_hour(start), _floor_hour(end - timedelta(microseconds=1)) + timedelta(hours=1)
+    merged = {}
+    for bucket, path, method, status_class, *values in (
+        APITrafficMinute.objects.filter(bucket__gte=start, bucket__lt=end).values_list(
+            'bucket', 'path', 'method', 'status_class', *BUCKET_FIELDS
+        ).iterator(chunk_size=2000)
+    ):
+        _merge_into(merged, (_floor_hour(bucket), path, method, status_class), *values)
+    return _save_buckets(APITrafficHour, merged)
+
+
+def get_state():
+    """汇总进度（单行记录），不存在时创建"""
+    state, _ = APITrafficRollupState.objects.get_or_create(pk=1)
+    return state
+
+
+def get_watermark():
+    """已汇总到的原始日志 id：id 不大于它的日志都已计入汇总表"""
+    return get_state().last_log_id
+
+
+def _pending_logs(last_log_id, end, config):
+    """
+    本次要汇总的日志 id 上限：按写入顺序（id）推进，晚到的日志即使时间戳较早也会被汇总；
+    时间戳还在 end 之后的日志留到下次，水位停在它之前
+    """
+    logs = APIAccessLog.objects.filter(id__gt=last_log_id)
+    waiting = logs.filter(timestamp__gte=end).aggregate(first=Min('id'))['first']
+    if waiting is not None:
+        logs = logs.filter(id__lt=waiting)
+    # 单次任务最多处理的日志数
+    upper_id = logs.order_by('id').values_list('id', flat=True)[config['MAX_LOGS_PER_RUN'] - 1:].first()
+    if upper_id is None:
+        upper_id = logs.aggregate(last=Max('id'))['last']
+    return upper_id
+
+
+def _minute_ranges(minutes, chunk_minutes):
+    """把有序的分钟列表合并为连续区间 [start, end)，每段不超过 chunk_minutes"""
+    ranges = []
+    for minute in minutes:
+        if ranges and ranges[-1][1] == minute and ranges[-1][1] - ranges[-1][0] < timedelta(minutes=chunk_minutes):
+            ranges[-1][1] = minute + timedelta(minutes=1)
+        else:
+            ranges.append([minute, minute + timedelta(minutes=1)])
+    return ranges
+
+
+def run_rollup(now=None, config=None):
+    """
+    汇总原始日志到分钟表和小时表，返回处理统计
+    水位记录已汇总的日志 id：新写入的日志（包括缓冲区积压、重试后晚到的）所在的分钟桶
+    按原始日志整体重算，重复执行结果相同
+    """
+    config = config or get_config()
+    now = now or timezone.now()
+    end = _floor_minute(now.astimezone(dt_timezone.utc) - timedelta(minutes=config['LAG_MINUTES']))
+    state = get_state()
+    upper_id = _pending_logs(state.last_log_id, end, config)
+    if upper_id is None:
+        return {'minute_buckets': 0, 'hour_buckets': 0, 'start': None, 'end': None}
+
+    # 分钟表保留期内：按分钟重算后再合并为小时；分钟表已清理、原始日志完整的时间段：直接按小时重算；
+    # 原始日志也已部分清理的时间段：只累加新日志。首次汇总时已有的历史日志也按此计入小时表
+    utc_now = now.astimezone(dt_timezone.utc)
+    rebuild_from = _floor_hour(utc_now - timedelta(days=config['MINUTE_RETENTION_DAYS'])) + timedelta(hours=1)
+    raw_complete_from = _floor_hour(utc_now - timedelta(days=config['RAW_RETENTION_DAYS'])) + timedelta(hours=1)
+    new_logs = APIAccessLog.objects.filter(id__gt=state.last_log_id, id__lte=upper_id)
+    minutes = sorted(
+        minute.astimezone(dt_timezone.utc) for minute in new_logs.filter(timestamp__gte=rebuild_from).annotate(
+            minute=TruncMinute('timestamp', tzinfo=dt_timezone.utc)
+        ).values_list('minute', flat=True).distinct().order_by()
+    )
+    old_hours = sorted(
+        hour.astimezone(dt_timezone.utc) for hour in new_logs.filter(
+            timestamp__gte=raw_complete_from, timestamp__lt=rebuild_from
+        ).annotate(
+            hour=TruncHour('timestamp', tzinfo=dt_timezone.utc)
+        ).values_list('hour', flat=True).distinct().order_by()
+    )
+
+    minute_buckets = hour_buckets = 0
+    ranges = _minute_ranges(minutes, config['CHUNK_MINUTES'])
+    with transaction.atomic():
+        for range_start, range_end in ranges:
+            minute_buckets += rollup_minutes(range_start, range_end)
+        hours = sorted({_floor_hour(minute) for minute in minutes})
+        for hour in hours:
+            hour_buckets += rollup_hours(hour, hour + timedelta(hours=1))
+        for hour in old_hours:
+            hour_buckets += rollup_hours_from_logs(hour, hour + timedelta(hours=1))
+        hour_buckets += merge_hours_from_logs(new_logs.filter(timestamp__lt=raw_complete_from))
+        APITrafficRollupState.objects.filter(pk=state.pk).update(last_log_id=upper_id, updated_at=timezone.now())
+
+    return {
+        'minute_buckets': minute_buckets,
+        'hour_buckets': hour_buckets,
+        'start': minutes[0] if minutes else None,
+        'end': minutes[-1] + timedelta(minutes=1) if minutes else None,
+    }
+
+
+def _delete_in_batches(queryset, batch_size):
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += queryset.model.objects.filter(id__in=ids).delete()[0]
+
+
+def prune(now=None, config=None):
+    """按保留期分批清理原始日志和汇总数据；尚未汇总的原始日志不会被删除"""
+    config = config or get_config()
+    now = now or timezone.now()
+    batch_size = config['PRUNE_BATCH_SIZE']
+
+    # 原始日志只删除已汇总的部分，尚未汇总的即使过期也保留到汇总之后
+    raw_cutoff = now - timedelta(days=config['RAW_RETENTION_DAYS'])
+    minute_cutoff = now - timedelta(days=config['MINUTE_RETENTION_DAYS'])
+
+    return {
+        'raw_logs': _delete_in_batches(
+            APIAccessLog.objects.filter(timestamp__lt=raw_cutoff, id__lte=get_watermark()), batch_size
+        ),
+        'minute_buckets': _delete_in_batches(APITrafficMinute.objects.filter(bucket__lt=minute_cutoff), batch_size),
+        'hour_buckets': _delete_in_batches(
+            APITrafficHour.objects.filter(bucket__lt=now - timedelta(days=config['HOUR_RETENTION_DAYS'])),
+            batch_size
+        ),
+    }
+
+
+def estimate_percentile(histogram, percentile, min_time, max_time):
+    """
+    根据直方图估算分位数：定位到所在区间后按区间内均匀分布线性插值，
+    结果限制在实际的最小/最大响应时间之间
+    """
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = percentile / 100 * total
+    seen = 0
+    for i, count in enumerate(histogram):
+        if count and seen + count >= rank:
+            lower = LATENCY_BOUNDS[i - 1] if i > 0 else 0
+            upper = LATENCY_BOUNDS[i] if i < len(LATENCY_BOUNDS) else max_time
+            lower, upper = max(lower, min_time), min(upper, max_time)
+            fraction = (rank - seen) / count
+            return round(lower + (upper - lower) * fraction, 2)
+        seen += count
+    return max_time
+
+
+def merge_histograms(histograms):
+    merged = [0] * (len(LATENCY_BOUNDS) + 1)
+    for histogram in histograms:
+        for i, value in enumerate(histogram):
+            merged[i] += value
+    return merged
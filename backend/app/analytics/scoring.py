@@ -0,0 +1,148 @@
+# app/analytics/scoring.py
+
+import logging
+
+from django.conf import settings
+from django.db.models import Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from app.article.models import Article
+from app.builder.models import Builder
+from app.comment.models import Comment
+from .models import PopularContent
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可在 settings.POPULAR_CONTENT_SCORING 中覆盖
+DEFAULT_SCORING = {
+    'WEIGHTS': {'views': 1, 'likes': 3, 'comments': 5},
+    'DECAY': 'hyperbolic',      # hyperbolic: 1/(1+天数*DECAY_RATE); exponential: 按半衰期衰减; none: 不衰减
+    'DECAY_RATE': 0.1,
+    'HALF_LIFE_DAYS': 7,
+    'CONTENT_TYPES': ['article', 'builder', 'comment'],
+}
+
+
+def get_scoring_config():
+    config = dict(DEFAULT_SCORING)
+    config.update(getattr(settings, 'POPULAR_CONTENT_SCORING', {}))
+    return config
+
+
+def decay_factor(age_days, config):
+    """按配置计算时间衰减系数（按自然日计算，同一天内分数不变）"""
+    age_days = max(age_days, 0)
+    mode = config['DECAY']
+    if mode == 'exponential':
+        return 0.5 ** (age_days / config['HALF_LIFE_DAYS'])
+    if mode == 'none':
+        return 1.0
+    return 1 / (1 + age_days * config['DECAY_RATE'])
+
+
+def compute_score(views, likes, comments, age_days, config):
+    weights = config['WEIGHTS']
+    raw = views * weights['views'] + likes * weights['likes'] + comments * weights['comments']
+    return raw * decay_factor(age_days, config)
+
+
+def _article_rows():
+    """已发布文章：浏览量、点赞数、评论数（评论数读取 comment_count 列）"""
+    return Article.objects.filter(status='published').values_list(
+        'id', 'title', 'author_id', 'views', 'likes', 'comment_count', 'created_at'
+    )
+
+
+def _builder_rows():
+    """建筑：汇总其关联文章的浏览量、点赞数和评论数"""
+    return Builder.objects.annotate(
+        view_total=Coalesce(Sum('articles__views'), Value(0)),
+        like_total=Coalesce(Sum('articles__likes'), Value(0)),
+        comment_total=Coalesce(Sum('articles__comment_count'), Value(0)),
+    ).values_list('id', 'name', 'creator_id', 'view_total', 'like_total', 'comment_total', 'created_at')
+
+
+def _comment_rows():
+    """评论：点赞数和回复数（评论没有浏览量，回复数读取 reply_count 列）"""
+    return Comment.objects.order_by().values_list(
+        'id', 'content', 'author_id', 'likes', 'reply_count', 'created_at'
+    )
+
+
+def _iter_items(content_type):
+    """统一输出 (id, 标题, 作者id, 浏览量, 点赞数, 评论数, 创建时间)"""
+    if content_type == 'article':
+        yield from _article_rows().iterator()
+    elif content_type == 'builder':
+        yield from _builder_rows().iterator()
+    elif content_type == 'comment':
+        for comment_id, content, author_id, likes, replies, created_at in _comment_rows().iterator():
+            yield comment_id, content[:50], author_id, 0, likes, replies, created_at
+
+
+def update_content_type(content_type, config=None, batch_size=500):
+    """
+    更新一种内容类型的热度
+    计数和标题未变化且今天已计算过的条目直接跳过；只对有变化的条目批量 upsert，已删除的内容移除
+    """
+    config = config or get_scoring_config()
+    today = timezone.localdate()
+
+    existing = {
+        content_id: (views, likes, comments, title, timezone.localdate(last_updated))
+        for content_id, views, likes, comments, title, last_updated in PopularContent.objects.filter(
+            content_type=content_type
+        ).values_list('content_id', 'views', 'likes', 'comments', 'title', 'last_updated').iterator()
+    }
+
+    seen = set()
+    changed = []
+    unchanged = 0
+    for content_id, title, author_id, views, likes, comments, created_at in _iter_items(content_type):
+        seen.add(content_id)
+        title = (title or '')[:200]
+        previous = existing.get(content_id)
+        if previous and previous[:4] == (views, likes, comments, title) and previous[4] == today:
+            unchanged += 1
+            continue
+        changed.append(PopularContent(
+            content_type=content_type,
+            content_id=content_id,
+            title=title,
+            author_id=author_id,
+            views=views,
+            likes=likes,
+            comments=comments,
+            score=compute_score(views, likes, comments, (today - timezone.localdate(created_at)).days, config),
+        ))
+
+    if changed:
+        PopularContent.objects.bulk_create(
+            changed,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['content_type', 'content_id'],
+            update_fields=['title', 'author', 'views', 'likes', 'comments', 'score', 'last_updated'],
+        )
+
+    removed_ids = [content_id for content_id in existing if content_id not in seen]
+    deleted = 0
+    for start in range(0, len(removed_ids), batch_size):
+        deleted += PopularContent.objects.filter(
+            content_type=content_type, content_id__in=removed_ids[start:start + batch_size]
+        ).delete()[0]
+
+    return {'updated': len(changed), 'unchanged': unchanged, 'deleted': deleted}
+
+
+def update_popular_content():
+    """更新所有已配置内容类型的热度，返回各类型的处理统计"""
+    config = get_scoring_config()
+    results = {}
+    for content_type in config['CONTENT_TYPES']:
+        results[content_type] = update_content_type(content_type, config)
+        logger.info(f"热门内容更新 {content_type}: {results[content_type]}")
+    # 不再统计的内容类型的旧记录一并清理
+    PopularContent.objects.exclude(content_type__in=config['CONTENT_TYPES']).delete()
+    return results
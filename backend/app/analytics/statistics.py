@@ -0,0 +1,173 @@
+# app/analytics/statistics.py
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from . import rollup
+from .models import APIAccessLog, APITrafficHour
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION_KEY = 'analytics:api_log_stats:version'
+# 统计结果缓存时间（秒），可在 settings.ANALYTICS_STATISTICS_CACHE_TIMEOUT 中覆盖
+DEFAULT_CACHE_TIMEOUT = 300
+PERCENTILES = (50, 95, 99)
+TOP_N = 10
+
+
+def _cache_version():
+    try:
+        version = cache.get(CACHE_VERSION_KEY)
+        if version is None:
+            cache.add(CACHE_VERSION_KEY, 1, None)
+            version = cache.get(CACHE_VERSION_KEY, 1)
+        return version
+    except Exception as e:
+        logger.warning(f"读取统计缓存版本失败: {e}")
+        return None
+
+
+def invalidate_statistics_cache():
+    """使所有时间窗口的统计缓存失效（汇总任务执行后调用）"""
+    try:
+        cache.incr(CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(CACHE_VERSION_KEY, 2, None)
+    except Exception as e:
+        logger.warning(f"更新统计缓存版本失败: {e}")
+
+
+def _path_percentiles(buckets, paths):
+    """合并各路径在时间窗口内的响应时间直方图，估算 P50/P95/P99"""
+    merged = {}
+    for path, histogram, min_time, max_time in buckets.filter(path__in=paths).values_list(
+        'path', 'histogram', 'min_time', 'max_time'
+    ).iterator(chunk_size=2000):
+        item = merged.setdefault(path, [[], min_time, max_time])
+        item[0].append(histogram)
+        item[1] = min(item[1], min_time)
+        item[2] = max(item[2], max_time)
+
+    result = {}
+    for path, (histograms, min_time, max_time) in merged.items():
+        histogram = rollup.merge_histograms(histograms)
+        result[path] = {
+            f'p{p}': rollup.estimate_percentile(histogram, p, min_time, max_time) for p in PERCENTILES
+        }
+    return result
+
+
+def path_summary(buckets):
+    """按路径汇总桶数据：访问次数、成功/失败次数和平均响应时间"""
+    rows = buckets.values('path').annotate(
+        calls=Sum('count'),
+        success=Coalesce(Sum('count', filter=Q(status_class__lt=4)), 0),
+        error=Coalesce(Sum('count', filter=Q(status_class__gte=4)), 0),
+        time_sum=Sum('total_time'),
+    ).order_by('-calls')
+    for row in rows:
+        yield _with_average(row)
+
+
+def _with_average(row):
+    """把桶聚合结果整理成 count / avg_time 形式"""
+    row['count'] = row.pop('calls')
+    time_sum = row.pop('time_sum') or 0
+    row['avg_time'] = time_sum / row['count'] if row['count'] else 0
+    return row
+
+
+def compute_api_log_statistics(days):
+    """
+    计算最近 days 天的API访问统计
+    请求量、耗时和分布均读取小时汇总表，分位数由直方图估算；用户统计仍查询原始日志
+    """
+    start_date = timezone.now() - timedelta(days=days)
+    buckets = APITrafficHour.objects.filter(bucket__gte=start_date.replace(minute=0, second=0, microsecond=0))
+
+    # 一次分组扫描得到总量、成功/失败数、平均耗时以及方法和状态码类别分布
+    total_logs = success_logs = error_logs = 0
+    total_time = 0.0
+    method_counts = defaultdict(int)
+    status_counts = defaultdict(int)
+    for method, status_class, count, time_sum in buckets.values('method', 'status_class').annotate(
+        calls=Sum('count'), time_sum=Sum('total_time')
+    ).values_list('method', 'status_class', 'calls', 'time_sum'):
+        total_logs += count
+        total_time += time_sum or 0
+        if status_class < 4:
+            success_logs += count
+        else:
+            error_logs += count
+        method_counts[method] += count
+        status_counts[status_class] += count
+
+    # 按路径统计
+    path_stats = list(islice(path_summary(buckets), TOP_N))
+    percentiles = _path_percentiles(buckets, [item['path'] for item in path_stats])
+    for item in path_stats:
+        item.update({f'p{p}': percentiles.get(item['path'], {}).get(f'p{p}') for p in PERCENTILES})
+
+    # 按用户统计
+    user_stats = list(APIAccessLog.objects.filter(timestamp__gte=start_date).exclude(user=None).values(
+        'user__username', 'user__id'
+    ).annotate(count=Count('id')).order_by('-count')[:TOP_N])
+
+    # 按日期统计
+    date_stats = []
+    for item in buckets.annotate(date=TruncDate('bucket')).values('date').annotate(
+        calls=Sum('count'),
+        success=Coalesce(Sum('count', filter=Q(status_class__lt=4)), 0),
+        error=Coalesce(Sum('count', filter=Q(status_class__gte=4)), 0),
+        time_sum=Sum('total_time'),
+    ).order_by('date'):
+        item = _with_average(item)
+        item['date'] = item['date'].isoformat()
+        date_stats.append(item)
+
+    return {
+        'total_logs': total_logs,
+        'success_rate': (success_logs / total_logs * 100) if total_logs > 0 else 0,
+        'error_rate': (error_logs / total_logs * 100) if total_logs > 0 else 0,
+        'avg_response_time': (total_time / total_logs) if total_logs > 0 else 0,
+        'path_stats': path_stats,
+        'method_stats': [
+            {'method': method, 'count': count}
+            for method, count in sorted(method_counts.items(), key=lambda x: -x[1])
+        ],
+        'status_stats': [
+            {'status_class': f'{status_class}xx', 'count': count}
+            for status_class, count in sorted(status_counts.items(), key=lambda x: -x[1])
+        ],
+        'user_stats': user_stats,
+        'date_stats': date_stats,
+    }
+
+
+def get_api_log_statistics(days):
+    """获取统计结果，按时间窗口缓存"""
+    version = _cache_version()
+    if version is None:
+        return compute_api_log_statistics(days)
+
+    key = f'analytics:api_log_stats:v{version}:{days}'
+    try:
+        data = cache.get(key)
+    except Exception:
+        data = None
+    if data is None:
+        data = compute_api_log_statistics(days)
+        timeout = getattr(settings, 'ANALYTICS_STATISTICS_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT)
+        try:
+            cache.set(key, data, timeout)
+        except Exception as e:
+            logger.warning(f"写入统计缓存失败: {e}")
+    return data
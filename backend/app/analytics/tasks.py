@@ -6,7 +6,13 @@ from django.utils import timezone
 from app.article.models import Article
 from app.builder.models import Builder
 from app.user.models import CustomUser
-from .models import DailyStatistics, APIAccessLog, PopularContent
+from probject.counters import flush_all_counters
+from probject.likes import reconcile_all_likes
+from app.article import counters as article_counters  # noqa: F401 注册文章计数器
+from app.comment import counters as comment_counters  # noqa: F401 注册评论点赞计数
+from .models import DailyStatistics, APIAccessLog
+from . import rollup, scoring
+from .statistics import invalidate_statistics_cache
 
 def update_daily_statistics():
     """
@@ -39,29 +45,42 @@ def update_daily_statistics():
         defaults=stats
     )
 
+    # 统计数据已更新，清除API统计缓存
+    invalidate_statistics_cache()
+
 def update_popular_content():
     """
-    更新热门内容排名
+    更新热门内容排名（文章、建筑、评论），只重新计算计数有变化的条目
+    """
+    return scoring.update_popular_content()
+
+
+def flush_buffered_counters():
+    """
+    把 Redis 中累计的计数增量（如文章浏览量）批量写回数据库
+    """
+    return flush_all_counters()
+
+
+def reconcile_like_counts():
+    """
+    按点赞记录批量校正文章和评论的点赞数
+    """
+    return reconcile_all_likes()
+
+
+def rollup_api_traffic():
+    """
+    把新的API访问日志汇总到分钟表和小时表
     """
-    # 清除旧的热门内容
-    PopularContent.objects.all().delete()
-
-    # 计算文章热度分数并创建热门内容记录
-    for article in Article.objects.all():
-        score = (
-                        article.views * 1 +  # 1分/查看
-                        article.likes * 3 +  # 3分/点赞
-                        article.comments.count() * 5  # 5分/评论
-                ) * (1 / (1 + (timezone.now() - article.created_at).days * 0.1))  # 时间衰减
-
-        PopularContent.objects.create(
-            content_type='article',
-            content_id=article.id,
-            title=article.title,
-            author=article.author,
-            views=article.views,
-            likes=article.likes,
-            comments=article.comments.count(),
-            score=score
-        )
+    result = rollup.run_rollup()
+    if result['minute_buckets']:
+        invalidate_statistics_cache()
+    return result
+
 
+def prune_api_traffic():
+    """
+    按保留期分批清理过期的原始访问日志和汇总数据
+    """
+    return rollup.prune()
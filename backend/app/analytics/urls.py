@@ -17,6 +17,7 @@ urlpatterns = [
     path('api-logs/<int:log_id>/', views.get_api_log_detail, name='api_log_detail'),
     path('api-logs/export/csv/', views.export_api_logs, name='export_api_logs_csv'),
     path('api-logs/export/json/', views.export_api_logs_json, name='export_api_logs_json'),
+    path('api-logs/export/ndjson/', views.export_api_logs_ndjson, name='export_api_logs_ndjson'),
     path('api-logs/statistics/', views.get_api_log_statistics, name='api_log_statistics'),
 
     # 用户接口
@@ -1,32 +1,35 @@
 # app/analytics/views.py
 
-import csv
-import json
-from django.http import HttpResponse, JsonResponse
+from django.http import JsonResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import Count, Avg, Q, F
+from django.db.models import Count, Avg, Q, F, Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.dateparse import parse_date
 from datetime import timedelta, datetime
 
 from .models import (
     APIAccessLog, UserAction, DailyStatistics,
-    UserStatistics, PopularContent
+    UserStatistics, PopularContent, APITrafficHour
 )
+from .log_buffer import access_log_buffer
+from .exports import streaming_export, csv_chunks, json_chunks, ndjson_chunks
+from . import statistics
+from probject.pagination import InvalidCursor, select_paginator
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 50
     page_size_query_param = 'page_size'
     max_page_size = 1000
 
-@api_view(['GET'])
-@permission_classes([IsAdminUser])
-def get_api_logs(request):
-    """获取API访问日志列表,支持多种过滤条件"""
-    # 获取查询参数
+def filter_api_logs(request):
+    """
+    根据查询参数过滤API访问日志,列表和导出接口共用
+    返回 (queryset, 错误响应)，参数有误时 queryset 为 None
+    """
     start_date = request.query_params.get('start_date')
     end_date = request.query_params.get('end_date')
     user_id = request.query_params.get('user_id')
@@ -34,46 +37,61 @@ def get_api_logs(request):
     method = request.query_params.get('method')
     status_code = request.query_params.get('status_code')
     ip_address = request.query_params.get('ip_address')
-    
+
     # 构建查询
     queryset = APIAccessLog.objects.all()
-    
+
     # 应用过滤条件
     if start_date:
         try:
             start_datetime = datetime.strptime(start_date, '%Y-%m-%d').replace(hour=0, minute=0, second=0)
             queryset = queryset.filter(timestamp__gte=start_datetime)
         except ValueError:
-            return Response({"error": "无效的开始日期格式,请使用YYYY-MM-DD格式"}, status=400)
-    
+            return None, Response({"error": "无效的开始日期格式,请使用YYYY-MM-DD格式"}, status=400)
+
     if end_date:
         try:
             end_datetime = datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
             queryset = queryset.filter(timestamp__lte=end_datetime)
         except ValueError:
-            return Response({"error": "无效的结束日期格式,请使用YYYY-MM-DD格式"}, status=400)
-    
+            return None, Response({"error": "无效的结束日期格式,请使用YYYY-MM-DD格式"}, status=400)
+
     if user_id:
         queryset = queryset.filter(user_id=user_id)
-    
+
     if path:
         queryset = queryset.filter(path__icontains=path)
-    
+
     if method:
         queryset = queryset.filter(method=method.upper())
-    
+
     if status_code:
         queryset = queryset.filter(status_code=status_code)
-    
+
     if ip_address:
         queryset = queryset.filter(ip_address=ip_address)
-    
+
     # 排序
-    queryset = queryset.order_by('-timestamp')
-    
+    return queryset.order_by('-timestamp'), None
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_api_logs(request):
+    """
+    获取API访问日志列表,支持多种过滤条件
+    带 cursor 或 limit 参数时按 (timestamp, id) 键集分页,翻到多深耗时都相同;
+    需要总数时加 with_count=1(超过上限时为近似值)
+    """
+    queryset, error = filter_api_logs(request)
+    if error:
+        return error
+
     # 分页
-    paginator = StandardResultsSetPagination()
-    result_page = paginator.paginate_queryset(queryset, request)
+    paginator = select_paginator(request, StandardResultsSetPagination, ordering=('-timestamp', '-id'))
+    try:
+        result_page = paginator.paginate_queryset(queryset.select_related('user'), request)
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=400)
     
     # 序列化结果
     data = [{
@@ -116,150 +134,35 @@ def get_api_log_detail(request, log_id):
     
     return Response(data)
 
+def _wants_gzip(request):
+    return request.query_params.get('gzip', '').lower() in ('1', 'true', 'yes')
+
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def export_api_logs(request):
-    """导出API访问日志为CSV格式"""
-    # 获取查询参数,与get_api_logs相同的过滤逻辑
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    user_id = request.query_params.get('user_id')
-    path = request.query_params.get('path')
-    method = request.query_params.get('method')
-    status_code = request.query_params.get('status_code')
-    ip_address = request.query_params.get('ip_address')
-    
-    # 构建查询
-    queryset = APIAccessLog.objects.all()
-    
-    # 应用过滤条件
-    if start_date:
-        try:
-            start_datetime = datetime.strptime(start_date, '%Y-%m-%d').replace(hour=0, minute=0, second=0)
-            queryset = queryset.filter(timestamp__gte=start_datetime)
-        except ValueError:
-            return Response({"error": "无效的开始日期格式,请使用YYYY-MM-DD格式"}, status=400)
-    
-    if end_date:
-        try:
-            end_datetime = datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
-            queryset = queryset.filter(timestamp__lte=end_datetime)
-        except ValueError:
-            return Response({"error": "无效的结束日期格式,请使用YYYY-MM-DD格式"}, status=400)
-    
-    if user_id:
-        queryset = queryset.filter(user_id=user_id)
-    
-    if path:
-        queryset = queryset.filter(path__icontains=path)
-    
-    if method:
-        queryset = queryset.filter(method=method.upper())
-    
-    if status_code:
-        queryset = queryset.filter(status_code=status_code)
-    
-    if ip_address:
-        queryset = queryset.filter(ip_address=ip_address)
-    
-    # 排序
-    queryset = queryset.order_by('-timestamp')
-    
-    # 创建CSV响应
-    response = HttpResponse(content_type='text/csv')
-    timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-    response['Content-Disposition'] = f'attachment; filename="api_logs_{timestamp}.csv"'
-    
-    # 写入CSV头和数据
-    writer = csv.writer(response)
-    writer.writerow(['ID', '用户', '用户ID', 'IP地址', '请求方法', '访问路径', '状态码', '响应时间(ms)', '访问时间', '用户代理'])
-    
-    for log in queryset:
-        writer.writerow([
-            log.id,
-            log.user.username if log.user else '匿名用户',
-            log.user.id if log.user else '',
-            log.ip_address,
-            log.method,
-            log.path,
-            log.status_code,
-            log.response_time,
-            log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            log.user_agent
-        ])
-    
-    return response
+    """导出API访问日志为CSV格式(流式输出,gzip=1 时压缩)"""
+    queryset, error = filter_api_logs(request)
+    if error:
+        return error
+    return streaming_export(csv_chunks(queryset), 'api_logs', 'csv', 'text/csv', _wants_gzip(request))
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def export_api_logs_json(request):
-    """导出API访问日志为JSON格式"""
-    # 获取查询参数,与get_api_logs相同的过滤逻辑
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    user_id = request.query_params.get('user_id')
-    path = request.query_params.get('path')
-    method = request.query_params.get('method')
-    status_code = request.query_params.get('status_code')
-    ip_address = request.query_params.get('ip_address')
-    
-    # 构建查询
-    queryset = APIAccessLog.objects.all()
-    
-    # 应用过滤条件 (与CSV导出相同)
-    if start_date:
-        try:
-            start_datetime = datetime.strptime(start_date, '%Y-%m-%d').replace(hour=0, minute=0, second=0)
-            queryset = queryset.filter(timestamp__gte=start_datetime)
-        except ValueError:
-            return Response({"error": "无效的开始日期格式,请使用YYYY-MM-DD格式"}, status=400)
-    
-    if end_date:
-        try:
-            end_datetime = datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
-            queryset = queryset.filter(timestamp__lte=end_datetime)
-        except ValueError:
-            return Response({"error": "无效的结束日期格式,请使用YYYY-MM-DD格式"}, status=400)
-    
-    if user_id:
-        queryset = queryset.filter(user_id=user_id)
-    
-    if path:
-        queryset = queryset.filter(path__icontains=path)
-    
-    if method:
-        queryset = queryset.filter(method=method.upper())
-    
-    if status_code:
-        queryset = queryset.filter(status_code=status_code)
-    
-    if ip_address:
-        queryset = queryset.filter(ip_address=ip_address)
-    
-    # 排序
-    queryset = queryset.order_by('-timestamp')
-    
-    # 准备JSON数据
-    data = [{
-        'id': log.id,
-        'user': log.user.username if log.user else None,
-        'user_id': log.user.id if log.user else None,
-        'ip_address': log.ip_address,
-        'method': log.method,
-        'path': log.path,
-        'status_code': log.status_code,
-        'response_time': log.response_time,
-        'timestamp': log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-        'user_agent': log.user_agent,
-        'request_data': log.request_data
-    } for log in queryset]
-    
-    # 创建JSON响应
-    response = HttpResponse(json.dumps(data, ensure_ascii=False), content_type='application/json')
-    timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-    response['Content-Disposition'] = f'attachment; filename="api_logs_{timestamp}.json"'
-    
-    return response
+    """导出API访问日志为JSON格式(流式输出,gzip=1 时压缩)"""
+    queryset, error = filter_api_logs(request)
+    if error:
+        return error
+    return streaming_export(json_chunks(queryset), 'api_logs', 'json', 'application/json', _wants_gzip(request))
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_api_logs_ndjson(request):
+    """导出API访问日志为NDJSON格式(每行一条记录,适合超大范围导出)"""
+    queryset, error = filter_api_logs(request)
+    if error:
+        return error
+    return streaming_export(ndjson_chunks(queryset), 'api_logs', 'ndjson', 'application/x-ndjson', _wants_gzip(request))
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
@@ -274,60 +177,8 @@ def get_api_log_statistics(request):
     except ValueError:
         days = 7
     
-    start_date = timezone.now() - timedelta(days=days)
-    
-    # 获取总体统计
-    total_logs = APIAccessLog.objects.filter(timestamp__gte=start_date).count()
-    success_logs = APIAccessLog.objects.filter(timestamp__gte=start_date, status_code__lt=400).count()
-    error_logs = APIAccessLog.objects.filter(timestamp__gte=start_date, status_code__gte=400).count()
-    avg_response_time = APIAccessLog.objects.filter(timestamp__gte=start_date).aggregate(avg=Avg('response_time'))['avg'] or 0
-    
-    # 按路径统计
-    path_stats = APIAccessLog.objects.filter(timestamp__gte=start_date).values('path').annotate(
-        count=Count('id'),
-        success=Count('id', filter=Q(status_code__lt=400)),
-        error=Count('id', filter=Q(status_code__gte=400)),
-        avg_time=Avg('response_time')
-    ).order_by('-count')[:10]
-    
-    # 按方法统计
-    method_stats = APIAccessLog.objects.filter(timestamp__gte=start_date).values('method').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    # 按状态码统计
-    status_stats = APIAccessLog.objects.filter(timestamp__gte=start_date).values('status_code').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    # 按用户统计
-    user_stats = APIAccessLog.objects.filter(timestamp__gte=start_date).exclude(user=None).values(
-        'user__username', 'user__id'
-    ).annotate(
-        count=Count('id')
-    ).order_by('-count')[:10]
-    
-    # 按日期统计
-    date_stats = APIAccessLog.objects.filter(timestamp__gte=start_date).extra({
-        'date': "DATE(timestamp)"
-    }).values('date').annotate(
-        count=Count('id'),
-        success=Count('id', filter=Q(status_code__lt=400)),
-        error=Count('id', filter=Q(status_code__gte=400)),
-        avg_time=Avg('response_time')
-    ).order_by('date')
-    
-    return Response({
-        'total_logs': total_logs,
-        'success_rate': (success_logs / total_logs * 100) if total_logs > 0 else 0,
-        'error_rate': (error_logs / total_logs * 100) if total_logs > 0 else 0,
-        'avg_response_time': avg_response_time,
-        'path_stats': path_stats,
-        'method_stats': method_stats,
-        'status_stats': status_stats,
-        'user_stats': user_stats,
-        'date_stats': date_stats
-    })
+    # 条件聚合计算，按时间窗口缓存，汇总任务执行后失效
+    return Response(statistics.get_api_log_statistics(days))
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
@@ -340,13 +191,16 @@ def get_dashboard_stats(request):
     today_stats = DailyStatistics.objects.filter(date=today).first()
 
     # 获取API访问统计
-    api_stats = APIAccessLog.objects.filter(
-        timestamp__date__gte=last_week
+    # 读取小时汇总表
+    api_stats = APITrafficHour.objects.filter(
+        bucket__date__gte=last_week
     ).aggregate(
-        total_calls=Count('id'),
-        avg_response_time=Avg('response_time'),
-        error_count=Count('id', filter=Q(status_code__gte=400))
+        total_calls=Coalesce(Sum('count'), 0),
+        time_sum=Sum('total_time'),
+        error_count=Coalesce(Sum('count', filter=Q(status_class__gte=4)), 0)
     )
+    time_sum = api_stats.pop('time_sum') or 0
+    api_stats['avg_response_time'] = time_sum / api_stats['total_calls'] if api_stats['total_calls'] else None
 
     # 获取热门内容
     popular_content = PopularContent.objects.order_by('-score')[:5]
@@ -362,7 +216,9 @@ def get_dashboard_stats(request):
         'today_stats': today_stats,
         'api_stats': api_stats,
         'popular_content': popular_content.values(),
-        'recent_errors': recent_errors
+        'recent_errors': recent_errors,
+        # 访问日志缓冲区状态（积压、丢弃、写入失败计数）
+        'log_buffer': access_log_buffer.get_stats()
     })
 
 @api_view(['GET'])
@@ -387,12 +243,25 @@ def get_user_behavior_stats(request):
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def get_api_performance(request):
-    """获取API性能统计"""
-    api_stats = APIAccessLog.objects.values('path').annotate(
-        total_calls=Count('id'),
-        avg_response_time=Avg('response_time'),
-        error_rate=Count('id', filter={'status_code__gte': 400}) * 100.0 / Count('id')
-    ).order_by('-total_calls')
+    """获取API性能统计（最近 days 天，默认 7 天，读取小时汇总表）"""
+    days = request.query_params.get('days', 7)
+    try:
+        days = int(days)
+        if days <= 0:
+            days = 7
+    except ValueError:
+        days = 7
+
+    since = (timezone.now() - timedelta(days=days)).replace(minute=0, second=0, microsecond=0)
+    api_stats = [
+        {
+            'path': item['path'],
+            'total_calls': item['count'],
+            'avg_response_time': item['avg_time'],
+            'error_rate': item['error'] * 100.0 / item['count'] if item['count'] else 0,
+        }
+        for item in statistics.path_summary(APITrafficHour.objects.filter(bucket__gte=since))
+    ]
 
     return Response(api_stats)
 
@@ -8,3 +8,7 @@ class ArticleConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app.article'
     verbose_name = '文章管理'
+
+    def ready(self):
+        # 注册全文索引同步信号
+        from . import signals  # noqa: F401
@@ -0,0 +1,15 @@
+# app/article/counters.py
+
+from probject.counters import BufferedCounter
+from probject.likes import LikeService
+from probject.response_cache import invalidate_tags
+
+# 文章浏览量：详情页每次访问只写 Redis，由定时任务批量写回 Article.views
+article_views = BufferedCounter('article.Article', 'views')
+
+# 文章点赞：ArticleLike 记录与 Article.likes 在同一事务中增减
+# 文章列表缓存（精选、热门）中含有点赞数和当前用户是否点赞，点赞变化后提交时失效
+article_likes = LikeService(
+    'article.Article', 'article.ArticleLike', 'article',
+    on_change=lambda article_id: invalidate_tags('article:published'),
+)
@@ -0,0 +1,142 @@
+import random
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import F
+
+from app.article.counters import article_likes
+from app.article.models import Article, ArticleLike
+from app.comment.counters import comment_likes
+from app.comment.models import Comment, CommentLike
+from app.user.models import CustomUser
+
+USER_PREFIX = 'bench_like_'
+
+
+class Command(BaseCommand):
+    help = '并发点赞/取消点赞压测：对比点赞服务与原先“查询-插入-保存”写法的吞吐量、错误数和计数偏差'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=['article', 'comment'], default='article', help='压测的点赞对象')
+        parser.add_argument('--threads', type=int, default=8, help='并发线程数')
+        parser.add_argument('--users', type=int, default=20, help='参与点赞的用户数，越少同一用户的并发重复请求越多')
+        parser.add_argument('--requests', type=int, default=200, help='每个线程的请求数')
+        parser.add_argument('--legacy', action='store_true', help='同时压测原先的写法作为对照')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        author, users = self._create_users(options['users'])
+        article = Article.objects.create(title='点赞压测', content='点赞压测', author=author, status='published')
+        comment = Comment.objects.create(article=article, author=author, content='点赞压测')
+        try:
+            if options['target'] == 'article':
+                target, service, like_model, field = article, article_likes, ArticleLike, 'article'
+            else:
+                target, service, like_model, field = comment, comment_likes, CommentLike, 'comment'
+
+            self.stdout.write(
+                f"对象: {options['target']}，{options['threads']} 线程 x {options['requests']} 次请求，"
+                f"{len(users)} 个用户，数据库: {connection.vendor}"
+            )
+            self.stdout.write(f"{'写法':<10}{'请求数':<10}{'吞吐量(次/秒)':<16}{'P50(ms)':<10}{'P95(ms)':<10}"
+                              f"{'错误':<8}{'计数':<8}{'实际记录':<10}{'偏差':<6}")
+
+            modes = [('service', self._service_op(service))]
+            if options['legacy']:
+                modes.append(('legacy', self._legacy_op(type(target), like_model, field)))
+            for label, operation in modes:
+                self._reset(target, like_model, field)
+                self._run(label, operation, target, like_model, field, users, options)
+        finally:
+            article.delete()
+            CustomUser.objects.filter(username__startswith=USER_PREFIX).delete()
+
+    def _create_users(self, count):
+        CustomUser.objects.filter(username__startswith=USER_PREFIX).delete()
+        CustomUser.objects.bulk_create([
+            CustomUser(username=f'{USER_PREFIX}{i}', email=f'{USER_PREFIX}{i}@example.com')
+            for i in range(count + 1)
+        ])
+        users = list(CustomUser.objects.filter(username__startswith=USER_PREFIX).order_by('id'))
+        return users[0], [user.id for user in users[1:]]
+
+    def _reset(self, target, like_model, field):
+        like_model.objects.filter(**{field: target}).delete()
+        type(target).objects.filter(pk=target.pk).update(likes=0)
+
+    def _service_op(self, service):
+        def operation(target_id, user_id, like):
+            if like:
+                service.like(target_id, user_id)
+            else:
+                service.unlike(target_id, user_id)
+        return operation
+
+    def _legacy_op(self, model, like_model, field):
+        """原先视图中的写法：先查询是否点赞，再插入/删除记录，然后用 F() 更新计数并 refresh_from_db，不在事务中"""
+        def operation(target_id, user_id, like):
+            target = model.objects.get(pk=target_id)
+            record = like_model.objects.filter(**{field: target, 'user_id': user_id}).first()
+            if like:
+                if record:
+                    return
+                like_model.objects.create(**{field: target, 'user_id': user_id})
+                target.likes = F('likes') + 1
+            else:
+                if not record:
+                    return
+                record.delete()
+                target.likes = F('likes') - 1
+            model.objects.filter(pk=target_id).update(likes=target.likes)
+            target.refresh_from_db()
+        return operation
+
+    def _run(self, label, operation, target, like_model, field, users, options):
+        latencies = []
+        errors = Counter()
+        lock = threading.Lock()
+        start_barrier = threading.Barrier(options['threads'])
+
+        def worker(index):
+            rng = random.Random(options['seed'] * 1000 + index)
+            local_latencies = []
+            local_errors = Counter()
+            start_barrier.wait()
+            try:
+                for _ in range(options['requests']):
+                    user_id = rng.choice(users)
+                    like = rng.random() < 0.6
+                    began = time.perf_counter()
+                    try:
+                        operation(target.pk, user_id, like)
+                    except Exception as e:
+                        local_errors[type(e).__name__] += 1
+                    local_latencies.append(time.perf_counter() - began)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(local_latencies)
+                errors.update(local_errors)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['threads'])]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        latencies.sort()
+        count = type(target).objects.filter(pk=target.pk).values_list('likes', flat=True).get()
+        actual = like_model.objects.filter(**{field: target}).count()
+        p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0
+        self.stdout.write(
+            f'{label:<10}{len(latencies):<10}{len(latencies) / elapsed:<16.1f}{p50:<10.2f}{p95:<10.2f}'
+            f'{sum(errors.values()):<8}{count:<8}{actual:<10}{count - actual:<6}'
+        )
+        for name, total in errors.most_common():
+            self.stdout.write(f'  {name}: {total}')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from app.article.models import Article
+from app.article.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = '重建文章全文检索索引（SQLite FTS5）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='每批写入的文章数')
+
+    def handle(self, *args, **options):
+        total = rebuild_index(Article, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'全文索引重建完成，共收录 {total} 篇文章'))
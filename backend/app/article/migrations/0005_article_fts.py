@@ -0,0 +1,75 @@
+# 创建文章全文检索用的 SQLite FTS5 虚拟表，并收录现有的已发布文章
+# 建表语句和分词规则是创建时的副本，不引用 app.article.search，之后修改检索模块不会改变迁移的行为
+
+import re
+import unicodedata
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+FTS_TABLE = 'article_fts'
+
+_CJK_RANGES = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+_TOKEN_RE = re.compile(rf'([{_CJK_RANGES}]+)|([^\W_{_CJK_RANGES}]+)')
+
+
+def _tokenize(text):
+    # 中文按二元组切分并收录每段末字，其他文字按单词切分
+    tokens = []
+    for cjk, word in _TOKEN_RE.findall(unicodedata.normalize('NFKC', strip_tags(text or '')).lower()):
+        if cjk:
+            if len(cjk) == 1:
+                tokens.append(cjk)
+            else:
+                tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+                tokens.append(cjk[-1])
+        else:
+            tokens.append(word)
+    return ' '.join(tokens)
+
+
+def create_fts_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        f"USING fts5(title, content, tags, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+    Article = apps.get_model('article', 'Article')
+    rows = Article.objects.using(connection.alias).filter(status='published').values_list(
+        'id', 'title', 'content', 'tags'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        batch = []
+        for article_id, title, content, tags in rows.iterator(chunk_size=500):
+            batch.append((article_id, _tokenize(title), _tokenize(content), _tokenize((tags or '').replace(',', ' '))))
+            if len(batch) >= 500:
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE}(rowid, title, content, tags) VALUES (%s, %s, %s, %s)', batch
+                )
+                batch = []
+        if batch:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE}(rowid, title, content, tags) VALUES (%s, %s, %s, %s)', batch
+            )
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('article', '0004_articlelike'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
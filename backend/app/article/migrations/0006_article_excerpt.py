@@ -0,0 +1,56 @@
+# 文章增加由正文生成的摘要列，列表接口不再读取正文
+
+import re
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+# 摘要规则是创建时的副本，不引用 app.article.utils，之后修改该模块不会改变迁移的行为
+EXCERPT_LENGTH = 200
+
+_CODE_BLOCK_RE = re.compile(r'```.*?(```|$)', re.S)
+_IMAGE_RE = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+_LINK_RE = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+_LINE_MARK_RE = re.compile(r'^\s{0,3}(#{1,6}|>+|[-*+]|\d+\.)\s+', re.M)
+_EMPHASIS_RE = re.compile(r'[*`~]+|__')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def make_excerpt(content, length=EXCERPT_LENGTH):
+    # 去掉代码块、图片、链接地址和格式符号后截取前 length 个字符
+    text = _CODE_BLOCK_RE.sub(' ', content or '')
+    text = _IMAGE_RE.sub(' ', text)
+    text = _LINK_RE.sub(r'\1', text)
+    text = strip_tags(text)
+    text = _LINE_MARK_RE.sub('', text)
+    text = _EMPHASIS_RE.sub('', text)
+    return _SPACE_RE.sub(' ', text).strip()[:length]
+
+
+def fill_excerpts(apps, schema_editor):
+    Article = apps.get_model('article', 'Article')
+    batch = []
+    for article in Article.objects.only('id', 'content').iterator(chunk_size=500):
+        article.excerpt = make_excerpt(article.content)
+        batch.append(article)
+        if len(batch) >= 500:
+            Article.objects.bulk_update(batch, ['excerpt'])
+            batch = []
+    if batch:
+        Article.objects.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('article', '0005_article_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', help_text='由正文生成的纯文本摘要，保存时自动更新，列表接口使用', max_length=200, verbose_name='摘要'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
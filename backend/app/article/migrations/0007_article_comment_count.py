@@ -0,0 +1,31 @@
+# 文章增加评论数列，由评论增删时维护，列表和热度计算不再执行 COUNT 查询
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_counts(apps, schema_editor):
+    Article = apps.get_model('article', 'Article')
+    Comment = apps.get_model('comment', 'Comment')
+    totals = Comment.objects.filter(article=OuterRef('pk')).order_by().values(
+        'article'
+    ).annotate(total=Count('id')).values('total')
+    Article.objects.update(comment_count=Coalesce(Subquery(totals, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('article', '0006_article_excerpt'),
+        ('comment', '0002_commentlike'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, help_text='文章的评论总数（含回复），由评论增删时自动维护', verbose_name='评论数'),
+        ),
+        migrations.RunPython(fill_comment_counts, migrations.RunPython.noop),
+    ]
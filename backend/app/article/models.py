@@ -3,6 +3,8 @@ from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 import os
 
+from .utils import EXCERPT_LENGTH, make_excerpt
+
 class Article(models.Model):
     """文章模型"""
     STATUS_CHOICES = (
@@ -23,6 +25,14 @@ class Article(models.Model):
         help_text=_('文章正文')
     )
 
+    excerpt = models.CharField(
+        max_length=EXCERPT_LENGTH,
+        blank=True,
+        default='',
+        verbose_name=_('摘要'),
+        help_text=_('由正文生成的纯文本摘要，保存时自动更新，列表接口使用')
+    )
+
     builder = models.ForeignKey(
         'builder.Builder',
         on_delete=models.SET_NULL,
@@ -101,6 +111,12 @@ class Article(models.Model):
         help_text=_('文章点赞次数')
     )
 
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('评论数'),
+        help_text=_('文章的评论总数（含回复），由评论增删时自动维护')
+    )
+
     tags = models.CharField(
         max_length=200,
         blank=True,
@@ -121,6 +137,13 @@ class Article(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录加载时的状态，保存后据此判断已发布文章集合是否变化
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
     def save(self, *args, **kwargs):
         """自定义保存逻辑，处理时间戳"""
         from django.utils import timezone
@@ -133,6 +156,22 @@ class Article(models.Model):
             self.published_at = current_time
             self.draft_saved_at = None
 
+        # 点赞数、评论数只由 F() 增减维护，整行保存时不写回内存中可能已过期的值
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+                and field.name not in ('likes', 'comment_count')
+            ]
+
+        # 正文未加载（defer）时不更新摘要，避免额外查询
+        if 'content' in self.__dict__:
+            self.excerpt = make_excerpt(self.content)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'content' in update_fields:
+                kwargs['update_fields'] = set(update_fields) | {'excerpt'}
+
         super().save(*args, **kwargs)
 
     def get_tags_list(self):
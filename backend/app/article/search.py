@@ -0,0 +1,226 @@
+# app/article/search.py
+
+import logging
+import re
+import unicodedata
+
+from django.db import DatabaseError, connection
+from django.utils.html import escape, strip_tags
+
+logger = logging.getLogger(__name__)
+
+# FTS5 虚拟表名，rowid 即文章 id，只收录已发布文章
+FTS_TABLE = 'article_fts'
+# BM25 各列权重：标题、正文、标签
+BM25_WEIGHTS = (10.0, 1.0, 5.0)
+# 单次搜索最多返回的结果数
+MAX_RESULTS = 1000
+# 摘要长度（字符）
+SNIPPET_LENGTH = 120
+
+# 中日韩字符连续片段 / 其他字母数字单词
+_CJK_RANGES = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+_TOKEN_RE = re.compile(rf'([{_CJK_RANGES}]+)|([^\W_{_CJK_RANGES}]+)')
+
+
+def _normalize(text):
+    # 全角转半角并统一小写
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def tokenize(text):
+    """
+    把文本切分为索引词：中文按二元组(bigram)切分，并额外收录每段的末字以支持单字前缀查询；
+    其他文字按单词切分。返回以空格分隔的词串，交给 FTS5 的 unicode61 分词器
+    """
+    tokens = []
+    for cjk, word in _TOKEN_RE.findall(_normalize(strip_tags(text))):
+        if cjk:
+            if len(cjk) == 1:
+                tokens.append(cjk)
+            else:
+                tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+                tokens.append(cjk[-1])
+        else:
+            tokens.append(word)
+    return ' '.join(tokens)
+
+
+def _term_expression(term):
+    """把一个查询词转换为 FTS5 表达式，无法检索的词返回 None"""
+    parts = []
+    for cjk, word in _TOKEN_RE.findall(_normalize(term)):
+        if cjk:
+            if len(cjk) == 1:
+                parts.append(f'"{cjk}"*')
+            else:
+                # 相邻二元组组成短语，等价于子串匹配
+                bigrams = ' '.join(cjk[i:i + 2] for i in range(len(cjk) - 1))
+                parts.append(f'"{bigrams}"')
+        else:
+            parts.append(f'"{word}"*')
+    if not parts:
+        return None
+    return ' AND '.join(parts)
+
+
+def build_match_query(title=None, content=None, tags=None, keyword=None):
+    """
+    根据各字段的搜索词构建 FTS5 MATCH 表达式
+    title/content/keyword 中以空格分隔的多个词需同时匹配，tags 为逗号分隔、任一匹配即可
+    keyword 在所有列中检索
+    """
+    clauses = []
+
+    def column_clause(column, value):
+        expressions = [_term_expression(term) for term in value.split()]
+        expressions = [e for e in expressions if e]
+        if expressions:
+            prefix = f'{column} : ' if column else ''
+            clauses.append(f'{prefix}({" AND ".join(expressions)})')
+
+    if keyword and keyword.strip():
+        column_clause(None, keyword)
+    if title and title.strip():
+        column_clause('title', title)
+    if content and content.strip():
+        column_clause('content', content)
+    if tags and tags.strip():
+        expressions = [_term_expression(tag) for tag in tags.split(',') if tag.strip()]
+        expressions = [f'({e})' for e in expressions if e]
+        if expressions:
+            clauses.append(f'tags : ({" OR ".join(expressions)})')
+
+    return ' AND '.join(clauses) or None
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def search_ids(match_query, queryset=None, limit=MAX_RESULTS):
+    """
+    执行全文检索，返回按 BM25 相关度排序的文章 id 列表
+    queryset 为可选的文章查询集（状态、作者等过滤条件），在同一条 SQL 中与 MATCH 一起过滤，
+    保证截取前 limit 条之前已排除不符合条件的文章
+    索引不可用时返回 None，调用方应退回普通查询
+    """
+    if not is_supported():
+        return None
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    sql = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+    params = [match_query]
+    if queryset is not None:
+        subquery, subquery_params = queryset.order_by().values('id').query.sql_with_params()
+        sql += f' AND rowid IN ({subquery})'
+        params.extend(subquery_params)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{sql} ORDER BY bm25({FTS_TABLE}, {weights}), rowid DESC LIMIT %s',
+                params + [limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+    except DatabaseError as e:
+        logger.warning(f"全文检索失败，使用普通查询: {e}")
+        return None
+
+
+def _index_row(article_id, title, content, tags):
+    return (article_id, tokenize(title), tokenize(content), tokenize((tags or '').replace(',', ' ')))
+
+
+def index_article(article):
+    """同步单篇文章的索引：已发布则写入，否则移除"""
+    if not is_supported():
+        return
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [article.pk])
+            if article.status == 'published':
+                cursor.execute(
+                    f'INSERT INTO {FTS_TABLE}(rowid, title, content, tags) VALUES (%s, %s, %s, %s)',
+                    _index_row(article.pk, article.title, article.content, article.tags)
+                )
+    except DatabaseError as e:
+        logger.error(f"更新文章 {article.pk} 的全文索引失败: {e}")
+
+
+def remove_article(article_id):
+    if not is_supported():
+        return
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [article_id])
+    except DatabaseError as e:
+        logger.error(f"删除文章 {article_id} 的全文索引失败: {e}")
+
+
+def rebuild_index(article_model, using=None, batch_size=500):
+    """清空并重建全文索引，返回收录的文章数"""
+    from django.db import connections
+    conn = connections[using or 'default']
+    if conn.vendor != 'sqlite':
+        return 0
+
+    rows = article_model.objects.using(conn.alias).filter(status='published').values_list(
+        'id', 'title', 'content', 'tags'
+    )
+    total = 0
+    with conn.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(_index_row(*row))
+            if len(batch) >= batch_size:
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE}(rowid, title, content, tags) VALUES (%s, %s, %s, %s)', batch
+                )
+                total += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE}(rowid, title, content, tags) VALUES (%s, %s, %s, %s)', batch
+            )
+            total += len(batch)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return total
+
+
+def highlight(text, terms, length=None):
+    """
+    在原文中用 <mark> 标出查询词，其余部分做 HTML 转义
+    指定 length 时截取第一个命中位置附近的片段作为摘要
+    """
+    text = strip_tags(text or '')
+    terms = [t for t in terms if t]
+    if not terms:
+        return escape(text[:length] if length else text)
+
+    pattern = re.compile('|'.join(re.escape(t) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    prefix = suffix = ''
+    if length:
+        match = pattern.search(text)
+        start = max(0, match.start() - length // 4) if match else 0
+        end = start + length
+        prefix = '…' if start > 0 else ''
+        suffix = '…' if end < len(text) else ''
+        text = text[start:end]
+
+    parts = []
+    last = 0
+    for match in pattern.finditer(text):
+        parts.append(escape(text[last:match.start()]))
+        parts.append(f'<mark>{escape(match.group(0))}</mark>')
+        last = match.end()
+    parts.append(escape(text[last:]))
+    return prefix + ''.join(parts) + suffix
+
+
+def query_terms(*values):
+    """从搜索参数中取出用于高亮的原始词"""
+    terms = []
+    for value in values:
+        if value:
+            terms.extend(t for t in re.split(r'[\s,]+', value) if t)
+    return terms
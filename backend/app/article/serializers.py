@@ -1,13 +1,17 @@
 from rest_framework import serializers
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from probject import settings
+from probject.serializers import BatchListSerializer
 from .models import Article, ArticleLike
 from ..builder.models import Builder
 from ..builder.serializers import BuilderSerializer
+from .counters import article_views
+from ..public.images import image_variants
+from ..user.authentication import resolve_request_user
 
 class ArticleSerializer(serializers.ModelSerializer):
     """文章序列化器"""
     cover_image_url = serializers.SerializerMethodField()
+    cover_image_variants = serializers.SerializerMethodField()
     builder_name = serializers.SerializerMethodField()
     builder = serializers.PrimaryKeyRelatedField(
         queryset=Builder.objects.all(),
@@ -22,14 +26,36 @@ class ArticleSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'content', 'builder', 'builder_name', 'author',
             'author_name',  # 添加到字段列表
-            'cover_image', 'cover_image_url', 'created_at', 'updated_at',
+            'cover_image', 'cover_image_url', 'cover_image_variants', 'created_at', 'updated_at',
             'draft_saved_at', 'published_at', 'status', 'is_featured',
-            'views', 'likes', 'tags', 'is_liked'
+            'views', 'likes', 'comment_count', 'tags', 'is_liked', 'excerpt'
         ]
         read_only_fields = [
-            'views', 'likes', 'created_at', 'updated_at',
-            'draft_saved_at', 'published_at'
+            'views', 'likes', 'comment_count', 'created_at', 'updated_at',
+            'draft_saved_at', 'published_at', 'excerpt'
         ]
+        list_serializer_class = BatchListSerializer
+
+    def prepare_batch(self, articles):
+        """列表序列化前一次性获取整页文章未写回的浏览量和当前用户的点赞记录"""
+        article_ids = [article.pk for article in articles]
+        self._pending_views = article_views.pending_many({article.pk: article.views for article in articles})
+        user = resolve_request_user(self.context.get('request'))
+        if user and article_ids:
+            self._liked_ids = set(ArticleLike.objects.filter(
+                user=user, article_id__in=article_ids
+            ).values_list('article_id', flat=True))
+        else:
+            self._liked_ids = set()
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if 'views' in data:
+            if self.parent is None:
+                data['views'] += article_views.pending(instance.pk, instance.views)
+            else:
+                data['views'] += getattr(self, '_pending_views', {}).get(instance.pk, 0)
+        return data
 
     def get_cover_image_url(self, obj):
         """获取封面图片完整URL，包含域名"""
@@ -37,33 +63,28 @@ class ArticleSerializer(serializers.ModelSerializer):
             return f"{settings.URL_BASE}/{settings.MEDIA_URL.strip('/')}/{obj.cover_image}"
         return None
 
+    def get_cover_image_variants(self, obj):
+        """获取封面缩略图和 WebP 版本的URL，列表页使用 thumb 即可"""
+        return image_variants(obj.cover_image)
+
     def get_is_liked(self, obj):
         """获取当前用户是否点赞过此文章"""
-        request = self.context.get('request')
-        if not request:
-            return False
+        if self.parent is not None and hasattr(self, '_liked_ids'):
+            return obj.pk in self._liked_ids
 
-        # 从请求头中获取 token
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-        if not auth_header.startswith('Bearer '):
+        user = resolve_request_user(self.context.get('request'))
+        if not user:
             return False
-
-        token = auth_header.split(' ')[1]
-        try:
-            # 解码 token 获取用户信息
-            auth = JWTAuthentication()
-            validated_token = auth.get_validated_token(token)
-            user_id = auth.get_user(validated_token)
-            if user_id:
-                return ArticleLike.objects.filter(
-                    article=obj,
-                    user_id=user_id
-                ).exists()
-        except:
-            return False
-
-        return False
+        return ArticleLike.objects.filter(article=obj, user=user).exists()
 
     def get_builder_name(self, obj):
         """获取关联建筑名称"""
-        return obj.builder.name if obj.builder else '无'
\ No newline at end of file
+        return obj.builder.name if obj.builder else '无'
+
+
+class ArticleListSerializer(ArticleSerializer):
+    """
+    列表用的精简序列化器：不输出正文，content 返回摘要（列表页把 content 当作预览显示）
+    查询集应配合 defer('content') 使用，避免读取正文
+    """
+    content = serializers.CharField(source='excerpt', read_only=True)
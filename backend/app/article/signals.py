@@ -0,0 +1,38 @@
+# app/article/signals.py
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from probject.response_cache import invalidate_tags
+from .models import Article
+from . import search
+
+
+# 文章全文索引同步
+@receiver(post_save, sender=Article)
+def sync_article_search_index(sender, instance, **kwargs):
+    search.index_article(instance)
+
+
+@receiver(post_delete, sender=Article)
+def remove_article_search_index(sender, instance, **kwargs):
+    search.remove_article(instance.pk)
+
+
+# 公开接口响应缓存失效：已发布的文章发生变化（包括发布、撤回）时使 article:published 失效
+def _article_cache_tags(instance):
+    tags = ['article']
+    if 'published' in (instance.status, getattr(instance, '_loaded_status', None)):
+        tags.append('article:published')
+    return tags
+
+
+@receiver(post_save, sender=Article)
+def invalidate_article_cache(sender, instance, **kwargs):
+    invalidate_tags(*_article_cache_tags(instance))
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Article)
+def invalidate_deleted_article_cache(sender, instance, **kwargs):
+    invalidate_tags(*_article_cache_tags(instance))
@@ -1,35 +1,45 @@
-import os
-import uuid
-from django.conf import settings
+import re
+
+from django.utils.html import strip_tags
+
+from app.public.blobs import store, release
+
+# 列表摘要长度（字符），与 Article.excerpt 字段长度一致
+EXCERPT_LENGTH = 200
+
+_CODE_BLOCK_RE = re.compile(r'```.*?(```|$)', re.S)
+_IMAGE_RE = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+_LINK_RE = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+_LINE_MARK_RE = re.compile(r'^\s{0,3}(#{1,6}|>+|[-*+]|\d+\.)\s+', re.M)
+_EMPHASIS_RE = re.compile(r'[*`~]+|__')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def make_excerpt(content, length=EXCERPT_LENGTH):
+    """从 Markdown/HTML 正文生成纯文本摘要：去掉代码块、图片、链接地址和格式符号后截取前 length 个字符"""
+    text = _CODE_BLOCK_RE.sub(' ', content or '')
+    text = _IMAGE_RE.sub(' ', text)
+    text = _LINK_RE.sub(r'\1', text)
+    text = strip_tags(text)
+    text = _LINE_MARK_RE.sub('', text)
+    text = _EMPHASIS_RE.sub('', text)
+    return _SPACE_RE.sub(' ', text).strip()[:length]
+
 
 def handle_uploaded_file(file, directory='articles'):
     """处理上传的文件
 
     Args:
         file: 上传的文件对象
-        directory: 存储的子目录名
+        directory: 保留参数，文件按内容寻址保存，相同内容只保存一份
 
     Returns:
         str: 文件的相对路径
     """
-    # 生成唯一文件名
-    ext = os.path.splitext(file.name)[1]
-    filename = f"{uuid.uuid4()}{ext}"
-
-    # 确保目录存在
-    relative_path = os.path.join(directory, filename)
-    absolute_path = os.path.join(settings.MEDIA_ROOT, relative_path)
-    os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
-
-    # 写入文件
-    with open(absolute_path, 'wb+') as destination:
-        for chunk in file.chunks():
-            destination.write(chunk)
-
-    return relative_path
+    return store(file)
 
 def delete_file(file_path):
-    """删除文件
+    """删除文件（内容寻址的文件可能被共享，由垃圾回收处理）
 
     Args:
         file_path: 文件的相对路径
@@ -37,9 +47,7 @@ def delete_file(file_path):
     if not file_path:
         return
 
-    absolute_path = os.path.join(settings.MEDIA_ROOT, file_path)
     try:
-        if os.path.exists(absolute_path):
-            os.remove(absolute_path)
+        release(file_path)
     except Exception as e:
         print(f"删除文件失败: {str(e)}")
\ No newline at end of file
@@ -8,8 +8,14 @@ from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from probject import settings
 from .models import Article, ArticleLike
-from .serializers import ArticleSerializer
+from .serializers import ArticleSerializer, ArticleListSerializer
+from .counters import article_views, article_likes
+from probject.response_cache import cached_view
+from probject.pagination import InvalidCursor, KeysetPagination, select_paginator
+from . import search
+from app.tag.services import filter_articles_by_tags, article_tag_names
 from app.user.decorators import jwt_required, admin_required
+from app.user.authentication import resolve_request_user
 from .utils import handle_uploaded_file, delete_file
 from ..builder.models import Builder
 import logging
@@ -23,6 +29,11 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
+
+def get_paginator(request):
+    """请求带 cursor 或 limit 参数时按 (created_at, id) 键集分页，否则按页码分页"""
+    return select_paginator(request, StandardResultsSetPagination)
+
 # 工具函数：确保数据为 UTF-8 编码
 def force_utf8_encoding(data):
     """递归处理数据，确保字符串为 UTF-8 编码"""
@@ -55,13 +66,14 @@ def filter_articles(request, queryset=None):
     builder_id = request.GET.get('builder')
     tag = request.GET.get('tag')
     author_id = request.GET.get('author')
+    user = resolve_request_user(request)
 
     # 普通用户只能看到 published 文章
-    if not request.auth_user or not request.auth_user.is_staff:
+    if not user or not user.is_staff:
         queryset = queryset.filter(status='published')
 
     # 管理员可按状态过滤
-    if status_filter and status_filter != 'all' and request.auth_user and request.auth_user.is_staff:
+    if status_filter and status_filter != 'all' and user and user.is_staff:
         queryset = queryset.filter(status=status_filter)
 
     if search_query:
@@ -69,11 +81,25 @@ def filter_articles(request, queryset=None):
     if builder_id:
         queryset = queryset.filter(builder_id=builder_id)
     if tag:
-        queryset = queryset.filter(tags__icontains=tag)
+        queryset = filter_articles_by_tags(queryset, [tag])
     if author_id:
         queryset = queryset.filter(author_id=author_id)
 
-    return queryset.order_by('-created_at')
+    return queryset.select_related('author', 'builder').order_by('-created_at')
+
+# 列表精简模式不读取的列：文章正文，以及关联建筑中较大的字段
+LIST_DEFERRED_FIELDS = ['content', 'builder__description', 'builder__json', 'builder__model_variants']
+
+
+def list_projection(request, queryset):
+    """
+    列表接口默认使用精简模式：不读取正文，content 返回摘要；?view=full 时返回完整正文
+    返回 (查询集, 序列化器类)
+    """
+    queryset = queryset.select_related('author', 'builder')
+    if request.GET.get('view') == 'full':
+        return queryset, ArticleSerializer
+    return queryset.defer(*LIST_DEFERRED_FIELDS), ArticleListSerializer
 
 # 普通用户视图
 
@@ -127,17 +153,19 @@ def create_article(request):
 def get_article_list(request):
     """获取文章列表（分页，普通用户只看到已发布文章）"""
     try:
-        paginator = StandardResultsSetPagination()
-        queryset = filter_articles(request)
+        paginator = get_paginator(request)
+        queryset, serializer_class = list_projection(request, filter_articles(request))
         page = paginator.paginate_queryset(queryset, request)
-        serializer = ArticleSerializer(page, many=True, context={'request': request})
-        logger.info(f"用户 {getattr(request.auth_user, 'id', '匿名')} 获取文章列表")
+        serializer = serializer_class(page, many=True, context={'request': request})
+        logger.info(f"用户 {getattr(resolve_request_user(request), 'id', '匿名')} 获取文章列表")
         return paginator.get_paginated_response({
             'code': 200,
             'message': '获取文章列表成功',
             'data': serializer.data
         })
 
+    except InvalidCursor as e:
+        return standard_response(400, str(e))
     except Exception as e:
         logger.error(f"获取文章列表失败: {str(e)}")
         return standard_response(500, f'获取失败: {str(e)}')
@@ -146,9 +174,9 @@ def get_article_list(request):
 def get_all_articles(request):
     """获取所有文章（不分页，普通用户只看到已发布文章）"""
     try:
-        queryset = filter_articles(request)
-        serializer = ArticleSerializer(queryset, many=True, context={'request': request})
-        logger.info(f"用户 {getattr(request.auth_user, 'id', '匿名')} 获取所有文章")
+        queryset, serializer_class = list_projection(request, filter_articles(request))
+        serializer = serializer_class(queryset, many=True, context={'request': request})
+        logger.info(f"用户 {getattr(resolve_request_user(request), 'id', '匿名')} 获取所有文章")
         return standard_response(200, '获取文章列表成功', serializer.data)
 
     except Exception as e:
@@ -160,13 +188,13 @@ def get_article_detail(request, article_id):
     """获取文章详情（普通用户只看到已发布文章）"""
     try:
         article = get_object_or_404(Article, id=article_id)
-        if article.status != 'published' and (not request.auth_user or not request.auth_user.is_staff):
+        user = resolve_request_user(request)
+        if article.status != 'published' and (not user or (not user.is_staff and user.id != article.author_id)):
             return standard_response(403, '无权限查看此文章')
 
         if article.status == 'published':
-            article.views = F('views') + 1
-            article.save()
-            article.refresh_from_db()
+            # 浏览量先累加到 Redis，由定时任务批量写回数据库
+            article_views.incr(article.id)
 
         serializer = ArticleSerializer(article, context={'request': request})
         logger.info(f"文章详情获取成功: ID {article_id}")
@@ -343,14 +371,10 @@ def like_article(request, article_id):
         if article.status != 'published':
             return standard_response(400, '只能给已发布的文章点赞')
 
-        like_record = ArticleLike.objects.filter(article=article, user=request.auth_user).first()
-        if like_record:
+        created, article.likes = article_likes.like(article.id, request.auth_user.id)
+        if not created:
             return standard_response(400, '您已经点赞过这篇文章')
 
-        ArticleLike.objects.create(article=article, user=request.auth_user)
-        article.likes = F('likes') + 1
-        article.save()
-        article.refresh_from_db()
         logger.info(f"文章点赞成功: ID {article_id}, 用户 {request.auth_user.id}")
         return standard_response(200, '点赞成功', ArticleSerializer(article, context={'request': request}).data)
 
@@ -364,14 +388,10 @@ def unlike_article(request, article_id):
     """取消点赞文章"""
     try:
         article = get_object_or_404(Article, id=article_id)
-        like_record = ArticleLike.objects.filter(article=article, user=request.auth_user).first()
-        if not like_record:
+        removed, article.likes = article_likes.unlike(article.id, request.auth_user.id)
+        if not removed:
             return standard_response(400, '您还没有点赞过这篇文章')
 
-        like_record.delete()
-        article.likes = F('likes') - 1
-        article.save()
-        article.refresh_from_db()
         logger.info(f"取消点赞成功: ID {article_id}, 用户 {request.auth_user.id}")
         return standard_response(200, '取消点赞成功', ArticleSerializer(article, context={'request': request}).data)
 
@@ -380,13 +400,16 @@ def unlike_article(request, article_id):
         return standard_response(500, f'取消点赞失败: {str(e)}')
 
 @api_view(['GET'])
+@cached_view(tags=['article:published', 'builder'], vary_on_user=True)
 def get_featured_articles(request):
     """获取精选文章列表（仅已发布文章）"""
     try:
-        paginator = StandardResultsSetPagination()
-        queryset = Article.objects.filter(is_featured=True, status='published')
+        paginator = get_paginator(request)
+        queryset, serializer_class = list_projection(
+            request, Article.objects.filter(is_featured=True, status='published')
+        )
         page = paginator.paginate_queryset(queryset, request)
-        serializer = ArticleSerializer(page, many=True, context={'request': request})
+        serializer = serializer_class(page, many=True, context={'request': request})
         logger.info(f"用户 {getattr(request.user, 'id', '匿名')} 获取精选文章")
         return paginator.get_paginated_response({
             'code': 200,
@@ -394,6 +417,8 @@ def get_featured_articles(request):
             'data': serializer.data
         })
 
+    except InvalidCursor as e:
+        return standard_response(400, str(e))
     except Exception as e:
         logger.error(f"获取精选文章失败: {str(e)}")
         return standard_response(500, f'获取失败: {str(e)}')
@@ -403,20 +428,22 @@ def get_featured_articles(request):
 def get_my_articles(request):
     """获取用户自己的文章列表（包括草稿、审核中、审核失败、已发布）"""
     try:
-        paginator = StandardResultsSetPagination()
+        paginator = get_paginator(request)
         queryset = Article.objects.filter(author=request.user)  # 修复：request.auser 改为 request.user
         status_filter = request.GET.get('status')
         if status_filter and status_filter != 'all':
             queryset = queryset.filter(status=status_filter)
-        queryset = queryset.order_by('-created_at')
+        queryset, serializer_class = list_projection(request, queryset.order_by('-created_at'))
         page = paginator.paginate_queryset(queryset, request)
-        serializer = ArticleSerializer(page, many=True, context={'request': request})
+        serializer = serializer_class(page, many=True, context={'request': request})
 
         return paginator.get_paginated_response({
             'code': 200,
             'message': '获取我的文章列表成功',
             'data': serializer.data
         })
+    except InvalidCursor as e:
+        return standard_response(400, str(e))
     except Exception as e:
         logger.error(f"获取我的文章失败: {str(e)}")
         return standard_response(500, f'获取失败: {str(e)}')
@@ -443,18 +470,18 @@ def upload_image(request):
         logger.error(f"图片上传失败: {str(e)}")
         return standard_response(500, f'上传失败: {str(e)}')
 
+# 排行依赖浏览量和点赞数，计数写回数据库不触发信号，缓存时间较短
 @api_view(['GET'])
+@cached_view(tags=['article:published', 'builder'], timeout=60, vary_on_user=True)
 def get_top_articles(request):
     """获取热门文章（前10，基于点赞和浏览量）"""
     try:
 
         print("测试" + str(request.user))
-        articles = Article.objects.filter(status='published').annotate(
+        articles, serializer_class = list_projection(request, Article.objects.filter(status='published').annotate(
             score=(F('likes') + F('views')) * 0.5
-        ).order_by('-score')[:10]
-        for article in articles:
-            article.content = article.content[:30]
-        serializer = ArticleSerializer(articles, many=True, context={'request': request})
+        ).order_by('-score'))
+        serializer = serializer_class(articles[:10], many=True, context={'request': request})
         logger.info(f"用户 {getattr(request, 'id', '匿名')} 获取热门文章")
         return standard_response(200, '获取热门文章成功', serializer.data)
 
@@ -463,16 +490,11 @@ def get_top_articles(request):
         return standard_response(500, f'获取失败: {str(e)}')
 
 @api_view(['GET'])
+@cached_view(tags=['article:published'])
 def get_all_tags(request):
     """获取所有标签（去重，仅已发布文章）"""
     try:
-        articles = Article.objects.filter(status='published')
-        tags = set()
-        for article in articles:
-            if article.tags:
-                cleaned_tags = [tag.strip() for tag in article.tags.split(',') if tag.strip()]
-                tags.update(cleaned_tags)
-        sorted_tags = sorted(tags)
+        sorted_tags = article_tag_names()
         logger.info(f"用户 {getattr(request.user, 'id', '匿名')} 获取标签")
         return standard_response(200, '获取标签成功', sorted_tags)
 
@@ -482,44 +504,92 @@ def get_all_tags(request):
 
 @api_view(['GET'])
 def search_articles(request):
-    """搜索文章（分页，仅已发布文章）"""
+    """
+    搜索文章（分页，仅已发布文章）
+    标题/正文/标签/关键词走 FTS5 全文索引，按 BM25 相关度排序并返回高亮摘要；
+    索引不可用时退回 LIKE 查询
+    """
     try:
-        articles = Article.objects.filter(status='published').order_by('-created_at')
-        title = request.query_params.get('title')
-        content = request.query_params.get('content')
-        author = request.query_params.get('author')
+        title = (request.query_params.get('title') or '').strip()
+        content = (request.query_params.get('content') or '').strip()
+        keyword = (request.query_params.get('keyword') or '').strip()
+        author = (request.query_params.get('author') or '').strip()
         tags = request.query_params.get('tags')
-
-        if title and title.strip():
-            articles = articles.filter(title__icontains=title.strip())
-        if content and content.strip():
-            articles = articles.filter(content__icontains=content.strip())
-        if author and author.strip():
-            articles = articles.filter(author__username__icontains=author.strip())
-        if tags and tags != 'undefined' and tags.strip():
-            tags_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
-            if tags_list:
-                query = Q()
-                for tag in tags_list:
-                    query |= Q(tags__icontains=tag)
-                articles = articles.filter(query)
-
-        logger.debug(f"搜索参数: {request.query_params}, 文章数量: {articles.count()}")
-
-        paginator = StandardResultsSetPagination()
-        paginated_articles = paginator.paginate_queryset(articles, request)
+        if not tags or tags == 'undefined':
+            tags = ''
+        tags = tags.strip()
+
+        articles, serializer_class = list_projection(request, Article.objects.filter(status='published'))
+        if author:
+            articles = articles.filter(author__username__icontains=author)
+
+        match_query = search.build_match_query(title=title, content=content, tags=tags, keyword=keyword)
+        # 状态、作者过滤在全文检索的 SQL 中完成，多取一条用于判断结果是否超过上限
+        ranked_ids = search.search_ids(
+            match_query, queryset=articles, limit=search.MAX_RESULTS + 1
+        ) if match_query else None
+
+        paginator = get_paginator(request)
+        count_exact = True
+        if ranked_ids is not None:
+            # 全文检索结果按相关度排序，只对当前页的文章取完整数据
+            if len(ranked_ids) > search.MAX_RESULTS:
+                ranked_ids = ranked_ids[:search.MAX_RESULTS]
+                count_exact = False
+            page_ids = paginator.paginate_queryset(ranked_ids, request)
+            page_articles = articles.in_bulk(page_ids)
+            paginated_articles = [page_articles[article_id] for article_id in page_ids if article_id in page_articles]
+            count = len(ranked_ids)
+            if isinstance(paginator, KeysetPagination):
+                paginator.count_exact = count_exact
+        else:
+            articles = articles.order_by('-created_at')
+            if title:
+                articles = articles.filter(title__icontains=title)
+            if content:
+                articles = articles.filter(content__icontains=content)
+            if keyword:
+                articles = articles.filter(Q(title__icontains=keyword) | Q(content__icontains=keyword))
+            if tags:
+                articles = filter_articles_by_tags(articles, tags.split(','))
+            paginated_articles = paginator.paginate_queryset(articles, request)
+            count = paginator.count if isinstance(paginator, KeysetPagination) else paginator.page.paginator.count
+
+        logger.debug(f"搜索参数: {request.query_params}, 文章数量: {count}")
+
+        terms = search.query_terms(title, content, keyword, tags)
+        list_mode = serializer_class is ArticleListSerializer
+        bodies = {}
+        if list_mode and (content or keyword):
+            # 按正文搜索时才需要在正文中截取命中片段，且只读取当前页的正文
+            bodies = dict(Article.objects.filter(
+                id__in=[article.id for article in paginated_articles]
+            ).values_list('id', 'content'))
+        highlights = {}
         for article in paginated_articles:
-            if article.content:
-                article.content = article.content[:30]
-        serializer = ArticleSerializer(paginated_articles, many=True, context={'request': request})
-
+            body = bodies.get(article.id, article.excerpt) if list_mode else article.content
+            highlights[article.id] = {
+                'title': search.highlight(article.title, terms),
+                'snippet': search.highlight(body, terms, search.SNIPPET_LENGTH),
+            }
+        serializer = serializer_class(paginated_articles, many=True, context={'request': request})
+
+        results = serializer.data
+        for item in results:
+            item['highlight'] = highlights.get(item['id'])
+
+        if isinstance(paginator, KeysetPagination):
+            return standard_response(200, '获取文章列表成功', dict(paginator.get_pagination_data(), results=results))
         return standard_response(200, '获取文章列表成功', {
-            'count': articles.count(),
+            'count': count,
+            'count_exact': count_exact,  # 全文检索结果超过 MAX_RESULTS 条时只返回前若干条，count 为下限
             'next': paginator.get_next_link(),
             'previous': paginator.get_previous_link(),
-            'results': serializer.data
+            'results': results
         })
 
+    except InvalidCursor as e:
+        return standard_response(400, str(e))
     except Exception as e:
         logger.error(f"搜索文章失败: {str(e)}")
         return standard_response(500, f'获取失败: {str(e)}')
@@ -570,7 +640,7 @@ def admin_create_article(request):
 def admin_get_all_articles(request):
     """管理员获取所有文章（分页）"""
     try:
-        paginator = StandardResultsSetPagination()
+        paginator = get_paginator(request)
         queryset = Article.objects.all().order_by('-created_at')
         status_filter = request.GET.get('status')
         search_query = request.GET.get('search')
@@ -580,8 +650,9 @@ def admin_get_all_articles(request):
         if search_query and search_query != 'undefined':
             queryset = queryset.filter(Q(title__icontains=search_query) | Q(content__icontains=search_query))
 
+        queryset, serializer_class = list_projection(request, queryset)
         page = paginator.paginate_queryset(queryset, request)
-        serializer = ArticleSerializer(page, many=True, context={'request': request})
+        serializer = serializer_class(page, many=True, context={'request': request})
         logger.info(f"管理员 {request.auth_user.id} 获取所有文章")
         return paginator.get_paginated_response({
             'code': 200,
@@ -589,6 +660,8 @@ def admin_get_all_articles(request):
             'data': serializer.data
         })
 
+    except InvalidCursor as e:
+        return standard_response(400, str(e))
     except Exception as e:
         logger.error(f"管理员获取文章失败: {str(e)}")
         return standard_response(500, f'获取失败: {str(e)}')
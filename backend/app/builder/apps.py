@@ -7,3 +7,7 @@ class BuilderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app.builder'  # 必须与INSTALLED_APPS中的路径一致
     verbose_name = '建筑管理'  # 可选：自定义显示名称
+
+    def ready(self):
+        # 注册响应缓存失效信号
+        from . import signals  # noqa: F401
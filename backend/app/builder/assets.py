@@ -0,0 +1,243 @@
+# app/builder/assets.py
+
+import hashlib
+import logging
+import os
+import re
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可在 settings.MODEL_ASSETS 中覆盖
+DEFAULT_CONFIG = {
+    'URL_PREFIX': '/assets/',               # 带内容摘要的模型地址前缀，与 probject/urls.py 一致
+    'DIRECTORIES': ['blobs/', 'builders/models/', 'models/'],  # MEDIA_ROOT 下允许通过该地址访问的目录
+    'MAX_AGE': 3600 * 24 * 365,             # 地址包含内容摘要，可以长期缓存
+    'DIGEST_CACHE_TIMEOUT': 3600 * 24 * 7,
+}
+
+CONTENT_TYPES = {
+    '.glb': 'model/gltf-binary',
+    '.gltf': 'model/gltf+json',
+    '.bin': 'application/octet-stream',
+    '.obj': 'model/obj',
+    '.fbx': 'application/octet-stream',
+}
+
+# 地址中摘要的长度（SHA-256 前 16 位十六进制）
+DIGEST_LENGTH = 16
+BUFFER_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# 进程内缓存文件摘要，键包含文件大小和修改时间，文件变化后自动失效
+_digests = {}
+_digest_lock = threading.Lock()
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'MODEL_ASSETS', {}))
+    return config
+
+
+def asset_path(name):
+    """
+    模型文件在 MEDIA_ROOT 中的绝对路径
+    只允许 DIRECTORIES 中的目录和已知的模型扩展名，否则返回 None
+    """
+    name = (name or '').replace('\\', '/')
+    if os.path.splitext(name)[1].lower() not in CONTENT_TYPES:
+        return None
+    if not any(name.startswith(directory) for directory in get_config()['DIRECTORIES']):
+        return None
+    try:
+        return safe_join(settings.MEDIA_ROOT, name)
+    except Exception:
+        return None
+
+
+def file_digest(path, stat=None):
+    """
+    文件内容的 SHA-256 摘要（截取前 DIGEST_LENGTH 位）
+    按 (路径, 大小, 修改时间) 缓存在进程内和 Django 缓存中，文件只在首次访问或变化后读取一次；
+    缓存不可用时直接计算
+    """
+    stat = stat or os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    digest = _digests.get(key)
+    if digest:
+        return digest
+
+    cache_key = 'model_asset:digest:' + hashlib.md5(
+        f'{path}:{stat.st_size}:{stat.st_mtime_ns}'.encode()
+    ).hexdigest()
+    try:
+        digest = cache.get(cache_key)
+    except Exception as e:
+        logger.warning(f"读取模型文件摘要缓存失败: {e}")
+        digest = None
+    if not digest:
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(BUFFER_SIZE), b''):
+                sha256.update(block)
+        digest = sha256.hexdigest()[:DIGEST_LENGTH]
+        try:
+            cache.set(cache_key, digest, get_config()['DIGEST_CACHE_TIMEOUT'])
+        except Exception as e:
+            logger.warning(f"写入模型文件摘要缓存失败: {e}")
+
+    with _digest_lock:
+        if len(_digests) > 10000:
+            _digests.clear()
+        _digests[key] = digest
+    return digest
+
+
+def name_digest(name):
+    """MEDIA_ROOT 下模型文件的内容摘要，文件不存在或不在允许的目录中时返回空字符串"""
+    path = asset_path(name)
+    if not path:
+        return ''
+    try:
+        return file_digest(path)
+    except OSError:
+        return ''
+
+
+def asset_url(name, digest=None):
+    """
+    模型文件的访问地址
+    digest 通常取自 Builder.model_digest，未提供时按文件计算；
+    能得到摘要时返回不可变地址，否则退回普通的 /media/ 地址
+    """
+    if not name:
+        return None
+    name = str(name)
+    digest = digest or name_digest(name)
+    if digest:
+        return f"{settings.URL_BASE}{get_config()['URL_PREFIX']}{digest}/{name}"
+    return f"{settings.URL_BASE}/media/{name}"
+
+
+def parse_range(header, size):
+    """
+    解析单个 bytes 范围，返回 (start, end)（包含 end）
+    请求头不存在、格式不支持或包含多个范围时返回 None（按完整文件响应）；
+    范围无法满足时抛出 ValueError
+    """
+    match = _RANGE_RE.match((header or '').replace(' ', ''))
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start:
+        # bytes=-N：最后 N 个字节
+        if not end:
+            return None
+        length = int(end)
+        if length == 0 or size == 0:
+            raise ValueError('无法满足的范围')
+        return max(size - length, 0), size - 1
+    start = int(start)
+    if end and int(end) < start:
+        return None
+    if start >= size:
+        raise ValueError('无法满足的范围')
+    end = int(end) if end else size - 1
+    return start, min(end, size - 1)
+
+
+def _if_range_matches(request, etag, last_modified):
+    """If-Range 与当前版本一致时才按范围响应，否则返回完整文件"""
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith('W/'):
+        # If-Range 要求强比较
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+class _RangeFile:
+    """只读取文件中指定长度的内容，用于有结束位置的范围请求"""
+
+    def __init__(self, f, length):
+        self.file = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _set_cache_headers(response, etag, last_modified, max_age):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = f'public, max-age={max_age}, immutable'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def asset_response(request, path, stat=None):
+    """
+    构造模型文件响应：支持条件请求（ETag / Last-Modified）和单个字节范围
+    完整文件和 bytes=N- 形式的范围直接交给 FileResponse，WSGI 服务器可用 sendfile 零拷贝发送
+    """
+    stat = stat or os.stat(path)
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    etag = quote_etag(file_digest(path, stat))
+    max_age = get_config()['MAX_AGE']
+    content_type = CONTENT_TYPES.get(os.path.splitext(path)[1].lower(), 'application/octet-stream')
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        if isinstance(conditional, HttpResponseNotModified):
+            _set_cache_headers(conditional, etag, last_modified, max_age)
+        return conditional
+
+    byte_range = None
+    if request.META.get('HTTP_RANGE') and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return _set_cache_headers(response, etag, last_modified, max_age)
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type, status=206 if byte_range else 200)
+    else:
+        f = open(path, 'rb')
+        if start:
+            f.seek(start)
+        if end < size - 1:
+            response = FileResponse(_RangeFile(f, length), content_type=content_type)
+        else:
+            response = FileResponse(f, content_type=content_type)
+        if byte_range:
+            response.status_code = 206
+
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(length)
+    return _set_cache_headers(response, etag, last_modified, max_age)
@@ -0,0 +1,84 @@
+# app/builder/geo.py
+
+import json
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# 存储的 geohash 精度（9 位约 5 米）
+GEOHASH_PRECISION = 9
+
+
+def parse_address(address):
+    """
+    解析 address 字段中的 "[纬度, 经度]" 坐标
+    无法解析或超出范围时返回 None
+    """
+    if not address:
+        return None
+    try:
+        coords = json.loads(address.replace(' ', ''))
+        latitude, longitude = float(coords[0]), float(coords[1])
+    except (ValueError, TypeError, IndexError, KeyError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """把经纬度编码为 geohash 字符串"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # 偶数位编码经度
+    while len(chars) < precision:
+        value, value_range = (longitude, lng_range) if even else (latitude, lat_range)
+        mid = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            value_range[0] = mid
+        else:
+            value_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def precision_for_zoom(zoom):
+    """
+    地图缩放级别对应的聚合 geohash 精度
+    聚合格子大小约为当前缩放级别下一个瓦片的四分之一到一半
+    """
+    return max(1, min(GEOHASH_PRECISION, (zoom + 2) // 2))
+
+
+def parse_bbox(value):
+    """
+    解析 "west,south,east,north"（即 Leaflet 的 toBBoxString 格式）
+    返回 (west, south, east, north)；格式错误时抛出 ValueError
+    """
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError('bbox 需要 4 个数值')
+    west, south, east, north = parts
+    if not (-90 <= south <= north <= 90):
+        raise ValueError('纬度范围错误')
+    # 经度跨度达到 360 度时视为覆盖全部经度（地图缩到最小时会出现），其余情况折回 [-180, 180]
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    else:
+        west, east = _wrap_longitude(west), _wrap_longitude(east)
+    return west, south, east, north
+
+
+def _wrap_longitude(longitude):
+    if -180 <= longitude <= 180:
+        return longitude
+    return (longitude + 180) % 360 - 180
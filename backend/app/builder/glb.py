@@ -0,0 +1,642 @@
+# app/builder/glb.py
+"""
+GLB（二进制 glTF 2.0）解析、精简与写出
+
+只依赖标准库和 Pillow：
+- 只重新写出被引用的数据（未使用的 accessor / bufferView / 图片、材质不需要的顶点属性、extras 都会被去掉）
+- 顶点属性按 KHR_mesh_quantization 量化：位置 int16（通过节点变换还原）、法线和切线 int8、UV uint16
+- 按顶点聚类（网格合并）简化三角形，生成不同细节层级
+- 可选把内嵌贴图缩小到指定尺寸
+"""
+
+import copy
+import io
+import json
+import math
+import struct
+
+GLB_MAGIC = 0x46546C67
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+BYTE, UNSIGNED_BYTE, SHORT, UNSIGNED_SHORT, UNSIGNED_INT, FLOAT = 5120, 5121, 5122, 5123, 5125, 5126
+COMPONENTS = {
+    BYTE: ('b', 1), UNSIGNED_BYTE: ('B', 1), SHORT: ('h', 2),
+    UNSIGNED_SHORT: ('H', 2), UNSIGNED_INT: ('I', 4), FLOAT: ('f', 4),
+}
+TYPE_SIZES = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT2': 4, 'MAT3': 9, 'MAT4': 16}
+TYPES_BY_SIZE = {1: 'SCALAR', 2: 'VEC2', 3: 'VEC3', 4: 'VEC4'}
+NORMALIZE_DIVISORS = {BYTE: 127.0, UNSIGNED_BYTE: 255.0, SHORT: 32767.0, UNSIGNED_SHORT: 65535.0}
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+TRIANGLES = 4
+
+QUANTIZATION_EXTENSION = 'KHR_mesh_quantization'
+# 已经压缩过几何数据的模型不再处理
+UNSUPPORTED_EXTENSIONS = {'KHR_draco_mesh_compression', 'EXT_meshopt_compression', QUANTIZATION_EXTENSION}
+
+IMAGE_FORMATS = {'image/png': 'PNG', 'image/jpeg': 'JPEG', 'image/webp': 'WEBP'}
+
+
+class GLBError(ValueError):
+    """文件不是有效的 GLB"""
+
+
+class UnsupportedModel(ValueError):
+    """GLB 使用了当前无法处理的特性（外部资源、稀疏 accessor、几何压缩等）"""
+
+
+def parse_glb(data):
+    """解析 GLB 容器，返回 (gltf JSON 字典, BIN 块字节)"""
+    if len(data) < 20:
+        raise GLBError('文件过小')
+    magic, version, length = struct.unpack_from('<III', data, 0)
+    if magic != GLB_MAGIC:
+        raise GLBError('不是 GLB 文件')
+    if version != 2:
+        raise GLBError(f'不支持的 glTF 版本: {version}')
+    if length > len(data):
+        raise GLBError('文件不完整')
+
+    gltf = None
+    binary = b''
+    offset = 12
+    while offset + 8 <= length:
+        chunk_length, chunk_type = struct.unpack_from('<II', data, offset)
+        chunk = data[offset + 8:offset + 8 + chunk_length]
+        if chunk_type == CHUNK_JSON and gltf is None:
+            try:
+                gltf = json.loads(bytes(chunk).decode('utf-8'))
+            except (UnicodeDecodeError, ValueError):
+                raise GLBError('JSON 块格式错误')
+        elif chunk_type == CHUNK_BIN and not binary:
+            binary = bytes(chunk)
+        offset += 8 + chunk_length
+    if gltf is None:
+        raise GLBError('缺少 JSON 块')
+    return gltf, binary
+
+
+def write_glb(gltf, binary):
+    """把 gltf JSON 和 BIN 数据写成 GLB 字节串"""
+    json_bytes = json.dumps(gltf, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    json_bytes += b' ' * (-len(json_bytes) % 4)
+    binary += b'\0' * (-len(binary) % 4)
+    length = 12 + 8 + len(json_bytes) + (8 + len(binary) if binary else 0)
+    parts = [
+        struct.pack('<III', GLB_MAGIC, 2, length),
+        struct.pack('<II', len(json_bytes), CHUNK_JSON), json_bytes,
+    ]
+    if binary:
+        parts += [struct.pack('<II', len(binary), CHUNK_BIN), binary]
+    return b''.join(parts)
+
+
+def check_supported(gltf):
+    """模型使用了无法处理的特性时抛出 UnsupportedModel"""
+    used = set(gltf.get('extensionsUsed', [])) | set(gltf.get('extensionsRequired', []))
+    compressed = used & UNSUPPORTED_EXTENSIONS
+    if compressed:
+        raise UnsupportedModel(f"模型已使用 {', '.join(sorted(compressed))}")
+    for buffer in gltf.get('buffers', [])[:1]:
+        if 'uri' in buffer:
+            raise UnsupportedModel('模型引用了外部缓冲区')
+    if len(gltf.get('buffers', [])) > 1:
+        raise UnsupportedModel('模型包含多个缓冲区')
+    for accessor in gltf.get('accessors', []):
+        if 'sparse' in accessor:
+            raise UnsupportedModel('模型包含稀疏 accessor')
+
+
+class _Reader:
+    """按 accessor 读取 BIN 中的数据"""
+
+    def __init__(self, gltf, binary):
+        self.accessors = gltf.get('accessors', [])
+        self.views = gltf.get('bufferViews', [])
+        self.binary = binary
+
+    def info(self, index):
+        accessor = self.accessors[index]
+        return accessor['componentType'], TYPE_SIZES[accessor['type']], accessor.get('normalized', False)
+
+    def read(self, index):
+        """返回原始分量值的元组列表"""
+        accessor = self.accessors[index]
+        component_type, size, _ = self.info(index)
+        char, component_size = COMPONENTS[component_type]
+        count = accessor['count']
+        if accessor['type'].startswith('MAT') and component_type != FLOAT:
+            raise UnsupportedModel('不支持非浮点矩阵 accessor')
+        if 'bufferView' not in accessor:
+            return [(0,) * size] * count
+
+        view = self.views[accessor['bufferView']]
+        offset = view.get('byteOffset', 0) + accessor.get('byteOffset', 0)
+        element_size = component_size * size
+        stride = view.get('byteStride') or element_size
+        if offset + stride * (count - 1) + element_size > len(self.binary):
+            raise GLBError('accessor 超出缓冲区范围')
+        fmt = struct.Struct('<' + char * size)
+        if stride == element_size:
+            return list(fmt.iter_unpack(self.binary[offset:offset + element_size * count]))
+        return [fmt.unpack_from(self.binary, offset + i * stride) for i in range(count)]
+
+    def read_float(self, index):
+        """读取并把归一化整数转换为浮点数"""
+        component_type, _, normalized = self.info(index)
+        values = self.read(index)
+        if not normalized or component_type == FLOAT:
+            return [tuple(float(v) for v in value) for value in values]
+        divisor = NORMALIZE_DIVISORS[component_type]
+        return [tuple(max(v / divisor, -1.0) for v in value) for value in values]
+
+    def view_bytes(self, index):
+        view = self.views[index]
+        offset = view.get('byteOffset', 0)
+        return self.binary[offset:offset + view['byteLength']]
+
+
+class _Writer:
+    """重新生成 BIN 缓冲区、bufferView 和 accessor"""
+
+    def __init__(self):
+        self.parts = []
+        self.length = 0
+        self.views = []
+        self.accessors = []
+
+    def add_view(self, data, target=None, stride=None):
+        padding = -self.length % 4
+        if padding:
+            self.parts.append(b'\0' * padding)
+            self.length += padding
+        view = {'buffer': 0, 'byteOffset': self.length, 'byteLength': len(data)}
+        if target:
+            view['target'] = target
+        if stride:
+            view['byteStride'] = stride
+        self.parts.append(data)
+        self.length += len(data)
+        self.views.append(view)
+        return len(self.views) - 1
+
+    def add_accessor(self, values, component_type, size, target=None, normalized=False, bounds=False, extra=None):
+        """写入一组分量值；顶点属性每个元素按 4 字节对齐"""
+        char, component_size = COMPONENTS[component_type]
+        element_size = component_size * size
+        stride = None
+        padding = b''
+        if target == ARRAY_BUFFER and element_size % 4:
+            padding = b'\0' * (-element_size % 4)
+            stride = element_size + len(padding)
+        fmt = struct.Struct('<' + char * size)
+        if padding:
+            data = b''.join(fmt.pack(*value) + padding for value in values)
+        else:
+            data = b''.join(fmt.pack(*value) for value in values)
+
+        accessor = {
+            'bufferView': self.add_view(data, target, stride),
+            'componentType': component_type,
+            'count': len(values),
+            'type': TYPES_BY_SIZE[size] if size <= 4 else {9: 'MAT3', 16: 'MAT4'}[size],
+        }
+        if normalized:
+            accessor['normalized'] = True
+        if bounds and values:
+            accessor['min'] = [min(value[i] for value in values) for i in range(size)]
+            accessor['max'] = [max(value[i] for value in values) for i in range(size)]
+        if extra:
+            accessor.update(extra)
+        self.accessors.append(accessor)
+        return len(self.accessors) - 1
+
+    def binary(self):
+        return b''.join(self.parts)
+
+
+def _texture_coordinates(material):
+    """材质中贴图使用的 UV 通道和是否使用法线贴图"""
+    used = set()
+
+    def walk(value):
+        if isinstance(value, dict):
+            if 'index' in value and isinstance(value['index'], int):
+                transform = value.get('extensions', {}).get('KHR_texture_transform', {})
+                used.add(transform.get('texCoord', value.get('texCoord', 0)))
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    walk(material or {})
+    return used, 'normalTexture' in (material or {})
+
+
+def _strip_extras(value):
+    if isinstance(value, dict):
+        value.pop('extras', None)
+        for item in value.values():
+            _strip_extras(item)
+    elif isinstance(value, list):
+        for item in value:
+            _strip_extras(item)
+
+
+def _quantize_unit(values, component_type):
+    divisor = int(NORMALIZE_DIVISORS[component_type])
+    low = -divisor if component_type in (BYTE, SHORT) else 0
+    return [tuple(min(max(int(round(v * divisor)), low), divisor) for v in value) for value in values]
+
+
+def _cluster_grid(positions, resolution):
+    """按网格分辨率把位置映射为格子坐标，返回映射函数参数 (原点, 倒数格子大小)"""
+    low = [min(p[i] for p in positions) for i in range(3)]
+    high = [max(p[i] for p in positions) for i in range(3)]
+    extent = max(high[i] - low[i] for i in range(3)) or 1.0
+    return low, resolution / extent
+
+
+class _MeshSimplifier:
+    """
+    顶点聚类简化：把同一网格内所有图元的顶点按统一网格合并，
+    合并后的位置取格子内所有顶点的平均值（同一网格的图元之间不会产生裂缝），
+    其余属性取每个图元中离平均位置最近的顶点
+    """
+
+    def __init__(self, primitives):
+        # primitives: [(positions, triangles)]，triangles 为三元组列表
+        self.primitives = primitives
+        self.all_positions = [p for positions, _ in primitives for p in positions]
+
+    def _cluster(self, resolution):
+        origin, scale = _cluster_grid(self.all_positions, resolution)
+        ox, oy, oz = origin
+        cells = {}
+        ids = []
+        for positions, _ in self.primitives:
+            ids.append([
+                cells.setdefault((int((x - ox) * scale), int((y - oy) * scale), int((z - oz) * scale)), len(cells))
+                for x, y, z in positions
+            ])
+        return ids, len(cells)
+
+    def _triangles(self, ids):
+        result = []
+        for (_, triangles), cluster in zip(self.primitives, ids):
+            seen = set()
+            kept = []
+            for a, b, c in triangles:
+                ca, cb, cc = cluster[a], cluster[b], cluster[c]
+                if ca == cb or cb == cc or ca == cc:
+                    continue
+                key = tuple(sorted((ca, cb, cc)))
+                if key in seen:
+                    continue
+                seen.add(key)
+                kept.append((ca, cb, cc))
+            result.append(kept)
+        return result
+
+    def simplify(self, target):
+        """
+        二分查找网格分辨率，使三角形总数不超过 target 且尽量接近
+        返回每个图元的 (顶点映射 {格子ID: 原顶点序号}, 格子平均位置, 三角形列表)，无需简化时返回 None
+        """
+        total = sum(len(triangles) for _, triangles in self.primitives)
+        if target >= total or not self.all_positions:
+            return None
+
+        best = None
+        low, high = 2, 2048
+        while low <= high:
+            resolution = (low + high) // 2
+            ids, cell_count = self._cluster(resolution)
+            triangles = self._triangles(ids)
+            count = sum(len(t) for t in triangles)
+            if count <= target:
+                best = (ids, cell_count, triangles)
+                low = resolution + 1
+            else:
+                high = resolution - 1
+        if best is None:
+            ids, cell_count = self._cluster(2)
+            best = (ids, cell_count, self._triangles(ids))
+        ids, cell_count, triangles = best
+
+        sums = [[0.0, 0.0, 0.0, 0] for _ in range(cell_count)]
+        for (positions, _), cluster in zip(self.primitives, ids):
+            for (x, y, z), cell in zip(positions, cluster):
+                entry = sums[cell]
+                entry[0] += x
+                entry[1] += y
+                entry[2] += z
+                entry[3] += 1
+        centers = [(x / n, y / n, z / n) for x, y, z, n in sums]
+
+        result = []
+        for (positions, _), cluster, kept in zip(self.primitives, ids, triangles):
+            nearest = {}
+            for index, (position, cell) in enumerate(zip(positions, cluster)):
+                center = centers[cell]
+                distance = sum((position[i] - center[i]) ** 2 for i in range(3))
+                if cell not in nearest or distance < nearest[cell][0]:
+                    nearest[cell] = (distance, index)
+            result.append(({cell: index for cell, (_, index) in nearest.items()}, centers, kept))
+        return result
+
+
+def _resize_image(data, mime_type, max_size):
+    """把贴图缩小到 max_size 以内，失败或无需缩小时返回原数据"""
+    image_format = IMAGE_FORMATS.get(mime_type)
+    if not image_format or not max_size:
+        return data
+    try:
+        from PIL import Image
+        image = Image.open(io.BytesIO(data))
+        if max(image.size) <= max_size:
+            return data
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        output = io.BytesIO()
+        options = {'optimize': True} if image_format == 'PNG' else {'quality': 85}
+        image.save(output, format=image_format, **options)
+        resized = output.getvalue()
+        return resized if len(resized) < len(data) else data
+    except Exception:
+        return data
+
+
+class GLBOptimizer:
+    """
+    从解析后的 GLB 生成精简版本
+    用法：GLBOptimizer(gltf, binary).build(ratio=0.5, texture_size=1024) -> (GLB 字节串, 统计信息)
+    """
+
+    def __init__(self, gltf, binary):
+        check_supported(gltf)
+        self.source = gltf
+        self.reader = _Reader(gltf, binary)
+
+    def build(self, ratio=1.0, texture_size=None, min_triangles=0):
+        gltf = copy.deepcopy(self.source)
+        writer = _Writer()
+        cache = {}
+        meshes = gltf.get('meshes', [])
+        materials = gltf.get('materials', [])
+        quantize_meshes = self._quantizable_meshes(gltf)
+        transforms = {}
+        stats = {'triangles': 0, 'vertices': 0}
+
+        for mesh_index, mesh in enumerate(meshes):
+            transform = self._position_transform(mesh) if mesh_index in quantize_meshes else None
+            if transform:
+                transforms[mesh_index] = transform
+            simplified = self._simplify_mesh(mesh, ratio, min_triangles)
+
+            for primitive_index, primitive in enumerate(mesh.get('primitives', [])):
+                material = materials[primitive['material']] if 'material' in primitive else None
+                self._strip_attributes(primitive, material)
+                plan = simplified.get(primitive_index) if simplified else None
+                if plan is not None:
+                    self._write_simplified(primitive, plan, writer, transform)
+                else:
+                    self._write_primitive(primitive, writer, cache, mesh_index, transform)
+                if 'targets' in primitive:
+                    primitive['targets'] = [
+                        {name: self._copy(index, writer, cache) for name, index in target.items()}
+                        for target in primitive['targets']
+                    ]
+                stats['vertices'] += writer.accessors[primitive['attributes']['POSITION']]['count'] \
+                    if 'POSITION' in primitive['attributes'] else 0
+                if primitive.get('mode', TRIANGLES) == TRIANGLES:
+                    if 'indices' in primitive:
+                        stats['triangles'] += writer.accessors[primitive['indices']]['count'] // 3
+                    elif 'POSITION' in primitive['attributes']:
+                        stats['triangles'] += writer.accessors[primitive['attributes']['POSITION']]['count'] // 3
+
+        for skin in gltf.get('skins', []):
+            if 'inverseBindMatrices' in skin:
+                skin['inverseBindMatrices'] = self._copy(skin['inverseBindMatrices'], writer, cache)
+        for animation in gltf.get('animations', []):
+            for sampler in animation.get('samplers', []):
+                sampler['input'] = self._copy(sampler['input'], writer, cache)
+                sampler['output'] = self._copy(sampler['output'], writer, cache)
+
+        self._write_images(gltf, writer, texture_size)
+        self._apply_transforms(gltf, transforms)
+        _strip_extras(gltf)
+
+        gltf['accessors'] = writer.accessors
+        gltf['bufferViews'] = writer.views
+        binary = writer.binary()
+        if binary:
+            gltf['buffers'] = [{'byteLength': len(binary)}]
+        else:
+            gltf.pop('buffers', None)
+        for key in ('extensionsUsed', 'extensionsRequired'):
+            extensions = set(gltf.get(key, []))
+            extensions.add(QUANTIZATION_EXTENSION)
+            gltf[key] = sorted(extensions)
+        stats['texture_size'] = texture_size
+        return write_glb(gltf, binary), stats
+
+    def _quantizable_meshes(self, gltf):
+        """位置可以量化的网格：未被蒙皮节点引用且没有变形目标"""
+        skinned = {node['mesh'] for node in gltf.get('nodes', []) if 'mesh' in node and 'skin' in node}
+        return {
+            index for index, mesh in enumerate(gltf.get('meshes', []))
+            if index not in skinned and not any('targets' in p for p in mesh.get('primitives', []))
+        }
+
+    def _position_transform(self, mesh):
+        """网格包围盒中心和统一缩放系数，位置量化为 int16 后由节点变换还原"""
+        low = [math.inf] * 3
+        high = [-math.inf] * 3
+        for primitive in mesh.get('primitives', []):
+            index = primitive.get('attributes', {}).get('POSITION')
+            if index is None:
+                continue
+            for position in self.reader.read_float(index):
+                for i in range(3):
+                    low[i] = min(low[i], position[i])
+                    high[i] = max(high[i], position[i])
+        if low[0] == math.inf:
+            return None
+        center = [(low[i] + high[i]) / 2 for i in range(3)]
+        extent = max(high[i] - low[i] for i in range(3)) / 2 or 1.0
+        return center, extent / 32767.0
+
+    def _strip_attributes(self, primitive, material):
+        """去掉材质用不到的 UV 通道，没有法线贴图时去掉切线"""
+        texcoords, has_normal_map = _texture_coordinates(material)
+        attributes = primitive.get('attributes', {})
+        for name in list(attributes):
+            if name.startswith('TEXCOORD_') and int(name.split('_')[1]) not in texcoords:
+                del attributes[name]
+            elif name == 'TANGENT' and not has_normal_map:
+                del attributes[name]
+
+    def _simplify_mesh(self, mesh, ratio, min_triangles):
+        if ratio >= 1:
+            return None
+        candidates = {}
+        for index, primitive in enumerate(mesh.get('primitives', [])):
+            attributes = primitive.get('attributes', {})
+            if primitive.get('mode', TRIANGLES) != TRIANGLES or 'targets' in primitive \
+                    or 'POSITION' not in attributes or 'JOINTS_0' in attributes:
+                continue
+            positions = self.reader.read_float(attributes['POSITION'])
+            if 'indices' in primitive:
+                flat = [value[0] for value in self.reader.read(primitive['indices'])]
+            else:
+                flat = list(range(len(positions)))
+            triangles = [tuple(flat[i:i + 3]) for i in range(0, len(flat) - 2, 3)]
+            candidates[index] = (positions, triangles)
+        if not candidates:
+            return None
+        total = sum(len(triangles) for _, triangles in candidates.values())
+        target = max(int(total * ratio), min_triangles)
+        plans = _MeshSimplifier(list(candidates.values())).simplify(target)
+        if plans is None:
+            return None
+        return dict(zip(candidates, plans))
+
+    def _write_attribute(self, name, values, component_type, normalized, writer, transform):
+        """按属性语义量化并写入，values 为原始分量值"""
+        if name == 'POSITION':
+            floats = self._to_float(values, component_type, normalized)
+            if transform:
+                center, scale = transform
+                quantized = [
+                    tuple(int(round((p[i] - center[i]) / scale)) for i in range(3)) for p in floats
+                ]
+                return writer.add_accessor(quantized, SHORT, 3, ARRAY_BUFFER, bounds=True)
+            return writer.add_accessor(floats, FLOAT, 3, ARRAY_BUFFER, bounds=True)
+        if name in ('NORMAL', 'TANGENT'):
+            floats = self._to_float(values, component_type, normalized)
+            return writer.add_accessor(_quantize_unit(floats, BYTE), BYTE, len(floats[0]) if floats else 3,
+                                       ARRAY_BUFFER, normalized=True)
+        if name.startswith('TEXCOORD_'):
+            floats = self._to_float(values, component_type, normalized)
+            if all(0.0 <= v <= 1.0 for value in floats for v in value):
+                return writer.add_accessor(_quantize_unit(floats, UNSIGNED_SHORT), UNSIGNED_SHORT, 2,
+                                           ARRAY_BUFFER, normalized=True)
+            return writer.add_accessor(floats, FLOAT, 2, ARRAY_BUFFER)
+        size = len(values[0]) if values else 1
+        return writer.add_accessor(values, component_type, size, ARRAY_BUFFER, normalized=normalized)
+
+    @staticmethod
+    def _to_float(values, component_type, normalized):
+        if component_type == FLOAT:
+            return values
+        if normalized:
+            divisor = NORMALIZE_DIVISORS[component_type]
+            return [tuple(max(v / divisor, -1.0) for v in value) for value in values]
+        return [tuple(float(v) for v in value) for value in values]
+
+    def _write_indices(self, flat, writer):
+        component_type = UNSIGNED_SHORT if max(flat, default=0) < 65535 else UNSIGNED_INT
+        return writer.add_accessor([(i,) for i in flat], component_type, 1, ELEMENT_ARRAY_BUFFER)
+
+    def _write_primitive(self, primitive, writer, cache, mesh_index, transform):
+        """不简化的图元：逐个属性量化后写入，同一 accessor 只写一次"""
+        attributes = primitive.get('attributes', {})
+        for name, index in attributes.items():
+            key = (index, name.split('_')[0], mesh_index if name == 'POSITION' else None)
+            if key not in cache:
+                component_type, _, normalized = self.reader.info(index)
+                if name.startswith(('JOINTS_', 'WEIGHTS_', 'COLOR_')) or name.startswith('_'):
+                    cache[key] = self._copy(index, writer, {}, ARRAY_BUFFER)
+                else:
+                    cache[key] = self._write_attribute(
+                        name, self.reader.read(index), component_type, normalized, writer, transform
+                    )
+            attributes[name] = cache[key]
+        if 'indices' in primitive:
+            key = (primitive['indices'], 'indices', None)
+            if key not in cache:
+                cache[key] = self._write_indices([v[0] for v in self.reader.read(primitive['indices'])], writer)
+            primitive['indices'] = cache[key]
+
+    def _write_simplified(self, primitive, plan, writer, transform):
+        """写入简化后的图元：每个保留的格子生成一个顶点"""
+        vertex_of_cell, centers, triangles = plan
+        cells = sorted(vertex_of_cell)
+        local = {cell: i for i, cell in enumerate(cells)}
+        sources = [vertex_of_cell[cell] for cell in cells]
+
+        attributes = primitive['attributes']
+        for name, index in list(attributes.items()):
+            component_type, _, normalized = self.reader.info(index)
+            if name == 'POSITION':
+                values = [centers[cell] for cell in cells]
+                component_type, normalized = FLOAT, False
+            else:
+                original = self.reader.read(index)
+                values = [original[i] for i in sources]
+            attributes[name] = self._write_attribute(name, values, component_type, normalized, writer, transform)
+        primitive['indices'] = self._write_indices(
+            [local[cell] for triangle in triangles for cell in triangle], writer
+        )
+
+    def _copy(self, index, writer, cache, target=None):
+        """原样复制 accessor（动画、蒙皮、变形目标等）"""
+        key = (index, 'copy')
+        if key not in cache:
+            component_type, size, normalized = self.reader.info(index)
+            accessor = self.reader.accessors[index]
+            extra = {k: accessor[k] for k in ('type', 'min', 'max') if k in accessor}
+            cache[key] = writer.add_accessor(
+                self.reader.read(index), component_type, size, target, normalized=normalized, extra=extra
+            )
+        return cache[key]
+
+    def _write_images(self, gltf, writer, texture_size):
+        """只保留被贴图引用的图片，必要时缩小尺寸"""
+        images = gltf.get('images', [])
+        if not images:
+            return
+        textures = gltf.get('textures', [])
+
+        def sources(texture):
+            if 'source' in texture:
+                yield texture, 'source'
+            for extension in texture.get('extensions', {}).values():
+                if isinstance(extension, dict) and 'source' in extension:
+                    yield extension, 'source'
+
+        used = sorted({holder[key] for texture in textures for holder, key in sources(texture)})
+        remap = {old: new for new, old in enumerate(used)}
+        for texture in textures:
+            for holder, key in sources(texture):
+                holder[key] = remap[holder[key]]
+
+        kept = []
+        for old in used:
+            image = images[old]
+            if 'bufferView' in image:
+                data = _resize_image(self.reader.view_bytes(image['bufferView']), image.get('mimeType'), texture_size)
+                image['bufferView'] = writer.add_view(data)
+            kept.append(image)
+        if kept:
+            gltf['images'] = kept
+        else:
+            gltf.pop('images', None)
+
+    def _apply_transforms(self, gltf, transforms):
+        """为位置量化的网格插入子节点，用平移和统一缩放还原原始坐标"""
+        if not transforms:
+            return
+        nodes = gltf.setdefault('nodes', [])
+        for node in list(nodes):
+            mesh = node.get('mesh')
+            if mesh not in transforms:
+                continue
+            center, scale = transforms[mesh]
+            nodes.append({'mesh': node.pop('mesh'), 'translation': center, 'scale': [scale, scale, scale]})
+            node.setdefault('children', []).append(len(nodes) - 1)
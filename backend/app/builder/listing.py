@@ -0,0 +1,156 @@
+# app/builder/listing.py
+
+import hashlib
+
+from django.conf import settings
+from django.db.models import Avg, Count, Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Substr
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import serializers
+
+from app.article.models import Article
+from app.public.images import image_variants
+from .assets import asset_url
+from .geo import precision_for_zoom
+from .models import Builder
+
+# 列表需要的列，不加载整个模型对象
+LIST_COLUMNS = [
+    'id', 'name', 'description', 'address', 'latitude', 'longitude', 'category', 'tags', 'creator_id',
+    'json', 'created_at', 'updated_at', 'image', 'model', 'model_digest',
+]
+# lite 模式（地图、画廊）省略的大字段
+HEAVY_COLUMNS = {'description', 'json'}
+
+# 达到该缩放级别后不再聚合，直接返回建筑点位
+CLUSTER_MAX_ZOOM = 12
+# 单次返回的点位上限
+MAX_MARKERS = 2000
+MARKER_COLUMNS = ['id', 'name', 'category', 'latitude', 'longitude', 'tags', 'image', 'model', 'model_digest', 'created_at']
+# 点位弹窗中显示的简介长度（字符），在数据库中截取
+MARKER_DESCRIPTION_LENGTH = 200
+
+_datetime_field = serializers.DateTimeField()
+
+
+def _media_url(path):
+    return f"{settings.URL_BASE}/media/{path}" if path else None
+
+
+def first_article_subquery():
+    """每个建筑的第一篇关联文章（与 builder.articles.first() 相同的排序）"""
+    return Subquery(
+        Article.objects.filter(builder=OuterRef('pk')).order_by('-created_at').values('id')[:1]
+    )
+
+
+def builder_list_queryset(lite=False):
+    """建筑列表查询：只取需要的列，关联文章ID由子查询一次取出"""
+    columns = [c for c in LIST_COLUMNS if not (lite and c in HEAVY_COLUMNS)]
+    return Builder.objects.order_by('-created_at').annotate(
+        article_id=first_article_subquery()
+    ).values(*columns, 'article_id')
+
+
+def format_builder(row):
+    """输出与 BuilderSerializer 一致的字段，并附加 has_model 和 article_id"""
+    model_url = asset_url(row.pop('model'), row.pop('model_digest'))
+    image = row.pop('image')
+    tags = row.get('tags')
+    row['creator'] = row.pop('creator_id')
+    row['created_at'] = _datetime_field.to_representation(row['created_at'])
+    row['updated_at'] = _datetime_field.to_representation(row['updated_at'])
+    row['image_url'] = _media_url(image)
+    row['image_variants'] = image_variants(image)
+    row['tags_list'] = [tag.strip() for tag in tags.split(',')] if tags else []
+    row['model_url'] = model_url
+    row['has_model'] = model_url
+    return row
+
+
+def catalogue_etag(*parts):
+    """
+    根据建筑和关联文章的数量及最后更新时间计算列表的 ETag
+    只需两条聚合查询，内容未变化时可直接返回 304，不查询列表本身
+    """
+    builders = Builder.objects.aggregate(total=Count('id'), updated=Max('updated_at'))
+    articles = Article.objects.filter(builder__isnull=False).aggregate(
+        total=Count('id'), updated=Max('updated_at')
+    )
+    source = '|'.join(str(value) for value in (
+        builders['total'], builders['updated'], articles['total'], articles['updated'], settings.URL_BASE, *parts
+    ))
+    return quote_etag(hashlib.md5(source.encode()).hexdigest())
+
+
+def etag_matches(request, etag):
+    """If-None-Match 是否与当前 ETag 匹配（弱比较）"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or any(tag.removeprefix('W/') == etag for tag in etags)
+
+
+def bbox_queryset(west, south, east, north):
+    """视口内有坐标的建筑；west > east 表示视口跨越 180 度经线"""
+    queryset = Builder.objects.filter(latitude__gte=south, latitude__lte=north)
+    if west <= east:
+        return queryset.filter(longitude__gte=west, longitude__lte=east)
+    return queryset.filter(Q(longitude__gte=west) | Q(longitude__lte=east))
+
+
+def _markers(queryset):
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'category': row['category'],
+            'latitude': row['latitude'],
+            'longitude': row['longitude'],
+            'tags': row['tags'],
+            'image_url': _media_url(row['image']),
+            'model_url': asset_url(row['model'], row['model_digest']),
+            'article_id': row['article_id'],
+            'description': row['summary'],
+            'created_at': _datetime_field.to_representation(row['created_at']),
+        }
+        for row in queryset.annotate(
+            article_id=first_article_subquery(),
+            summary=Substr('description', 1, MARKER_DESCRIPTION_LENGTH),
+        ).values(*MARKER_COLUMNS, 'article_id', 'summary').order_by('-created_at')[:MAX_MARKERS]
+    ]
+
+
+def viewport(west, south, east, north, zoom):
+    """
+    返回视口内的建筑
+    缩放级别低于 CLUSTER_MAX_ZOOM 时按 geohash 前缀在数据库中分组聚合，
+    只含一个建筑的格子直接作为点位返回
+    """
+    queryset = bbox_queryset(west, south, east, north)
+    if zoom >= CLUSTER_MAX_ZOOM:
+        return {'clustered': False, 'precision': None, 'clusters': [], 'markers': _markers(queryset)}
+
+    precision = precision_for_zoom(zoom)
+    cells = queryset.annotate(cell=Substr('geohash', 1, precision)).values('cell').annotate(
+        count=Count('id'),
+        center_latitude=Avg('latitude'),
+        center_longitude=Avg('longitude'),
+        first_id=Min('id'),
+    ).order_by()
+
+    clusters = []
+    single_ids = []
+    for cell in cells:
+        if cell['count'] == 1:
+            single_ids.append(cell['first_id'])
+        else:
+            clusters.append({
+                'geohash': cell['cell'],
+                'count': cell['count'],
+                'latitude': cell['center_latitude'],
+                'longitude': cell['center_longitude'],
+            })
+    markers = _markers(Builder.objects.filter(id__in=single_ids)) if single_ids else []
+    return {'clustered': True, 'precision': precision, 'clusters': clusters, 'markers': markers}
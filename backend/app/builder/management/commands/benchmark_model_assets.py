@@ -0,0 +1,134 @@
+import os
+import time
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.utils.http import http_date, quote_etag
+from django.views.static import serve
+
+from app.builder.assets import asset_path, asset_url, get_config
+from app.builder.views import serve_model_asset
+
+BENCHMARK_NAME = 'models/benchmark/benchmark.glb'
+
+
+class Command(BaseCommand):
+    help = '对比 /media/ 静态服务与带摘要模型地址（/assets/）的吞吐量、分段请求和重新验证开销'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='MEDIA_ROOT 下已有的模型文件路径，默认生成临时测试文件')
+        parser.add_argument('--size', type=int, default=20, help='临时测试文件大小（MB）')
+        parser.add_argument('--iterations', type=int, default=20, help='每种请求的重复次数')
+        parser.add_argument('--range-size', type=int, default=1024 * 1024, help='分段请求的字节数')
+        parser.add_argument(
+            '--base-url',
+            help='对运行中的服务器测试（例如 http://127.0.0.1:8000），默认在进程内直接调用视图',
+        )
+
+    def handle(self, *args, **options):
+        name = options['file'] or BENCHMARK_NAME
+        path = asset_path(name)
+        if path is None:
+            raise CommandError(f"文件必须位于 {', '.join(get_config()['DIRECTORIES'])} 下且为模型文件")
+
+        created = False
+        if not options['file']:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                for _ in range(options['size']):
+                    f.write(os.urandom(1024 * 1024))
+            created = True
+        elif not os.path.exists(path):
+            raise CommandError(f'文件不存在: {name}')
+
+        try:
+            if options['base_url']:
+                fetch = self._remote_fetcher(options['base_url'].rstrip('/'))
+            else:
+                fetch = self._local_fetcher()
+            self._run(fetch, name, os.path.getsize(path), options)
+        finally:
+            if created:
+                os.remove(path)
+
+    def _local_fetcher(self):
+        """在进程内直接调用视图，只比较 Django 层面的开销"""
+        factory = RequestFactory()
+        prefix = get_config()['URL_PREFIX']
+
+        def fetch(url, headers):
+            request = factory.get(url, **{'HTTP_' + key.upper().replace('-', '_'): value
+                                          for key, value in headers.items()})
+            if url.startswith('/media/'):
+                response = serve(request, url[len('/media/'):], document_root=settings.MEDIA_ROOT)
+            else:
+                digest, name = url[len(prefix):].split('/', 1)
+                response = serve_model_asset(request, digest, name)
+            size = 0
+            if response.streaming:
+                for block in response.streaming_content:
+                    size += len(block)
+            else:
+                size = len(response.content)
+            response.close()
+            return response.status_code, size
+
+        return fetch
+
+    def _remote_fetcher(self, base_url):
+        """通过 HTTP 请求运行中的服务器，可体现 sendfile 等服务器层面的差异"""
+
+        def fetch(url, headers):
+            request = urllib.request.Request(base_url + url, headers=headers)
+            try:
+                with urllib.request.urlopen(request) as response:
+                    size = 0
+                    for block in iter(lambda: response.read(64 * 1024), b''):
+                        size += len(block)
+                    return response.status, size
+            except urllib.error.HTTPError as e:
+                return e.code, 0
+
+        return fetch
+
+    def _run(self, fetch, name, file_size, options):
+        media_url = f'/media/{name}'
+        asset = asset_url(name).removeprefix(settings.URL_BASE)
+        iterations = options['iterations']
+        range_header = f"bytes=0-{options['range_size'] - 1}"
+
+        status, _ = fetch(media_url, {})
+        if status != 200:
+            raise CommandError(f'{media_url} 返回 {status}，请确认 DEBUG 开启或由 Web 服务器提供 /media/')
+
+        self.stdout.write(f'文件: {name}（{file_size / 1024 / 1024:.1f} MB），每项 {iterations} 次')
+        self.stdout.write(f"{'场景':<16}{'地址':<10}{'状态':<8}{'平均耗时(ms)':<16}{'吞吐量(MB/s)':<14}{'传输字节':<12}")
+
+        # 重新验证时各自使用的校验头：静态服务只支持 Last-Modified，模型地址使用 ETag
+        static_last_modified = http_date(os.path.getmtime(asset_path(name)))
+        etag = quote_etag(asset[len(get_config()['URL_PREFIX']):].split('/', 1)[0])
+
+        scenarios = [
+            ('完整下载', {}, {}),
+            ('分段请求', {'Range': range_header}, {'Range': range_header}),
+            ('重新验证', {'If-Modified-Since': static_last_modified}, {'If-None-Match': etag}),
+        ]
+        for label, static_headers, asset_headers in scenarios:
+            for source, url, headers in (('media', media_url, static_headers), ('assets', asset, asset_headers)):
+                status, transferred, elapsed = self._measure(fetch, url, headers, iterations)
+                throughput = transferred / elapsed / 1024 / 1024 if elapsed else 0
+                self.stdout.write(
+                    f'{label:<16}{source:<10}{status:<8}{elapsed / iterations * 1000:<16.2f}'
+                    f'{throughput:<14.1f}{transferred // iterations:<12}'
+                )
+
+    def _measure(self, fetch, url, headers, iterations):
+        transferred = 0
+        status = None
+        start = time.perf_counter()
+        for _ in range(iterations):
+            status, size = fetch(url, headers)
+            transferred += size
+        return status, transferred, time.perf_counter() - start
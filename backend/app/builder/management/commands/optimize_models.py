@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from app.builder.models import Builder
+from app.builder.optimization import process_builder, process_pending_models
+
+
+class Command(BaseCommand):
+    help = '立即处理等待优化的 GLB 模型（生成细节层级版本和预览版本）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--builder', type=int, action='append', help='只处理指定建筑，可重复指定')
+        parser.add_argument('--requeue', action='store_true', help='把所有有模型的建筑重新加入队列')
+        parser.add_argument('--limit', type=int, default=100, help='本次最多处理的模型数')
+
+    def handle(self, *args, **options):
+        if options['builder']:
+            for builder_id in options['builder']:
+                result = process_builder(builder_id)
+                self.stdout.write(f'建筑 {builder_id}: {result or "无模型或模型已变化"}')
+            return
+
+        if options['requeue']:
+            queued = Builder.objects.exclude(model='').exclude(model__isnull=True).update(model_status='pending')
+            self.stdout.write(f'已重新排队 {queued} 个模型')
+
+        results = process_pending_models(limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f'处理完成: {results or "没有等待处理的模型"}'))
@@ -0,0 +1,322 @@
+# app/builder/markers.py
+"""
+建筑模型 AR/3D 标注
+
+每条标注保存为一行 BuilderMarker，格式与前端 ModelMarkerManager.getMarkersData() 一致：
+{"id", "description", "faces", "position": {x, y, z}, "regions": [{"faces", "center"}]}，
+其他字段原样保留。每次修改使建筑的 markers_version 加一，被修改的标注记录该版本号，
+查看端只需获取某个版本之后变化的标注；编辑端可以只提交变化的标注。
+
+Builder.json 由标注记录拼接生成，供仍然整体读取 json 的页面使用；
+整体写入 json 的旧接口在保存时同步为标注记录。
+"""
+
+import json
+import logging
+import math
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from probject.response_cache import invalidate_tags
+from .models import Builder, BuilderMarker
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可在 settings.BUILDER_MARKERS 中覆盖
+DEFAULT_CONFIG = {
+    'MAX_MARKERS': 500,          # 每个建筑的标注数上限
+    'MAX_FACES': 500000,         # 每条标注选中的面数上限
+    'MAX_DESCRIPTION': 5000,
+    'PRECISION': 6,              # 坐标保留的小数位数
+}
+
+ID_MAX_LENGTH = 64
+
+
+class MarkerError(ValueError):
+    """标注数据无效"""
+
+
+class MarkerNotFound(MarkerError):
+    """标注不存在"""
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'BUILDER_MARKERS', {}))
+    return config
+
+
+def _number(value, field, precision):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise MarkerError(f'{field} 必须是有限数值')
+    return round(float(value), precision)
+
+
+def _point(value, field, precision):
+    if not isinstance(value, dict):
+        raise MarkerError(f'{field} 必须包含 x、y、z')
+    return {axis: _number(value.get(axis), f'{field}.{axis}', precision) for axis in ('x', 'y', 'z')}
+
+
+def _faces(value, field, limit):
+    if not isinstance(value, list):
+        raise MarkerError(f'{field} 必须是面序号列表')
+    if len(value) > limit:
+        raise MarkerError(f'{field} 超过 {limit} 个面')
+    if any(isinstance(face, bool) or not isinstance(face, int) or face < 0 for face in value):
+        raise MarkerError(f'{field} 只能包含非负整数')
+    return value
+
+
+def _marker_id(value):
+    if isinstance(value, bool) or not isinstance(value, (str, int)):
+        raise MarkerError('标注ID必须是字符串或整数')
+    value = str(value).strip()
+    if not value or len(value) > ID_MAX_LENGTH:
+        raise MarkerError(f'标注ID不能为空且不能超过 {ID_MAX_LENGTH} 个字符')
+    return value
+
+
+def normalize_marker(data, config=None):
+    """
+    校验一条标注并返回规范格式（坐标按 PRECISION 取整），数据无效时抛出 MarkerError
+    未提供 id 时自动生成
+    """
+    config = config or get_config()
+    if not isinstance(data, dict):
+        raise MarkerError('标注必须是对象')
+    precision = config['PRECISION']
+
+    marker = {'id': _marker_id(data['id']) if data.get('id') not in (None, '') else uuid.uuid4().hex}
+    description = data.get('description') or ''
+    if not isinstance(description, str):
+        raise MarkerError('description 必须是字符串')
+    if len(description) > config['MAX_DESCRIPTION']:
+        raise MarkerError(f"description 不能超过 {config['MAX_DESCRIPTION']} 个字符")
+    marker['description'] = description
+    marker['faces'] = _faces(data.get('faces', []), 'faces', config['MAX_FACES'])
+    marker['position'] = _point(data.get('position'), 'position', precision)
+
+    regions = data.get('regions') or []
+    if not isinstance(regions, list):
+        raise MarkerError('regions 必须是列表')
+    marker['regions'] = []
+    for i, region in enumerate(regions):
+        if not isinstance(region, dict):
+            raise MarkerError(f'regions[{i}] 必须是对象')
+        marker['regions'].append({
+            'faces': _faces(region.get('faces', []), f'regions[{i}].faces', config['MAX_FACES']),
+            'center': _point(region.get('center'), f'regions[{i}].center', precision),
+        })
+
+    # 前端后续增加的字段原样保留
+    for key, value in data.items():
+        if key not in marker:
+            marker[key] = value
+    try:
+        dump_marker(marker)
+    except (TypeError, ValueError):
+        raise MarkerError('标注包含无法序列化的数据')
+    return marker
+
+
+def dump_marker(marker):
+    return json.dumps(marker, ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+
+
+def dump_markers(markers):
+    """标注列表的紧凑 JSON 文本，没有标注时返回 None"""
+    if not markers:
+        return None
+    return '[' + ','.join(dump_marker(marker) for marker in markers) + ']'
+
+
+def parse_markers(value, config=None):
+    """
+    解析整体提交的标注数据（JSON 文本或列表），返回规范格式的标注列表
+    空值表示没有标注；格式无效、ID 重复或数量超限时抛出 MarkerError
+    """
+    config = config or get_config()
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise MarkerError('JSON 格式错误')
+    if isinstance(value, dict) and isinstance(value.get('markers'), list):
+        value = value['markers']
+    if not isinstance(value, list):
+        raise MarkerError('标注数据必须是列表')
+    if len(value) > config['MAX_MARKERS']:
+        raise MarkerError(f"标注数量不能超过 {config['MAX_MARKERS']} 个")
+
+    markers = [normalize_marker(item, config) for item in value]
+    ids = [marker['id'] for marker in markers]
+    if len(set(ids)) != len(ids):
+        raise MarkerError('标注ID重复')
+    return markers
+
+
+def render_json(builder_id):
+    """按创建顺序拼接建筑的全部标注，没有标注时返回 None"""
+    rows = BuilderMarker.objects.filter(builder_id=builder_id, deleted=False).order_by('id').values_list('data', flat=True)
+    data = list(rows)
+    return '[' + ','.join(data) + ']' if data else None
+
+
+def _apply(builder_id, upserts=(), deletes=(), base_version=None):
+    """
+    在一个事务中写入新增/修改的标注并删除指定标注，有变化时版本号加一并重新生成 Builder.json
+    返回 (当前版本号, 冲突的标注ID列表)；冲突指 base_version 之后已被他人修改的标注，按后写入为准
+    """
+    config = get_config()
+    with transaction.atomic():
+        builder = Builder.objects.select_for_update().only('id', 'markers_version').get(pk=builder_id)
+        version = builder.markers_version + 1
+        now = timezone.now()
+        ids = [marker['id'] for marker in upserts] + list(deletes)
+        existing = {
+            row.marker_id: row
+            for row in BuilderMarker.objects.filter(builder_id=builder_id, marker_id__in=ids).only(
+                'id', 'marker_id', 'data', 'version', 'deleted'
+            )
+        }
+        conflicts = []
+        if base_version is not None:
+            conflicts = sorted(marker_id for marker_id, row in existing.items() if row.version > base_version)
+
+        created, updated, added = [], [], 0
+        for marker in upserts:
+            text = dump_marker(marker)
+            row = existing.get(marker['id'])
+            if row is None:
+                created.append(BuilderMarker(builder_id=builder_id, marker_id=marker['id'], data=text, version=version))
+                added += 1
+            elif row.deleted or row.data != text:
+                added += row.deleted
+                row.data, row.deleted, row.version, row.updated_at = text, False, version, now
+                updated.append(row)
+        for marker_id in deletes:
+            row = existing.get(marker_id)
+            if row is not None and not row.deleted:
+                added -= 1
+                row.data, row.deleted, row.version, row.updated_at = '', True, version, now
+                updated.append(row)
+
+        if not created and not updated:
+            return builder.markers_version, conflicts
+        if added > 0:
+            live = BuilderMarker.objects.filter(builder_id=builder_id, deleted=False).count()
+            if live + added > config['MAX_MARKERS']:
+                raise MarkerError(f"标注数量不能超过 {config['MAX_MARKERS']} 个")
+
+        BuilderMarker.objects.bulk_create(created)
+        BuilderMarker.objects.bulk_update(updated, ['data', 'deleted', 'version', 'updated_at'])
+        # updated_at 一并更新，建筑列表的 ETag 随之变化
+        Builder.objects.filter(pk=builder_id).update(
+            markers_version=version, json=render_json(builder_id), updated_at=now
+        )
+        # queryset.update 不触发信号，响应中包含 json 的缓存需要手动失效
+        invalidate_tags('builder')
+    return version, conflicts
+
+
+def sync_from_json(builder):
+    """把整体写入的 Builder.json 同步为标注记录（由 Builder.save 调用），并把 json 改写为规范格式"""
+    try:
+        markers = parse_markers(builder.json)
+    except MarkerError as e:
+        logger.warning(f"建筑 {builder.pk} 的标注数据无效，未同步: {e}")
+        builder._loaded_json = builder.json
+        return
+    ids = {marker['id'] for marker in markers}
+    deletes = [
+        marker_id for marker_id in BuilderMarker.objects.filter(builder_id=builder.pk, deleted=False).values_list('marker_id', flat=True)
+        if marker_id not in ids
+    ]
+    version, _ = _apply(builder.pk, markers, deletes)
+    rendered = render_json(builder.pk)
+    if builder.json != rendered:
+        # 标注没有变化时 _apply 不会改写 json，这里统一为规范格式
+        Builder.objects.filter(pk=builder.pk).update(json=rendered)
+    builder.markers_version = version
+    builder.json = builder._loaded_json = rendered
+
+
+def add_marker(builder_id, data):
+    """新增一条标注，返回 (标注, 版本号)；ID 已存在时抛出 MarkerError"""
+    marker = normalize_marker(data)
+    if BuilderMarker.objects.filter(builder_id=builder_id, marker_id=marker['id'], deleted=False).exists():
+        raise MarkerError('标注ID已存在')
+    version, _ = _apply(builder_id, upserts=[marker])
+    return marker, version
+
+
+def update_marker(builder_id, marker_id, changes):
+    """修改一条标注中提交的字段（未提交的字段保持不变），返回 (标注, 版本号)"""
+    row = BuilderMarker.objects.filter(builder_id=builder_id, marker_id=marker_id, deleted=False).only('data').first()
+    if row is None:
+        raise MarkerNotFound('标注不存在')
+    if not isinstance(changes, dict):
+        raise MarkerError('标注必须是对象')
+    data = json.loads(row.data)
+    data.update({key: value for key, value in changes.items() if key != 'id'})
+    marker = normalize_marker(data)
+    version, _ = _apply(builder_id, upserts=[marker])
+    return marker, version
+
+
+def delete_marker(builder_id, marker_id):
+    """删除一条标注，返回版本号"""
+    if not BuilderMarker.objects.filter(builder_id=builder_id, marker_id=marker_id, deleted=False).exists():
+        raise MarkerNotFound('标注不存在')
+    version, _ = _apply(builder_id, deletes=[marker_id])
+    return version
+
+
+def apply_delta(builder_id, upserts=None, deletes=None, base_version=None):
+    """
+    编辑端提交的增量：upserts 为新增或修改后的完整标注，deletes 为删除的标注ID
+    返回 (版本号, 冲突的标注ID列表)
+    """
+    upserts = upserts or []
+    deletes = deletes or []
+    if not isinstance(upserts, list) or not isinstance(deletes, list):
+        raise MarkerError('upsert 和 delete 必须是列表')
+    markers = [normalize_marker(item) for item in upserts]
+    deletes = [_marker_id(marker_id) for marker_id in deletes]
+    ids = [marker['id'] for marker in markers] + deletes
+    if len(set(ids)) != len(ids):
+        raise MarkerError('同一标注在增量中出现多次')
+    return _apply(builder_id, markers, deletes, base_version)
+
+
+def changes_since(builder_id, since=None):
+    """
+    返回 since 版本之后的变化：
+    {'version': 当前版本, 'full': 是否为全量, 'markers': [新增或修改的标注], 'deleted': [删除的标注ID]}
+    since 为空或 0 时返回全部标注；客户端已是最新版本时只查询一次版本号
+    """
+    version = Builder.objects.filter(pk=builder_id).values_list('markers_version', flat=True).first()
+    if version is None:
+        return None
+    result = {'version': version, 'full': not since, 'markers': [], 'deleted': []}
+    if since and since >= version:
+        return result
+
+    rows = BuilderMarker.objects.filter(builder_id=builder_id)
+    if since:
+        rows = rows.filter(version__gt=since)
+    else:
+        rows = rows.filter(deleted=False)
+    for marker_id, data, deleted in rows.order_by('id').values_list('marker_id', 'data', 'deleted'):
+        if deleted:
+            result['deleted'].append(marker_id)
+        else:
+            result['markers'].append(json.loads(data))
+    return result
@@ -0,0 +1,92 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:24
+
+import json
+
+from django.db import migrations, models
+
+# 坐标解析和 geohash 编码是创建时的副本，不引用 app.builder.geo，之后修改该模块不会改变迁移的行为
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+
+
+def parse_address(address):
+    # address 中的 "[纬度, 经度]"，无法解析或超出范围时返回 None
+    if not address:
+        return None
+    try:
+        coords = json.loads(address.replace(' ', ''))
+        latitude, longitude = float(coords[0]), float(coords[1])
+    except (ValueError, TypeError, IndexError, KeyError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # 偶数位编码经度
+    while len(chars) < precision:
+        value, value_range = (longitude, lng_range) if even else (latitude, lat_range)
+        mid = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            value_range[0] = mid
+        else:
+            value_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def backfill_coordinates(apps, schema_editor):
+    """从 address 中的 [纬度, 经度] 回填经纬度和 geohash"""
+    Builder = apps.get_model('builder', 'Builder')
+    updated = []
+    for builder in Builder.objects.only('id', 'address').iterator():
+        coords = parse_address(builder.address)
+        if coords is None:
+            continue
+        builder.latitude, builder.longitude = coords
+        builder.geohash = geohash_encode(*coords)
+        updated.append(builder)
+    Builder.objects.bulk_update(updated, ['latitude', 'longitude', 'geohash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder', '0002_alter_builder_options_remove_builder_image_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='builder',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=12, verbose_name='Geohash'),
+        ),
+        migrations.AddField(
+            model_name='builder',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='纬度'),
+        ),
+        migrations.AddField(
+            model_name='builder',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='经度'),
+        ),
+        migrations.AddIndex(
+            model_name='builder',
+            index=models.Index(fields=['latitude', 'longitude'], name='builder_bui_latitud_905542_idx'),
+        ),
+        migrations.RunPython(backfill_coordinates, migrations.RunPython.noop),
+    ]
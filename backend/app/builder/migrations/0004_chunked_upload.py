@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('builder', '0003_builder_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='原始文件名')),
+                ('total_size', models.BigIntegerField(verbose_name='文件大小')),
+                ('chunk_size', models.PositiveIntegerField(verbose_name='分片大小')),
+                ('checksum', models.CharField(blank=True, default='', max_length=64, verbose_name='整个文件的SHA-256')),
+                ('status', models.CharField(choices=[('uploading', '上传中'), ('complete', '已完成')], default='uploading', max_length=20, verbose_name='状态')),
+                ('file_path', models.CharField(blank=True, default='', max_length=255, verbose_name='保存路径')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('builder', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='chunked_uploads', to='builder.builder', verbose_name='关联建筑')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunked_uploads', to=settings.AUTH_USER_MODEL, verbose_name='上传用户')),
+            ],
+            options={
+                'verbose_name': '分片上传',
+                'verbose_name_plural': '分片上传',
+            },
+        ),
+        migrations.CreateModel(
+            name='ChunkedUploadPart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField(verbose_name='分片序号')),
+                ('size', models.PositiveIntegerField(verbose_name='分片大小')),
+                ('checksum', models.CharField(max_length=64, verbose_name='分片SHA-256')),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parts', to='builder.chunkedupload')),
+            ],
+            options={
+                'verbose_name': '上传分片',
+                'verbose_name_plural': '上传分片',
+                'unique_together': {('upload', 'index')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='chunkedupload',
+            index=models.Index(fields=['status', 'updated_at'], name='builder_chu_status_799f7e_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:29
+
+import hashlib
+import os
+
+from django.conf import settings
+from django.db import migrations, models
+
+# 摘要规则是创建时的副本，不引用 app.builder.assets（也不访问缓存），之后修改该模块不会改变迁移的行为
+DIGEST_LENGTH = 16
+MODEL_DIRECTORIES = ('blobs/', 'builders/models/', 'models/')
+MODEL_EXTENSIONS = ('.glb', '.gltf', '.bin', '.obj', '.fbx')
+
+
+def name_digest(name):
+    # MEDIA_ROOT 下模型文件内容 SHA-256 的前 16 位，文件不存在或不在允许的目录中时返回空字符串
+    name = (name or '').replace('\\', '/')
+    if os.path.splitext(name)[1].lower() not in MODEL_EXTENSIONS:
+        return ''
+    if not name.startswith(MODEL_DIRECTORIES) or '..' in name.split('/'):
+        return ''
+    sha256 = hashlib.sha256()
+    try:
+        with open(os.path.join(settings.MEDIA_ROOT, name), 'rb') as f:
+            for block in iter(lambda: f.read(64 * 1024), b''):
+                sha256.update(block)
+    except OSError:
+        return ''
+    return sha256.hexdigest()[:DIGEST_LENGTH]
+
+
+def backfill_model_digest(apps, schema_editor):
+    """为已有模型文件计算内容摘要"""
+    Builder = apps.get_model('builder', 'Builder')
+    updated = []
+    for builder in Builder.objects.exclude(model='').exclude(model__isnull=True).only('id', 'model').iterator():
+        builder.model_digest = name_digest(builder.model.name)
+        if builder.model_digest:
+            updated.append(builder)
+    Builder.objects.bulk_update(updated, ['model_digest'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder', '0004_chunked_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='builder',
+            name='model_digest',
+            field=models.CharField(blank=True, default='', max_length=16, verbose_name='模型文件摘要'),
+        ),
+        migrations.RunPython(backfill_model_digest, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:34
+
+from django.db import migrations, models
+
+
+def queue_existing_models(apps, schema_editor):
+    """已有模型文件的建筑进入优化队列"""
+    Builder = apps.get_model('builder', 'Builder')
+    Builder.objects.exclude(model='').exclude(model__isnull=True).update(model_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder', '0005_builder_model_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='builder',
+            name='model_status',
+            field=models.CharField(choices=[('none', '无模型'), ('pending', '等待处理'), ('processing', '处理中'), ('ready', '已完成'), ('failed', '处理失败'), ('unsupported', '不支持优化')], db_index=True, default='none', max_length=20, verbose_name='模型处理状态'),
+        ),
+        migrations.AddField(
+            model_name='builder',
+            name='model_variants',
+            field=models.JSONField(blank=True, default=dict, verbose_name='模型优化版本'),
+        ),
+        migrations.RunPython(queue_existing_models, migrations.RunPython.noop),
+    ]
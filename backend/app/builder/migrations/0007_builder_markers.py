@@ -0,0 +1,70 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:43
+
+import json
+import uuid
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def split_existing_markers(apps, schema_editor):
+    """把已有的 json 标注拆分为标注记录；无法解析的数据保持原样"""
+    Builder = apps.get_model('builder', 'Builder')
+    BuilderMarker = apps.get_model('builder', 'BuilderMarker')
+    for builder in Builder.objects.exclude(json__isnull=True).exclude(json='').only('id', 'json').iterator():
+        try:
+            markers = json.loads(builder.json)
+        except ValueError:
+            continue
+        if not isinstance(markers, list) or not all(isinstance(marker, dict) for marker in markers):
+            continue
+        rows, seen = [], set()
+        for marker in markers:
+            marker_id = str(marker.get('id') or '').strip()[:64]
+            if not marker_id or marker_id in seen:
+                marker_id = uuid.uuid4().hex
+            seen.add(marker_id)
+            marker['id'] = marker_id
+            data = json.dumps(marker, ensure_ascii=False, separators=(',', ':'))
+            rows.append(BuilderMarker(builder_id=builder.id, marker_id=marker_id, data=data, version=1))
+        if not rows:
+            continue
+        BuilderMarker.objects.bulk_create(rows)
+        Builder.objects.filter(pk=builder.id).update(
+            markers_version=1, json='[' + ','.join(row.data for row in rows) + ']'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder', '0006_builder_model_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='builder',
+            name='markers_version',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='标注版本'),
+        ),
+        migrations.CreateModel(
+            name='BuilderMarker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marker_id', models.CharField(max_length=64, verbose_name='标注ID')),
+                ('data', models.TextField(blank=True, default='', verbose_name='标注数据')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='最后修改的版本')),
+                ('deleted', models.BooleanField(default=False, verbose_name='已删除')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('builder', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='markers', to='builder.builder', verbose_name='所属建筑')),
+            ],
+            options={
+                'verbose_name': '建筑标注',
+                'verbose_name_plural': '建筑标注',
+                'indexes': [models.Index(fields=['builder', 'version'], name='builder_bui_builder_064b0f_idx')],
+                'unique_together': {('builder', 'marker_id')},
+            },
+        ),
+        migrations.RunPython(split_existing_markers, migrations.RunPython.noop),
+    ]
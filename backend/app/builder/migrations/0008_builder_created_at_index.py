@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builder', '0007_builder_markers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='builder',
+            index=models.Index(fields=['created_at', 'id'], name='builder_bui_created_b9c7de_idx'),
+        ),
+    ]
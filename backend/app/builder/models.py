@@ -1,7 +1,12 @@
+import uuid
+
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from app.user.models import CustomUser
+from app.public.images import image_variants
+from .assets import name_digest
+from .geo import parse_address, geohash_encode
 
 class Builder(models.Model):
     name = models.CharField(max_length=200, verbose_name=_('建筑物名称'))
@@ -39,6 +44,82 @@ class Builder(models.Model):
         null=True,
         verbose_name=_('建筑物标签')
     )
+    # 以下字段由 address 解析得到，保存时自动同步
+    latitude = models.FloatField(blank=True, null=True, verbose_name=_('纬度'))
+    longitude = models.FloatField(blank=True, null=True, verbose_name=_('经度'))
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True, verbose_name=_('Geohash'))
+    # 模型文件内容摘要，用于生成可长期缓存的模型地址，保存时自动同步
+    model_digest = models.CharField(max_length=16, blank=True, default='', verbose_name=_('模型文件摘要'))
+    # 模型优化状态和生成的细节层级版本，见 app/builder/optimization.py
+    MODEL_STATUS_CHOICES = [
+        ('none', '无模型'),
+        ('pending', '等待处理'),
+        ('processing', '处理中'),
+        ('ready', '已完成'),
+        ('failed', '处理失败'),
+        ('unsupported', '不支持优化'),
+    ]
+    model_status = models.CharField(
+        max_length=20,
+        choices=MODEL_STATUS_CHOICES,
+        default='none',
+        db_index=True,
+        verbose_name=_('模型处理状态')
+    )
+    model_variants = models.JSONField(default=dict, blank=True, verbose_name=_('模型优化版本'))
+    # 标注数据版本号，每次修改标注后递增，见 app/builder/markers.py
+    markers_version = models.PositiveBigIntegerField(default=0, verbose_name=_('标注版本'))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录加载时的 json，保存时据此判断标注是否被整体替换
+        instance._loaded_json = instance.__dict__.get('json')
+        return instance
+
+    def sync_coordinates(self):
+        """根据 address 更新经纬度和 geohash"""
+        coords = parse_address(self.address)
+        if coords is None:
+            self.latitude = self.longitude = None
+            self.geohash = ''
+        else:
+            self.latitude, self.longitude = coords
+            self.geohash = geohash_encode(*coords)
+
+    def sync_model_digest(self):
+        """
+        根据模型文件内容更新 model_digest（摘要按文件大小和修改时间缓存，未变化时不会重新读取文件）
+        模型文件变化时清空已生成的优化版本，并标记为等待处理
+        """
+        if self.model and not self.model._committed:
+            # 先把新上传的文件写入存储，才能计算摘要
+            self.model.save(self.model.name, self.model.file, save=False)
+        previous = self.model_digest
+        self.model_digest = name_digest(self.model.name) if self.model else ''
+        if not self.model:
+            self.model_status = 'none'
+            self.model_variants = {}
+        elif self.model_digest != previous or self.model_status == 'none':
+            self.model_status = 'pending'
+            self.model_variants = {}
+
+    def save(self, *args, **kwargs):
+        self.sync_coordinates()
+        self.sync_model_digest()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'address' in update_fields:
+                update_fields |= {'latitude', 'longitude', 'geohash'}
+            if 'model' in update_fields:
+                update_fields |= {'model_digest', 'model_status', 'model_variants'}
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+        if 'json' in self.__dict__ and self.json != getattr(self, '_loaded_json', None):
+            # 整体写入的 json 同步为逐条标注记录，并改写为规范格式
+            from .markers import sync_from_json
+            sync_from_json(self)
 
     def get_image_url(self):
         """获取图片完整URL"""
@@ -46,6 +127,10 @@ class Builder(models.Model):
             return f"{settings.URL_BASE}/media/{self.image}"
         return None
 
+    def get_image_variants(self):
+        """获取图片各尺寸版本的URL（srcset），见 app/public/images.py"""
+        return image_variants(self.image)
+
     def get_tags_list(self):
         """获取标签列表"""
         if not self.tags:
@@ -55,4 +140,98 @@ class Builder(models.Model):
     class Meta:
         verbose_name = _('建筑物')
         verbose_name_plural = _('建筑物')
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['latitude', 'longitude']),
+            # 列表按 (created_at, id) 键集分页
+            models.Index(fields=['created_at', 'id']),
+        ]
+
+class BuilderMarker(models.Model):
+    """
+    建筑模型上的一条 AR/3D 标注
+    删除的标注保留为墓碑记录（deleted=True，不含数据），增量同步时据此通知客户端删除
+    """
+    builder = models.ForeignKey(
+        Builder,
+        on_delete=models.CASCADE,
+        related_name='markers',
+        verbose_name=_('所属建筑')
+    )
+    marker_id = models.CharField(max_length=64, verbose_name=_('标注ID'))
+    # 规范化后的标注 JSON 文本，拼接 Builder.json 时无需重新序列化
+    data = models.TextField(blank=True, default='', verbose_name=_('标注数据'))
+    version = models.PositiveBigIntegerField(default=0, verbose_name=_('最后修改的版本'))
+    deleted = models.BooleanField(default=False, verbose_name=_('已删除'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('创建时间'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('更新时间'))
+
+    class Meta:
+        verbose_name = _('建筑标注')
+        verbose_name_plural = _('建筑标注')
+        unique_together = ['builder', 'marker_id']
+        indexes = [
+            models.Index(fields=['builder', 'version']),
+        ]
+
+
+class ChunkedUpload(models.Model):
+    """分片上传会话（大模型文件断点续传）"""
+    STATUS_CHOICES = [
+        ('uploading', '上传中'),
+        ('complete', '已完成'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='chunked_uploads',
+        verbose_name=_('上传用户')
+    )
+    builder = models.ForeignKey(
+        Builder,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='chunked_uploads',
+        verbose_name=_('关联建筑')
+    )
+    filename = models.CharField(max_length=255, verbose_name=_('原始文件名'))
+    total_size = models.BigIntegerField(verbose_name=_('文件大小'))
+    chunk_size = models.PositiveIntegerField(verbose_name=_('分片大小'))
+    checksum = models.CharField(max_length=64, blank=True, default='', verbose_name=_('整个文件的SHA-256'))
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading', verbose_name=_('状态'))
+    file_path = models.CharField(max_length=255, blank=True, default='', verbose_name=_('保存路径'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('创建时间'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('更新时间'))
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    def expected_chunk_size(self, index):
+        """第 index 个分片应有的字节数"""
+        if index == self.total_chunks - 1:
+            return self.total_size - self.chunk_size * index
+        return self.chunk_size
+
+    class Meta:
+        verbose_name = _('分片上传')
+        verbose_name_plural = _('分片上传')
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+
+class ChunkedUploadPart(models.Model):
+    """已接收的分片"""
+    upload = models.ForeignKey(ChunkedUpload, on_delete=models.CASCADE, related_name='parts')
+    index = models.PositiveIntegerField(verbose_name=_('分片序号'))
+    size = models.PositiveIntegerField(verbose_name=_('分片大小'))
+    checksum = models.CharField(max_length=64, verbose_name=_('分片SHA-256'))
+
+    class Meta:
+        verbose_name = _('上传分片')
+        verbose_name_plural = _('上传分片')
+        unique_together = ['upload', 'index']
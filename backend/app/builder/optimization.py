@@ -0,0 +1,168 @@
+# app/builder/optimization.py
+
+import logging
+import os
+import shutil
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .assets import asset_path, asset_url, name_digest
+from .glb import GLBError, GLBOptimizer, UnsupportedModel, parse_glb
+from probject.response_cache import invalidate_tags
+from .models import Builder
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可在 settings.MODEL_OPTIMIZATION 中覆盖
+DEFAULT_CONFIG = {
+    # 生成的版本：ratio 为保留的三角形比例，texture_size 为贴图最大边长（None 表示不缩小）
+    'VARIANTS': {
+        'lod0': {'ratio': 1.0, 'texture_size': None},
+        'lod1': {'ratio': 0.5, 'texture_size': 2048},
+        'lod2': {'ratio': 0.15, 'texture_size': 1024},
+        'preview': {'ratio': 0.03, 'texture_size': 256},
+    },
+    'MIN_TRIANGLES': 200,               # 简化后至少保留的三角形数
+    'MAX_FILE_SIZE': 200 * 1024 * 1024,  # 超过该大小的模型不处理
+    'BATCH_SIZE': 5,                    # 每次任务处理的模型数
+    'STALE_MINUTES': 30,                # 处理中超过该时间视为任务中断，重新排队
+    'OUTPUT_DIR': 'models/variants',    # 必须位于 MODEL_ASSETS.DIRECTORIES 之内
+}
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'MODEL_OPTIMIZATION', {}))
+    return config
+
+
+def variant_name(digest, name):
+    """优化版本的存储路径，按原文件摘要分目录，相同文件只处理一次"""
+    return f"{get_config()['OUTPUT_DIR']}/{digest}/{name}.glb"
+
+
+def variant_urls(variants):
+    """把 model_variants 转换为接口输出：版本名 -> 地址、大小和三角形数"""
+    return {
+        name: {
+            'url': asset_url(info['path'], info.get('digest')),
+            'size': info.get('size'),
+            'triangles': info.get('triangles'),
+            'vertices': info.get('vertices'),
+        }
+        for name, info in (variants or {}).items()
+    }
+
+
+def optimize_model(path, config=None):
+    """
+    读取 GLB 并生成配置中的所有版本，返回 {版本名: (GLB 字节串, 统计信息)}
+    文件不是 GLB 或使用了无法处理的特性时抛出 UnsupportedModel / GLBError
+    """
+    config = config or get_config()
+    if os.path.splitext(path)[1].lower() != '.glb':
+        raise UnsupportedModel('只支持优化 GLB 格式的模型')
+    if os.path.getsize(path) > config['MAX_FILE_SIZE']:
+        raise UnsupportedModel('模型文件过大')
+    with open(path, 'rb') as f:
+        gltf, binary = parse_glb(f.read())
+
+    optimizer = GLBOptimizer(gltf, binary)
+    return {
+        name: optimizer.build(
+            ratio=options.get('ratio', 1.0),
+            texture_size=options.get('texture_size'),
+            min_triangles=config['MIN_TRIANGLES'],
+        )
+        for name, options in config['VARIANTS'].items()
+    }
+
+
+def _save_variant(name, data):
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    return default_storage.save(name, ContentFile(data))
+
+
+def process_builder(builder_id):
+    """
+    生成指定建筑模型的优化版本，返回处理后的状态
+    处理期间模型被替换时不会覆盖新模型的状态
+    """
+    config = get_config()
+    builder = Builder.objects.filter(pk=builder_id).only('id', 'model', 'model_digest').first()
+    if builder is None or not builder.model:
+        return None
+    digest = builder.model_digest or name_digest(builder.model.name)
+    path = asset_path(builder.model.name)
+
+    variants = {}
+    try:
+        if path is None or not os.path.exists(path):
+            raise UnsupportedModel('模型文件不存在')
+        for name, (data, stats) in optimize_model(path, config).items():
+            saved = _save_variant(variant_name(digest, name), data)
+            variants[name] = {
+                'path': saved,
+                'digest': name_digest(saved),
+                'size': len(data),
+                'triangles': stats['triangles'],
+                'vertices': stats['vertices'],
+            }
+        result = 'ready'
+    except UnsupportedModel as e:
+        logger.info(f"建筑 {builder_id} 的模型不做优化: {e}")
+        result = 'unsupported'
+    except Exception as e:
+        logger.warning(f"建筑 {builder_id} 的模型优化失败: {e}", exc_info=not isinstance(e, GLBError))
+        result = 'failed'
+
+    updated = Builder.objects.filter(pk=builder_id, model_digest=builder.model_digest).update(
+        model_status=result, model_variants=variants, updated_at=timezone.now()
+    )
+    if updated:
+        invalidate_tags('builder')
+    return result if updated else None
+
+
+def process_pending_models(limit=None):
+    """处理等待中的模型，返回 {状态: 数量}"""
+    config = get_config()
+    stale = timezone.now() - timedelta(minutes=config['STALE_MINUTES'])
+    Builder.objects.filter(model_status='processing', updated_at__lt=stale).update(model_status='pending')
+
+    results = {}
+    pending = Builder.objects.filter(model_status='pending').order_by('updated_at').values_list('id', flat=True)
+    for builder_id in list(pending[:limit or config['BATCH_SIZE']]):
+        # 先把状态改为处理中，多个 worker 同时执行时只有一个能领取到
+        claimed = Builder.objects.filter(pk=builder_id, model_status='pending').update(
+            model_status='processing', updated_at=timezone.now()
+        )
+        if not claimed:
+            continue
+        result = process_builder(builder_id)
+        if result:
+            results[result] = results.get(result, 0) + 1
+    if results:
+        logger.info(f"模型优化完成: {results}")
+    return results
+
+
+def cleanup_variants():
+    """删除已不被任何建筑引用的优化版本目录，返回删除的目录数"""
+    root = os.path.join(settings.MEDIA_ROOT, get_config()['OUTPUT_DIR'])
+    if not os.path.isdir(root):
+        return 0
+    referenced = set(Builder.objects.exclude(model_digest='').values_list('model_digest', flat=True))
+    removed = 0
+    for entry in os.scandir(root):
+        if entry.is_dir() and entry.name not in referenced:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    if removed:
+        logger.info(f"清理无引用的模型优化版本 {removed} 个")
+    return removed
@@ -1,20 +1,26 @@
 from rest_framework import serializers
 from django.conf import settings
 from .models import Builder
+from .assets import asset_url
+from .markers import MarkerError, dump_markers, parse_markers
+from .optimization import variant_urls
 
 class BuilderSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     tags_list = serializers.SerializerMethodField()
     model_url = serializers.SerializerMethodField()  # 新增字段
+    model_variants = serializers.SerializerMethodField()
 
 
     class Meta:
         model = Builder
         fields = [
-            'id', 'name', 'description', 'address', 'category',
+            'id', 'name', 'description', 'address', 'latitude', 'longitude', 'category',
             'tags', 'creator', 'json', 'created_at', 'updated_at',
-            'image', 'image_url', 'tags_list', 'model_url'
+            'image', 'image_url', 'image_variants', 'tags_list', 'model_url', 'model_status', 'model_variants', 'markers_version'
         ]
+        read_only_fields = ['latitude', 'longitude', 'model_status', 'markers_version']
         extra_kwargs = {
             'json': {'required': False},
             'image': {'write_only': True},
@@ -25,11 +31,26 @@ class BuilderSerializer(serializers.ModelSerializer):
         """获取图片URL"""
         return obj.get_image_url()
 
+    def get_image_variants(self, obj):
+        """获取缩略图和 WebP 版本的URL"""
+        return obj.get_image_variants()
+
+    def validate_json(self, value):
+        """标注数据需为带 id 的标注列表，保存为规范格式"""
+        try:
+            return dump_markers(parse_markers(value))
+        except MarkerError as e:
+            raise serializers.ValidationError(str(e))
+
     def get_tags_list(self, obj):
         """获取标签列表"""
         return obj.get_tags_list()
     def get_model_url(self, obj):
         """获取模型文件URL"""
         if obj.model:
-            return f"{settings.URL_BASE}/media/{obj.model}"
-        return None
\ No newline at end of file
+            return asset_url(obj.model.name, obj.model_digest)
+        return None
+
+    def get_model_variants(self, obj):
+        """模型优化版本（lod0 / lod1 / lod2 / preview），客户端按设备性能选择"""
+        return variant_urls(obj.model_variants)
@@ -0,0 +1,14 @@
+# app/builder/signals.py
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from probject.response_cache import invalidate_tags
+from .models import Builder
+
+
+# 公开接口响应缓存失效
+@receiver(post_save, sender=Builder)
+@receiver(post_delete, sender=Builder)
+def invalidate_builder_cache(sender, instance, **kwargs):
+    invalidate_tags('builder')
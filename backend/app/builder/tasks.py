@@ -0,0 +1,25 @@
+# app/builder/tasks.py
+
+from .optimization import cleanup_variants, process_pending_models
+from .uploads import cleanup_expired_uploads
+
+
+def cleanup_chunked_uploads():
+    """
+    清理长时间未完成的模型分片上传及其暂存文件
+    """
+    return cleanup_expired_uploads()
+
+
+def optimize_models():
+    """
+    为新上传的 GLB 模型生成细节层级版本和预览版本
+    """
+    return process_pending_models()
+
+
+def cleanup_model_variants():
+    """
+    删除已不被任何建筑引用的模型优化版本
+    """
+    return cleanup_variants()
@@ -0,0 +1,211 @@
+# app/builder/uploads.py
+
+import hashlib
+import io
+import logging
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from app.public.blobs import store_local_file
+from .models import ChunkedUpload, ChunkedUploadPart
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可在 settings.CHUNKED_UPLOAD 中覆盖
+DEFAULT_CONFIG = {
+    'TEMP_DIR': os.path.join(settings.BASE_DIR, 'tmp', 'uploads'),  # 分片暂存目录，最好与 MEDIA_ROOT 在同一文件系统
+    'CHUNK_SIZE': 5 * 1024 * 1024,          # 默认分片大小
+    'MIN_CHUNK_SIZE': 256 * 1024,
+    'MAX_CHUNK_SIZE': 32 * 1024 * 1024,
+    'MAX_FILE_SIZE': 1024 * 1024 * 1024,    # 单个模型文件上限
+    'ALLOWED_EXTENSIONS': ['.glb', '.gltf', '.obj', '.fbx'],
+    'EXPIRE_HOURS': 24,                     # 超过该时间未活动的上传会被清理
+}
+
+# 读写分片时的缓冲区大小，内存占用与文件大小无关
+BUFFER_SIZE = 64 * 1024
+
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadError(ValueError):
+    """分片上传参数或状态错误"""
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'CHUNKED_UPLOAD', {}))
+    return config
+
+
+def part_path(upload):
+    """上传中的文件在暂存目录中的路径，各分片按偏移直接写入该文件"""
+    return os.path.join(get_config()['TEMP_DIR'], f'{upload.id}.part')
+
+
+def _normalize_checksum(value):
+    value = (value or '').strip().lower()
+    if value and not _SHA256_RE.match(value):
+        raise UploadError('校验值必须是 SHA-256 十六进制字符串')
+    return value
+
+
+def create_upload(user, filename, total_size, builder=None, checksum='', chunk_size=None):
+    """创建上传会话并预分配暂存文件"""
+    config = get_config()
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext not in config['ALLOWED_EXTENSIONS']:
+        raise UploadError(f"只支持 {'、'.join(config['ALLOWED_EXTENSIONS'])} 格式的模型文件")
+    try:
+        total_size = int(total_size)
+        chunk_size = int(chunk_size or config['CHUNK_SIZE'])
+    except (TypeError, ValueError):
+        raise UploadError('文件大小或分片大小无效')
+    if total_size <= 0:
+        raise UploadError('文件大小无效')
+    if total_size > config['MAX_FILE_SIZE']:
+        raise UploadError(f"模型文件大小不能超过{config['MAX_FILE_SIZE'] // (1024 * 1024)}MB")
+    if not config['MIN_CHUNK_SIZE'] <= chunk_size <= config['MAX_CHUNK_SIZE']:
+        raise UploadError('分片大小超出允许范围')
+
+    upload = ChunkedUpload.objects.create(
+        user=user,
+        builder=builder,
+        filename=os.path.basename(filename)[:255],
+        total_size=total_size,
+        chunk_size=chunk_size,
+        checksum=_normalize_checksum(checksum),
+    )
+    os.makedirs(config['TEMP_DIR'], exist_ok=True)
+    with open(part_path(upload), 'wb') as f:
+        f.truncate(total_size)
+    return upload
+
+
+def write_chunk(upload, index, stream, checksum=None):
+    """
+    把请求体中的分片流式写入暂存文件的对应位置，边写边计算 SHA-256
+    同一分片可以重复上传（断点续传时覆盖），大小或校验值不符时报错且不记录该分片
+    stream 为 None（请求体为空）时按空分片处理
+    """
+    if upload.status != 'uploading':
+        raise UploadError('上传已结束')
+    if not 0 <= index < upload.total_chunks:
+        raise UploadError('分片序号超出范围')
+    checksum = _normalize_checksum(checksum)
+    expected = upload.expected_chunk_size(index)
+    if stream is None:
+        stream = io.BytesIO()
+
+    # 写入会覆盖暂存文件中该分片的旧数据，先删除已有的分片记录，
+    # 本次写入失败时该分片视为缺失，需要重新上传，不会合并出损坏的文件
+    ChunkedUploadPart.objects.filter(upload=upload, index=index).delete()
+
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with open(part_path(upload), 'r+b') as f:
+            f.seek(index * upload.chunk_size)
+            while written <= expected:
+                block = stream.read(min(BUFFER_SIZE, expected + 1 - written))
+                if not block:
+                    break
+                if written + len(block) > expected:
+                    raise UploadError(f'分片大小应为 {expected} 字节')
+                f.write(block)
+                digest.update(block)
+                written += len(block)
+    except FileNotFoundError:
+        raise UploadError('上传已过期，请重新开始')
+
+    if written != expected:
+        raise UploadError(f'分片大小应为 {expected} 字节，实际收到 {written} 字节')
+    digest = digest.hexdigest()
+    if checksum and checksum != digest:
+        raise UploadError('分片校验失败')
+
+    ChunkedUploadPart.objects.update_or_create(
+        upload=upload, index=index, defaults={'size': written, 'checksum': digest}
+    )
+    ChunkedUpload.objects.filter(pk=upload.pk).update(updated_at=timezone.now())
+    return digest
+
+
+def received_indices(upload):
+    return list(upload.parts.order_by('index').values_list('index', flat=True))
+
+
+def upload_status(upload):
+    received = received_indices(upload)
+    return {
+        'upload_id': str(upload.id),
+        'filename': upload.filename,
+        'status': upload.status,
+        'total_size': upload.total_size,
+        'chunk_size': upload.chunk_size,
+        'total_chunks': upload.total_chunks,
+        'received': received,
+        'missing': sorted(set(range(upload.total_chunks)) - set(received)),
+        'file_path': upload.file_path or None,
+    }
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def complete_upload(upload):
+    """校验所有分片和整体校验值，把文件移入存储目录，返回存储路径"""
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status == 'complete':
+            return upload.file_path
+        missing = upload.total_chunks - upload.parts.count()
+        if missing:
+            raise UploadError(f'还有 {missing} 个分片未上传')
+
+        path = part_path(upload)
+        if not os.path.exists(path):
+            raise UploadError('上传已过期，请重新开始')
+        digest = _file_sha256(path)
+        if upload.checksum and digest != upload.checksum:
+            raise UploadError('文件校验失败，请重新上传')
+
+        # 按内容寻址保存，同一文件系统内直接移动；相同内容已存在时只删除暂存文件
+        saved_path = store_local_file(path, upload.filename, digest)
+
+        upload.status = 'complete'
+        upload.file_path = saved_path
+        upload.save(update_fields=['status', 'file_path', 'updated_at'])
+        upload.parts.all().delete()
+    return saved_path
+
+
+def discard_upload(upload):
+    """取消上传，删除暂存文件和会话"""
+    try:
+        os.remove(part_path(upload))
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def cleanup_expired_uploads():
+    """清理超过 EXPIRE_HOURS 未活动的上传会话及其暂存文件，返回清理数量"""
+    cutoff = timezone.now() - timedelta(hours=get_config()['EXPIRE_HOURS'])
+    removed = 0
+    for upload in ChunkedUpload.objects.filter(updated_at__lt=cutoff).iterator():
+        discard_upload(upload)
+        removed += 1
+    if removed:
+        logger.info(f"清理过期分片上传 {removed} 个")
+    return removed
@@ -7,6 +7,7 @@ urlpatterns = [
     path('my/', views.get_my_models, name='get_my_models'),
     path('all/', views.get_all_models, name='get_all_models'),
     path('all-page-models/', views.get_all_buildings_paginated, name='get_all_models_page'),
+    path('map/', views.get_map_buildings, name='get_map_buildings'),
 
     # 分类和标签
     path('categories/', views.get_building_categories, name='get_building_categories'),
@@ -30,12 +31,25 @@ urlpatterns = [
     path('builders/<int:pk>/json/update/', views.update_builder_json, name='update-builder-json'),  # PUT
     path('builders/<int:pk>/json/delete/', views.delete_builder_json, name='delete-builder-json'),  # DELETE
 
+    # 单条标注和增量同步
+    path('builders/<int:pk>/markers/', views.get_builder_markers, name='builder-markers'),  # GET ?since=版本号
+    path('builders/<int:pk>/markers/add/', views.add_builder_marker, name='add-builder-marker'),  # POST
+    path('builders/<int:pk>/markers/sync/', views.sync_builder_markers, name='sync-builder-markers'),  # POST
+    path('builders/<int:pk>/markers/<str:marker_id>/update/', views.update_builder_marker, name='update-builder-marker'),  # PATCH
+    path('builders/<int:pk>/markers/<str:marker_id>/delete/', views.delete_builder_marker, name='delete-builder-marker'),  # DELETE
+
 
     # urls.py 中添加
     path('upload-building-model/<int:pk>/', views.upload_building_model, name='upload_building_model'),
 
     path('upload-building-model-user/<int:pk>/', views.upload_building_model_user, name='upload_building_model'),
 
+    # 模型文件分片上传（断点续传）
+    path('uploads/', views.init_model_upload, name='init_model_upload'),
+    path('uploads/<uuid:upload_id>/', views.model_upload_detail, name='model_upload_detail'),
+    path('uploads/<uuid:upload_id>/chunks/<int:index>/', views.upload_model_chunk, name='upload_model_chunk'),
+    path('uploads/<uuid:upload_id>/complete/', views.complete_model_upload, name='complete_model_upload'),
+
     # urls.py 中添加
     path('update-builder-info/<int:pk>/', views.update_builder_info, name='update_builder_info'),
 
@@ -1,8 +1,4 @@
-import os
-import uuid
-from datetime import datetime
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from app.public.blobs import store, release
 
 def save_building_image(file, name=""):
     """
@@ -18,28 +14,13 @@ def save_building_image(file, name=""):
     if file.size > 5 * 1024 * 1024:  # 5MB
         raise ValueError("图片大小不能超过5MB")
 
-    # 生成文件路径
-    ext = os.path.splitext(file.name)[1]
-    filename = f"{uuid.uuid4()}{ext}"
-    upload_path = f'buildings/{datetime.now().strftime("%Y/%m")}/{filename}'
-
-    # 保存文件
-    path = default_storage.save(upload_path, ContentFile(file.read()))
-    return path
+    # 按内容寻址保存（边写边计算摘要，相同图片只保存一份）
+    return store(file)
 
 def delete_building_image(file_path):
-    """删除建筑物图片"""
-    if file_path and default_storage.exists(file_path):
-        default_storage.delete(file_path)
-        return True
-    return False
-
+    """删除建筑物图片（内容寻址的文件可能被共享，由垃圾回收处理）"""
+    return release(file_path)
 
-import os
-import uuid
-from datetime import datetime
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 
 def save_model_file(file, name=""):
     """
@@ -50,18 +31,9 @@ def save_model_file(file, name=""):
     if file.size > 50 * 1024 * 1024:
         raise ValueError("模型文件大小不能超过50MB")
 
-    # 生成文件路径
-    ext = os.path.splitext(file.name)[1]
-    filename = f"{uuid.uuid4()}{ext}"
-    upload_path = f'models/{datetime.now().strftime("%Y/%m")}/{filename}'
-
-    # 保存文件
-    path = default_storage.save(upload_path, ContentFile(file.read()))
-    return path
+    # 按内容寻址保存（按块写入，不把整个文件读入内存；超过 50MB 的模型请使用分片上传接口）
+    return store(file)
 
 def delete_model_file(file_path):
-    """删除模型文件"""
-    if file_path and default_storage.exists(file_path):
-        default_storage.delete(file_path)
-        return True
-    return False
\ No newline at end of file
+    """删除模型文件（内容寻址的文件可能被共享，由垃圾回收处理）"""
+    return release(file_path)
\ No newline at end of file
@@ -2,6 +2,10 @@ from rest_framework.decorators import api_view, parser_classes
 from rest_framework.parsers import MultiPartParser, FormParser
 
 from rest_framework import status
+import os
+
+from django.http import HttpResponseNotFound, HttpResponseRedirect
+from django.views.decorators.http import require_safe
 
 from probject import settings
 from .models import Builder
@@ -11,6 +15,20 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
 from .utils import save_building_image, delete_building_image, save_model_file
+from app.tag.services import filter_builders_by_tags, builder_tag_names
+from .listing import (
+    builder_list_queryset, format_builder, catalogue_etag, etag_matches, viewport, CLUSTER_MAX_ZOOM
+)
+from .geo import parse_bbox
+from .models import ChunkedUpload
+from .uploads import UploadError, create_upload, write_chunk, upload_status, complete_upload, discard_upload
+from probject.response_cache import cached_view
+from probject.pagination import InvalidCursor, KeysetPagination, select_paginator
+from .assets import asset_path, asset_url, asset_response, file_digest
+from .markers import (
+    MarkerError, MarkerNotFound, add_marker, apply_delta, changes_since, delete_marker, dump_markers,
+    parse_markers, update_marker,
+)
 
 
 @api_view(['POST'])
@@ -180,36 +198,39 @@ from django.conf import settings
 def get_all_models(request):
     """
     获取所有建筑模型列表，包含模型文件URL（有则返回URL，无则返回null）和关联文章ID
+    可选参数：
+        page / page_size：分页（不传则返回全部）
+        lite=1：省略 description 和 json 字段，适合地图和画廊
+    支持 ETag / If-None-Match 条件请求，数据未变化时返回 304
     """
     try:
-        # 获取所有建筑模型并按创建时间倒序排列
-        queryset = Builder.objects.all().order_by('-created_at')
-        serializer = BuilderSerializer(queryset, many=True)
-
-        # 获取基本序列化数据
-        data = serializer.data
-
-        # 为每个建筑添加额外的信息
-        enhanced_data = []
-        for idx, builder in enumerate(queryset):
-            builder_data = dict(data[idx])
-            # 修改 has_model：有模型返回 model_url，无模型返回 null
-            builder_data['has_model'] = (
-                f"{settings.URL_BASE}/media/{builder.model}" if builder.model else None
-            )
-            # 获取关联的文章ID（如果存在）
-            related_article = builder.articles.first()  # 获取第一个关联文章
-            builder_data['article_id'] = related_article.id if related_article else None
-
-            enhanced_data.append(builder_data)
-
-        return Response(
-            {
-                "code": 200,
-                "data": enhanced_data
-            },
-            status=status.HTTP_200_OK
-        )
+        lite = request.GET.get('lite') in ('1', 'true')
+        page = request.GET.get('page')
+        try:
+            page = int(page) if page else None
+            page_size = min(int(request.GET.get('page_size', 20)), 200)
+            if (page is not None and page < 1) or page_size < 1:
+                raise ValueError
+        except ValueError:
+            return Response({"code": 400, "message": "分页参数错误"}, status=status.HTTP_400_BAD_REQUEST)
+
+        etag = catalogue_etag(lite, page, page_size if page else None)
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            response['ETag'] = etag
+            return response
+
+        queryset = builder_list_queryset(lite=lite)
+        result = {"code": 200}
+        if page is not None:
+            result.update({"count": queryset.count(), "page": page, "page_size": page_size})
+            queryset = queryset[(page - 1) * page_size:page * page_size]
+        result["data"] = [format_builder(row) for row in queryset]
+
+        response = Response(result, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
         print(f"Error: {str(e)}")
         return Response(
@@ -220,6 +241,46 @@ def get_all_models(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['GET'])
+def get_map_buildings(request):
+    """
+    获取地图视口内的建筑
+    参数：
+        bbox：west,south,east,north（经度,纬度，与 Leaflet 的 toBBoxString 一致）
+        zoom：地图缩放级别，较低时返回按 geohash 聚合的结果
+    """
+    try:
+        west, south, east, north = parse_bbox(request.GET.get('bbox', ''))
+        zoom = int(request.GET.get('zoom', CLUSTER_MAX_ZOOM))
+    except ValueError:
+        return Response({"code": 400, "message": "bbox 或 zoom 参数错误"}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        "code": 200,
+        "message": "获取成功",
+        "data": viewport(west, south, east, north, zoom)
+    })
+
+
+@require_safe
+def serve_model_asset(request, digest, name):
+    """
+    按带内容摘要的地址提供模型文件（GLB/GLTF 等）
+    支持 Range 和条件请求，响应可被浏览器和 CDN 长期缓存；
+    摘要与文件当前内容不一致时重定向到最新地址
+    """
+    path = asset_path(name)
+    if path is None:
+        return HttpResponseNotFound('模型文件不存在')
+    try:
+        stat = os.stat(path)
+        current = file_digest(path, stat)
+    except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+        return HttpResponseNotFound('模型文件不存在')
+    if digest != current:
+        return HttpResponseRedirect(asset_url(name))
+    return asset_response(request, path, stat)
+
 from django.db.models import Q
 from datetime import datetime
 
@@ -243,10 +304,7 @@ def get_all_buildings_paginated(request):
         queryset = queryset.filter(category=category)
 
     if tags:
-        tag_query = Q()
-        for tag in tags:
-            tag_query |= Q(tags__icontains=tag)
-        queryset = queryset.filter(tag_query)
+        queryset = filter_builders_by_tags(queryset, tags)
 
     if len(date_range) == 2:
         try:
@@ -261,11 +319,16 @@ def get_all_buildings_paginated(request):
 
     queryset = queryset.order_by('-created_at')
 
-    paginator = PageNumberPagination()
-    page = paginator.paginate_queryset(queryset, request)
+    # 带 cursor 或 limit 参数时按 (created_at, id) 键集分页
+    paginator = select_paginator(request, PageNumberPagination)
+    try:
+        page = paginator.paginate_queryset(queryset, request)
+    except InvalidCursor as e:
+        return Response({"code": 400, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     serializer = BuilderSerializer(page, many=True)
     return paginator.get_paginated_response(serializer.data)
 @api_view(['GET'])
+@cached_view(tags=['builder'])
 def get_building_categories(request):
     """获取建筑物分类列表"""
     categories = Builder.objects.values_list('category', flat=True).distinct()
@@ -275,19 +338,13 @@ def get_building_categories(request):
     })
 
 @api_view(['GET'])
+@cached_view(tags=['builder'])
 def get_building_tags(request):
     """获取所有建筑物标签"""
-    tags = Builder.objects.values_list('tags', flat=True)
-    # 处理标签
-    all_tags = []
-    for tag_str in tags:
-        if tag_str:
-            all_tags.extend([t.strip() for t in tag_str.split(',')])
-    # 去重
-    unique_tags = list(set(all_tags))
+    # 直接读取标签表，按使用次数排序
     return Response({
         "code": 200,
-        "data": unique_tags
+        "data": builder_tag_names()
     })
 
 
@@ -326,7 +383,7 @@ def upload_model_file(request, pk):
 
             # 更新JSON数据（如果有）
             if 'json' in request.data:
-                builder.json = request.data['json']
+                builder.json = dump_markers(parse_markers(request.data['json']))
 
             builder.save()
 
@@ -413,7 +470,13 @@ def update_model_json(request, pk):
                 "message": "请提供JSON数据"
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        builder.json = request.data['json']
+        try:
+            builder.json = dump_markers(parse_markers(request.data['json']))
+        except MarkerError as e:
+            return Response({
+                "code": 400,
+                "message": f"标注数据无效: {e}"
+            }, status=status.HTTP_400_BAD_REQUEST)
         builder.save()
 
         return Response({
@@ -447,8 +510,9 @@ def get_model_details(request, pk):
                 "id": builder.id,
                 "creator": builder.creator.id,
                 "name": builder.name,
-                "model_url": f"{settings.URL_BASE}/media/{builder.model}" if builder.model else None,
+                "model_url": asset_url(builder.model.name, builder.model_digest) if builder.model else None,
                 "json": builder.json if builder.model else None,
+                "markers_version": builder.markers_version,
                 "created_at": builder.created_at.strftime("%Y-%m-%d sssssssss%H:%M:%S"),
                 "updated_at": builder.updated_at.strftime("%Y-%m-%d %H:%M:%S")
             }
@@ -500,7 +564,13 @@ def add_builder_json(request, pk):
                 'message': '请提供 JSON 数据'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        builder.json = request.data['json']
+        try:
+            builder.json = dump_markers(parse_markers(request.data['json']))
+        except MarkerError as e:
+            return Response({
+                'code': 400,
+                'message': f'标注数据无效: {e}'
+            }, status=status.HTTP_400_BAD_REQUEST)
         builder.save()
 
         return Response({
@@ -539,7 +609,13 @@ def update_builder_json(request, pk):
                 'message': '请提供 JSON 数据'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        builder.json = request.data['json']
+        try:
+            builder.json = dump_markers(parse_markers(request.data['json']))
+        except MarkerError as e:
+            return Response({
+                'code': 400,
+                'message': f'标注数据无效: {e}'
+            }, status=status.HTTP_400_BAD_REQUEST)
         builder.save()
 
         return Response({
@@ -582,6 +658,152 @@ def delete_builder_json(request, pk):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# 单条标注操作和增量同步，见 app/builder/markers.py
+def _marker_editor_error(request, pk):
+    """建筑不存在或当前用户不是创建者/管理员时返回错误响应"""
+    creator_id = Builder.objects.filter(pk=pk).values_list('creator_id', flat=True).first()
+    if creator_id is None:
+        return Response({
+            'code': 404,
+            'message': '建筑不存在'
+        }, status=status.HTTP_404_NOT_FOUND)
+    if creator_id != request.auth_user.id and not request.auth_user.is_staff:
+        return Response({
+            'code': 403,
+            'message': '您没有权限修改此建筑的标注数据'
+        }, status=status.HTTP_403_FORBIDDEN)
+    return None
+
+
+def _marker_error_response(e):
+    if isinstance(e, MarkerNotFound):
+        return Response({
+            'code': 404,
+            'message': str(e)
+        }, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        'code': 400,
+        'message': f'标注数据无效: {e}'
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+def get_builder_markers(request, pk):
+    """
+    获取建筑的标注
+    查询参数 since 为客户端已有的版本号，只返回之后新增/修改的标注和删除的标注ID；
+    不提供时返回全部标注
+    """
+    try:
+        since = int(request.GET.get('since') or 0)
+        if since < 0:
+            raise ValueError
+    except ValueError:
+        return Response({
+            'code': 400,
+            'message': 'since 必须是非负整数'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    data = changes_since(pk, since)
+    if data is None:
+        return Response({
+            'code': 404,
+            'message': '建筑不存在'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        'code': 200,
+        'message': '获取成功',
+        'data': data
+    })
+
+
+@api_view(['POST'])
+@jwt_required
+def add_builder_marker(request, pk):
+    """新增一条标注，请求体为标注对象（id 可选）"""
+    error = _marker_editor_error(request, pk)
+    if error:
+        return error
+    try:
+        marker, version = add_marker(pk, request.data)
+    except MarkerError as e:
+        return _marker_error_response(e)
+    return Response({
+        'code': 200,
+        'message': '标注添加成功',
+        'data': {'version': version, 'marker': marker}
+    })
+
+
+@api_view(['PATCH'])
+@jwt_required
+def update_builder_marker(request, pk, marker_id):
+    """修改一条标注，只需提交变化的字段"""
+    error = _marker_editor_error(request, pk)
+    if error:
+        return error
+    try:
+        marker, version = update_marker(pk, marker_id, request.data)
+    except MarkerError as e:
+        return _marker_error_response(e)
+    return Response({
+        'code': 200,
+        'message': '标注更新成功',
+        'data': {'version': version, 'marker': marker}
+    })
+
+
+@api_view(['DELETE'])
+@jwt_required
+def delete_builder_marker(request, pk, marker_id):
+    """删除一条标注"""
+    error = _marker_editor_error(request, pk)
+    if error:
+        return error
+    try:
+        version = delete_marker(pk, marker_id)
+    except MarkerError as e:
+        return _marker_error_response(e)
+    return Response({
+        'code': 200,
+        'message': '标注删除成功',
+        'data': {'version': version}
+    })
+
+
+@api_view(['POST'])
+@jwt_required
+def sync_builder_markers(request, pk):
+    """
+    编辑端提交标注增量
+    请求体：{"base_version": 编辑开始时的版本号, "upsert": [新增或修改的标注], "delete": [删除的标注ID]}
+    返回新版本号、base_version 之后被他人修改过的标注ID（按后提交为准），
+    以及 base_version 之后的全部变化，编辑端据此合并
+    """
+    error = _marker_editor_error(request, pk)
+    if error:
+        return error
+    base_version = request.data.get('base_version')
+    if base_version is not None and (isinstance(base_version, bool) or not isinstance(base_version, int) or base_version < 0):
+        return Response({
+            'code': 400,
+            'message': 'base_version 必须是非负整数'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        version, conflicts = apply_delta(
+            pk, request.data.get('upsert'), request.data.get('delete'), base_version
+        )
+    except MarkerError as e:
+        return _marker_error_response(e)
+    data = changes_since(pk, base_version)
+    data['conflicts'] = conflicts
+    return Response({
+        'code': 200,
+        'message': '标注同步成功',
+        'data': data
+    })
+
+
 @api_view(['POST'])
 @jwt_required
 @admin_required
@@ -743,6 +965,115 @@ def upload_building_model_user(request, pk):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _can_change_model(user, builder):
+    """建筑创建者或管理员可以更换模型文件"""
+    return builder.creator_id == user.id or user.is_staff
+
+
+def _get_own_upload(request, upload_id):
+    """获取当前用户自己的上传会话，不存在时返回 None"""
+    return ChunkedUpload.objects.filter(id=upload_id, user=request.auth_user).first()
+
+
+@api_view(['POST'])
+@jwt_required
+def init_model_upload(request):
+    """
+    创建模型文件分片上传
+    请求参数：{
+        "filename": "model.glb",
+        "size": 文件字节数,
+        "checksum": "整个文件的 SHA-256（可选）",
+        "chunk_size": 分片大小（可选）,
+        "builder_id": 上传完成后关联的建筑（可选）
+    }
+    """
+    builder = None
+    builder_id = request.data.get('builder_id')
+    if builder_id:
+        builder = Builder.objects.filter(pk=builder_id).first()
+        if builder is None:
+            return Response({"code": 404, "message": "建筑不存在"}, status=status.HTTP_404_NOT_FOUND)
+        if not _can_change_model(request.auth_user, builder):
+            return Response({"code": 403, "message": "无权限修改此建筑"}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        upload = create_upload(
+            request.auth_user,
+            request.data.get('filename'),
+            request.data.get('size'),
+            builder=builder,
+            checksum=request.data.get('checksum'),
+            chunk_size=request.data.get('chunk_size'),
+        )
+    except UploadError as e:
+        return Response({"code": 400, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({"code": 200, "message": "创建成功", "data": upload_status(upload)})
+
+
+@api_view(['PUT'])
+@jwt_required
+def upload_model_chunk(request, upload_id, index):
+    """
+    上传一个分片，请求体为分片的原始字节
+    请求头 X-Chunk-Checksum 可携带分片的 SHA-256，用于校验
+    """
+    upload = _get_own_upload(request, upload_id)
+    if upload is None:
+        return Response({"code": 404, "message": "上传不存在"}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        checksum = write_chunk(upload, index, request.stream, request.META.get('HTTP_X_CHUNK_CHECKSUM'))
+    except UploadError as e:
+        return Response({"code": 400, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({"code": 200, "message": "分片上传成功", "data": {"index": index, "checksum": checksum}})
+
+
+@api_view(['GET', 'DELETE'])
+@jwt_required
+def model_upload_detail(request, upload_id):
+    """查询上传进度（断点续传时获取缺失的分片），DELETE 取消上传"""
+    upload = _get_own_upload(request, upload_id)
+    if upload is None:
+        return Response({"code": 404, "message": "上传不存在"}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'DELETE':
+        discard_upload(upload)
+        return Response({"code": 200, "message": "上传已取消"})
+    return Response({"code": 200, "message": "获取成功", "data": upload_status(upload)})
+
+
+@api_view(['POST'])
+@jwt_required
+def complete_model_upload(request, upload_id):
+    """合并分片并保存模型文件，创建时指定了建筑则替换该建筑的模型"""
+    upload = _get_own_upload(request, upload_id)
+    if upload is None:
+        return Response({"code": 404, "message": "上传不存在"}, status=status.HTTP_404_NOT_FOUND)
+
+    builder = upload.builder
+    if builder is not None and not _can_change_model(request.auth_user, builder):
+        return Response({"code": 403, "message": "无权限修改此建筑"}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        model_path = complete_upload(upload)
+    except UploadError as e:
+        return Response({"code": 400, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = {"file_path": model_path, "model_url": asset_url(model_path)}
+    if builder is not None and builder.model.name != model_path:
+        # 删除旧模型文件（如果存在）
+        if builder.model:
+            delete_model_file(builder.model.name)
+        builder.model = model_path
+        builder.save()
+        data["builder"] = BuilderSerializer(builder).data
+
+    return Response({"code": 200, "message": "建筑模型文件上传成功", "data": data})
+
+
 
 
 from rest_framework.decorators import api_view, parser_classes
@@ -789,10 +1120,7 @@ def get_my_models(request):
 
         # 按标签筛选
         if tags:
-            tag_query = Q()
-            for tag in tags:
-                tag_query |= Q(tags__icontains=tag)
-            queryset = queryset.filter(tag_query)
+            queryset = filter_builders_by_tags(queryset, tags)
 
         # 按日期范围筛选
         if len(date_range) == 2:
@@ -813,26 +1141,35 @@ def get_my_models(request):
         # 按创建时间排序
         queryset = queryset.order_by('-created_at')
 
-        # 分页
-        paginator = PageNumberPagination()
-        paginator.page_size = page_size
+        # 分页：带 cursor 或 limit 参数时按 (created_at, id) 键集分页，不统计总数
+        paginator = select_paginator(request, PageNumberPagination)
+        keyset = isinstance(paginator, KeysetPagination)
+        if not keyset:
+            paginator.page_size = page_size
         result_page = paginator.paginate_queryset(queryset, request)
 
         # 序列化
         serializer = BuilderSerializer(result_page, many=True)
 
-        return Response({
+        result = {
             "code": 200,
             "message": "获取成功",
             "results": {
                 "code": 200,
                 "data": serializer.data
-            },
-            "count": queryset.count(),
-            "page": page,
-            "page_size": page_size
-        })
-
+            }
+        }
+        if keyset:
+            result.update(paginator.get_pagination_data())
+        else:
+            result.update({"count": queryset.count(), "page": page, "page_size": page_size})
+        return Response(result)
+
+    except InvalidCursor as e:
+        return Response({
+            "code": 400,
+            "message": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             "code": 500,
@@ -1003,6 +1340,7 @@ def get_model_detail(request, pk):
 
 # 在 views.py 中添加以下函数
 @api_view(['GET'])
+@cached_view(tags=['builder'])
 def get_all_models_with_3d(request):
     """
     获取所有有3D模型的建筑列表（分页）
@@ -1030,12 +1368,7 @@ def get_all_models_with_3d(request):
 
         # 按标签筛选 - 支持逗号分隔的多个标签
         if tags:
-            tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
-            if tag_list:
-                tag_query = Q()
-                for tag in tag_list:
-                    tag_query |= Q(tags__icontains=tag)
-                queryset = queryset.filter(tag_query)
+            queryset = filter_builders_by_tags(queryset, tags.split(','))
 
         # 按日期范围筛选
         if len(date_range) == 2:
@@ -1052,25 +1385,34 @@ def get_all_models_with_3d(request):
         # 按创建时间排序
         queryset = queryset.order_by('-created_at')
 
-        # 分页
-        paginator = PageNumberPagination()
-        paginator.page_size = page_size
+        # 分页：带 cursor 或 limit 参数时按 (created_at, id) 键集分页，不统计总数
+        paginator = select_paginator(request, PageNumberPagination)
+        keyset = isinstance(paginator, KeysetPagination)
+        if not keyset:
+            paginator.page_size = page_size
         result_page = paginator.paginate_queryset(queryset, request)
 
         # 序列化
         serializer = BuilderSerializer(result_page, many=True)
 
-        return Response({
+        result = {
             "code": 200,
             "message": "获取成功",
             "results": {
                 "data": serializer.data
-            },
-            "count": queryset.count(),
-            "page": page,
-            "page_size": page_size
-        })
-
+            }
+        }
+        if keyset:
+            result.update(paginator.get_pagination_data())
+        else:
+            result.update({"count": queryset.count(), "page": page, "page_size": page_size})
+        return Response(result)
+
+    except InvalidCursor as e:
+        return Response({
+            "code": 400,
+            "message": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             "code": 500,
@@ -1089,6 +1431,7 @@ from .models import Builder
 from django.db.models import Q
 
 @api_view(['GET'])
+@cached_view(tags=['builder'])
 def get_building_categories_models(request):
     """获取包含模型地址的建筑物分类列表（排除空字符串和 NULL）"""
     # 筛选 model 不为 NULL 且不为空字符串的记录
@@ -1104,30 +1447,20 @@ def get_building_categories_models(request):
     })
 
 @api_view(['GET'])
+@cached_view(tags=['builder'])
 def get_building_tags_models(request):
     """获取包含模型地址的建筑物标签列表（排除空字符串和 NULL）"""
     # 筛选 model 不为 NULL 且不为空字符串的记录
-    tags_queryset = (
-        Builder.objects
-        .filter(~Q(model__isnull=True) & ~Q(model=""))  # 排除 NULL 和空字符串
-        .values_list('tags', flat=True)
-    )
-
-    # 处理标签
-    all_tags = []
-    for tag_str in tags_queryset:
-        if tag_str:  # 确保 tags 不为空
-            all_tags.extend([t.strip() for t in tag_str.split(',')])
-
-    # 去重
-    unique_tags = list(set(all_tags))  # 预期返回 ["明代建筑", "宗教建筑"]
+    builders = Builder.objects.filter(~Q(model__isnull=True) & ~Q(model=""))  # 排除 NULL 和空字符串
 
+    # 通过标签关联表查出这些建筑用到的标签
     return Response({
         "code": 200,
-        "data": unique_tags
+        "data": builder_tag_names(builders)  # 预期返回 ["明代建筑", "宗教建筑"]
     })
 
 @api_view(['GET'])
+@cached_view(tags=['builder'])
 def search_buildings_models(request):
     """搜索包含模型地址的建筑物（排除空字符串和 NULL）"""
     category = request.query_params.get('category', None)
@@ -1140,9 +1473,9 @@ def search_buildings_models(request):
     if category:
         queryset = queryset.filter(category=category)
 
-    # 根据 tag 过滤（可选，模糊匹配）
+    # 根据 tag 过滤（可选）
     if tag:
-        queryset = queryset.filter(tags__icontains=tag)
+        queryset = filter_builders_by_tags(queryset, [tag])
 
     # 去重
     queryset = queryset.distinct()
@@ -9,3 +9,7 @@ class CommentConfig(AppConfig):
     name = 'app.comment'
     verbose_name = '评论管理'
     icon = 'fa fa-comments'
+
+    def ready(self):
+        # 注册评论计数维护信号
+        from . import signals  # noqa: F401
@@ -0,0 +1,115 @@
+# app/comment/counters.py
+
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from app.article.models import Article
+from probject.likes import LikeService
+from probject.response_cache import invalidate_tags
+from .models import Comment
+
+# 评论点赞：CommentLike 记录与 Comment.likes 在同一事务中增减
+comment_likes = LikeService('comment.Comment', 'comment.CommentLike', 'comment')
+
+# Article.comment_count（文章的全部评论数，含回复）和 Comment.reply_count（直接回复数）
+# 由评论的新增、删除信号用 F() 原子增减维护，读取时不再执行 COUNT 查询；
+# 文章列表缓存（精选、热门）中含有 comment_count，计数变化后一并失效
+_local = threading.local()
+
+
+def _apply(model, field, deltas):
+    """按 {id: 增量} 更新计数列，增量相同的行合并为一条 UPDATE；不会减到负数"""
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if pk and delta:
+            by_delta[delta].append(pk)
+    for delta, ids in by_delta.items():
+        model.objects.filter(pk__in=ids).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def _record(comment, delta):
+    pending = getattr(_local, 'pending', None)
+    if pending is not None:
+        articles, parents = pending
+        articles[comment.article_id] += delta
+        if comment.parent_id:
+            parents[comment.parent_id] += delta
+        return
+    _apply(Article, 'comment_count', {comment.article_id: delta})
+    if comment.parent_id:
+        _apply(Comment, 'reply_count', {comment.parent_id: delta})
+    invalidate_tags('article:published')
+
+
+def comment_added(comment):
+    _record(comment, 1)
+
+
+def comment_removed(comment):
+    _record(comment, -1)
+
+
+@contextmanager
+def batch_updates():
+    """
+    块内评论增删引起的计数变化先在内存中合并，退出时按文章、父评论聚合成少量 UPDATE，
+    与删除在同一事务中提交。用于批量删除和级联删除回复：
+
+        with batch_updates():
+            Comment.objects.filter(id__in=ids).delete()
+    """
+    if getattr(_local, 'pending', None) is not None:
+        # 已在外层批量块中，由外层统一写入
+        yield
+        return
+    _local.pending = (Counter(), Counter())
+    try:
+        with transaction.atomic():
+            yield
+            articles, parents = _local.pending
+            _apply(Article, 'comment_count', articles)
+            _apply(Comment, 'reply_count', parents)
+            if any(articles.values()):
+                invalidate_tags('article:published')
+    finally:
+        _local.pending = None
+
+
+def _actual_counts():
+    """按实际评论数计算的计数表达式：(模型, 计数列, 表达式)"""
+    comment_totals = Comment.objects.filter(article=OuterRef('pk')).order_by().values(
+        'article'
+    ).annotate(total=Count('id')).values('total')
+    reply_totals = Comment.objects.filter(parent=OuterRef('pk')).order_by().values(
+        'parent'
+    ).annotate(total=Count('id')).values('total')
+    return [
+        (Article, 'comment_count', Coalesce(Subquery(comment_totals, output_field=IntegerField()), Value(0))),
+        (Comment, 'reply_count', Coalesce(Subquery(reply_totals, output_field=IntegerField()), Value(0))),
+    ]
+
+
+def repair_counts(dry_run=False):
+    """
+    按实际评论数重算计数列，每种计数一条 UPDATE，只更新与实际不符的行
+    返回 {'article': 不符的文章数, 'comment': 不符的评论数}
+    """
+    result = {}
+    with transaction.atomic():
+        for model, field, actual in _actual_counts():
+            drifted = model.objects.annotate(actual=actual).exclude(**{field: F('actual')})
+            label = model._meta.model_name
+            if dry_run:
+                result[label] = drifted.count()
+            else:
+                result[label] = model.objects.filter(
+                    pk__in=drifted.values('pk')
+                ).update(**{field: actual})
+        if not dry_run and result.get('article'):
+            invalidate_tags('article:published')
+    return result
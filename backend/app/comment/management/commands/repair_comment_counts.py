@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from app.comment.counters import repair_counts
+
+
+class Command(BaseCommand):
+    help = '按实际评论数重算文章评论数（comment_count）和评论回复数（reply_count）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='只统计与实际不符的行数，不写入')
+
+    def handle(self, *args, **options):
+        result = repair_counts(dry_run=options['dry_run'])
+        action = '不符' if options['dry_run'] else '已修正'
+        self.stdout.write(self.style.SUCCESS(
+            f"文章评论数{action} {result['article']} 篇，评论回复数{action} {result['comment']} 条"
+        ))
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:55
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_reply_counts(apps, schema_editor):
+    Comment = apps.get_model('comment', 'Comment')
+    totals = Comment.objects.filter(parent=OuterRef('pk')).order_by().values(
+        'parent'
+    ).annotate(total=Count('id')).values('total')
+    Comment.objects.update(reply_count=Coalesce(Subquery(totals, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comment', '0002_commentlike'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='回复数'),
+        ),
+        migrations.RunPython(fill_reply_counts, migrations.RunPython.noop),
+    ]
@@ -12,6 +12,7 @@ class Comment(models.Model):
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
     likes = models.PositiveIntegerField(default=0, verbose_name='点赞数')
     is_top = models.BooleanField(default=False, verbose_name='是否置顶')
+    reply_count = models.PositiveIntegerField(default=0, verbose_name='回复数')  # 直接回复数，由评论增删时自动维护
 
     class Meta:
         verbose_name = '评论'
@@ -24,6 +25,17 @@ class Comment(models.Model):
     def __str__(self):
         return f'{self.author.username} 的评论'
 
+    def save(self, *args, **kwargs):
+        # 点赞数、回复数只由 F() 增减维护，整行保存时不写回内存中可能已过期的值
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+                and field.name not in ('likes', 'reply_count')
+            ]
+        super().save(*args, **kwargs)
+
 
 # models.py
 class CommentLike(models.Model):
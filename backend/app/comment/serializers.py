@@ -1,14 +1,14 @@
 # serializers.py
 from rest_framework import serializers
-from rest_framework_simplejwt.authentication import JWTAuthentication
-
+from probject.serializers import BatchListSerializer
+from app.user.authentication import resolve_request_user
 from .models import Comment, CommentLike
 
 
 class CommentSerializer(serializers.ModelSerializer):
     author_name = serializers.CharField(source='author.username', read_only=True)
     author_avatar = serializers.SerializerMethodField()
-    reply_count = serializers.SerializerMethodField()
+    author_avatar_variants = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
     # 添加文章标题
     article_title = serializers.CharField(source='article.title', read_only=True)
@@ -18,18 +18,32 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ['id', 'content', 'article', 'article_title', 'author',
-                  'author_name', 'author_avatar', 'parent', 'parent_author_name',
+                  'author_name', 'author_avatar', 'author_avatar_variants', 'parent', 'parent_author_name',
                   'created_at', 'updated_at', 'likes', 'is_top',
                   'reply_count', 'is_liked']
-        read_only_fields = ['likes', 'is_top']
+        read_only_fields = ['likes', 'is_top', 'reply_count']
+        list_serializer_class = BatchListSerializer
+
+    def prepare_batch(self, comments):
+        """列表序列化前一次性获取当前用户对整页评论的点赞记录"""
+        comment_ids = [comment.pk for comment in comments]
+        user = resolve_request_user(self.context.get('request'))
+        if user and comment_ids:
+            self._liked_ids = set(CommentLike.objects.filter(
+                user=user, comment_id__in=comment_ids
+            ).values_list('comment_id', flat=True))
+        else:
+            self._liked_ids = set()
 
     def get_author_avatar(self, obj):
         if hasattr(obj.author, 'get_full_avatar_url'):
             return obj.author.get_full_avatar_url()
         return None
 
-    def get_reply_count(self, obj):
-        return obj.replies.count()
+    def get_author_avatar_variants(self, obj):
+        if hasattr(obj.author, 'get_avatar_variants'):
+            return obj.author.get_avatar_variants()
+        return None
 
     def get_parent_author_name(self, obj):
         if obj.parent and obj.parent.author:
@@ -37,25 +51,10 @@ class CommentSerializer(serializers.ModelSerializer):
         return None
 
     def get_is_liked(self, obj):
-        request = self.context.get('request')
-        if not request:
-            return False
+        if self.parent is not None and hasattr(self, '_liked_ids'):
+            return obj.pk in self._liked_ids
 
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-        if not auth_header.startswith('Bearer '):
+        user = resolve_request_user(self.context.get('request'))
+        if not user:
             return False
-
-        token = auth_header.split(' ')[1]
-        try:
-            auth = JWTAuthentication()
-            validated_token = auth.get_validated_token(token)
-            user_id = auth.get_user(validated_token)
-            if user_id:
-                return CommentLike.objects.filter(
-                    comment=obj,
-                    user_id=user_id
-                ).exists()
-        except:
-            return False
-
-        return False
\ No newline at end of file
+        return CommentLike.objects.filter(comment=obj, user=user).exists()
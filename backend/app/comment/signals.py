@@ -0,0 +1,20 @@
+# app/comment/signals.py
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Comment
+from . import counters
+
+
+# 文章评论数和评论回复数维护
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.comment_added(instance)
+
+
+# 级联删除的回复也会逐条触发，批量删除时放在 counters.batch_updates() 中合并写入
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.comment_removed(instance)
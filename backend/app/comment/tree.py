@@ -0,0 +1,114 @@
+# app/comment/tree.py
+
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from probject.pagination import InvalidCursor
+from .models import Comment
+from .serializers import CommentSerializer
+
+# 逐层加载回复时的最大层数，防止异常数据导致死循环
+MAX_DEPTH = 64
+
+
+def _base_queryset():
+    # 作者和文章随评论一起查出，文章正文用不到，不加载
+    return Comment.objects.select_related('author', 'article').defer('article__content')
+
+
+def _link(comments, known=None):
+    """
+    在内存中建立父子关系：设置 parent 缓存和 children 列表
+    known 为已加载的评论 {id: comment}，用于连接跨批次加载的父评论
+    """
+    by_id = dict(known or {})
+    for comment in comments:
+        comment.children = []
+        by_id[comment.id] = comment
+
+    for comment in comments:
+        parent = by_id.get(comment.parent_id)
+        if parent is not None:
+            comment.parent = parent
+            parent.children.append(comment)
+    return by_id
+
+
+def load_article_comments(article_id):
+    """
+    一次查询加载文章的全部评论并组装成树
+    返回 (按默认排序的全部评论列表, 顶级评论列表)
+    """
+    comments = list(_base_queryset().filter(article_id=article_id))
+    _link(comments)
+    roots = [comment for comment in comments if comment.parent_id is None]
+    return comments, roots
+
+
+def encode_cursor(comment):
+    payload = [int(comment.is_top), comment.created_at.isoformat(), comment.id]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        is_top, created_at, comment_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise ValueError(cursor)
+        return bool(is_top), created_at, int(comment_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise InvalidCursor('无效的游标')
+
+
+def load_comment_page(article_id, cursor=None, limit=20):
+    """
+    按顶级评论游标分页加载评论树
+    顶级评论按 (is_top, created_at, id) 倒序做键集分页，每页的回复按层级逐层批量加载
+    返回 (本页全部评论, 本页顶级评论, 下一页游标或 None)
+    """
+    queryset = _base_queryset().filter(article_id=article_id, parent__isnull=True).order_by(
+        '-is_top', '-created_at', '-id'
+    )
+    if cursor:
+        is_top, created_at, comment_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(is_top__lt=is_top) |
+            Q(is_top=is_top, created_at__lt=created_at) |
+            Q(is_top=is_top, created_at=created_at, id__lt=comment_id)
+        )
+
+    # 多取一条用来判断是否还有下一页
+    roots = list(queryset[:limit + 1])
+    has_more = len(roots) > limit
+    roots = roots[:limit]
+
+    comments = list(roots)
+    known = _link(roots)
+    level = [comment.id for comment in roots]
+    for _ in range(MAX_DEPTH):
+        if not level:
+            break
+        replies = list(_base_queryset().filter(parent_id__in=level))
+        known = _link(replies, known)
+        comments.extend(replies)
+        level = [comment.id for comment in replies]
+
+    next_cursor = encode_cursor(roots[-1]) if has_more and roots else None
+    return comments, roots, next_cursor
+
+
+def serialize_tree(comments, roots, context):
+    """把已加载的评论序列化为嵌套结构，每个节点带 children 列表"""
+    data = CommentSerializer(comments, many=True, context=context).data
+    by_id = {item['id']: dict(item, children=[]) for item in data}
+
+    def build(comment):
+        node = by_id[comment.id]
+        node['children'] = [build(child) for child in comment.children]
+        return node
+
+    return [build(root) for root in roots]
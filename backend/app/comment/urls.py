@@ -5,6 +5,7 @@ urlpatterns = [
     # 评论的创建和列表
     path('comments/', views.add_comment, name='add-comment'),  # POST
     path('comments/article/<int:article_id>/list/', views.get_comments, name='get-comments'),  # GET
+    path('comments/article/<int:article_id>/tree/', views.get_comment_tree, name='get-comment-tree'),  # GET 嵌套评论树，支持游标分页
 
     # 评论回复
     path('comments/replies/<int:comment_id>/', views.get_replies, name='get-replies'),  # GET
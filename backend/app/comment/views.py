@@ -14,13 +14,16 @@ from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import F, Q
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
-from .models import Comment, CommentLike
+from .models import Comment
 from .serializers import CommentSerializer
+from .tree import load_article_comments, load_comment_page, serialize_tree, InvalidCursor
+from .counters import batch_updates, comment_likes
 from app.user.decorators import jwt_required, admin_required
+from probject.pagination import KeysetPagination
 
 
 @api_view(['POST'])
@@ -85,13 +88,14 @@ def add_comment(request):
 @api_view(['GET'])
 def get_comments(request, article_id):
     try:
-        queryset = Comment.objects.filter(article_id=article_id)
-        serializer = CommentSerializer(queryset, many=True, context={'request': request})
+        # 一次查询取出全部评论，回复数和父评论在内存中关联
+        comments, _ = load_article_comments(article_id)
+        serializer = CommentSerializer(comments, many=True, context={'request': request})
         return Response({
             'code': status.HTTP_200_OK,
             'message': '获取评论列表成功',
             'data': serializer.data,
-            'total': queryset.count()
+            'total': len(comments)
         })
     except Exception as e:
         return Response({
@@ -100,12 +104,51 @@ def get_comments(request, article_id):
             'error': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+def get_comment_tree(request, article_id):
+    """
+    获取文章的嵌套评论树
+    不传 cursor/limit 时返回整棵树；传入时按顶级评论游标分页，
+    响应中的 next_cursor 用于获取下一页，为 null 表示已到最后一页
+    """
+    try:
+        cursor = request.query_params.get('cursor')
+        limit = request.query_params.get('limit')
+
+        if cursor is None and limit is None:
+            comments, roots = load_article_comments(article_id)
+            next_cursor = None
+            total = len(comments)
+        else:
+            limit = max(1, min(int(limit or 20), 100))
+            comments, roots, next_cursor = load_comment_page(article_id, cursor, limit)
+            total = Comment.objects.filter(article_id=article_id).count()
+
+        return Response({
+            'code': status.HTTP_200_OK,
+            'message': '获取评论树成功',
+            'data': serialize_tree(comments, roots, {'request': request}),
+            'next_cursor': next_cursor,
+            'total': total
+        })
+    except (InvalidCursor, ValueError):
+        return Response({
+            'code': status.HTTP_400_BAD_REQUEST,
+            'message': '分页参数错误'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            'code': status.HTTP_500_INTERNAL_SERVER_ERROR,
+            'message': '获取评论树失败',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['GET'])
 def get_replies(request, comment_id):
     try:
         comment = get_object_or_404(Comment, id=comment_id)
         queryset = Comment.objects.filter(parent_id=comment_id)
-        serializer = CommentSerializer(queryset, many=True)
+        serializer = CommentSerializer(queryset, many=True, context={'request': request})
         return Response({
             'code': status.HTTP_200_OK,
             'message': '获取回复列表成功',
@@ -135,7 +178,9 @@ def delete_comment(request, pk):
                 'message': '您没有权限删除此评论'
             }, status=status.HTTP_403_FORBIDDEN)
 
-        comment.delete()  # 级联删除会自动处理子评论
+        # 级联删除会自动处理子评论，评论数和回复数合并更新
+        with batch_updates():
+            comment.delete()
 
         return Response({
             'code': status.HTTP_200_OK,
@@ -154,29 +199,15 @@ def like_comment(request, pk):
     try:
         comment = get_object_or_404(Comment, pk=pk)
 
-        # 检查是否已经点赞
-        like_record = CommentLike.objects.filter(
-            comment=comment,
-            user=request.auth_user
-        ).first()
+        # 创建点赞记录并更新评论点赞数（同一事务，重复点赞不计数）
+        created, comment.likes = comment_likes.like(comment.id, request.auth_user.id)
 
-        if like_record:
+        if not created:
             return Response({
                 'code': 400,
                 'message': '您已经点赞过这条评论了'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # 创建点赞记录
-        CommentLike.objects.create(
-            comment=comment,
-            user=request.auth_user
-        )
-
-        # 更新评论点赞数
-        comment.likes = F('likes') + 1
-        comment.save()
-        comment.refresh_from_db()
-
         # 使用序列化器获取最新数据
         serializer = CommentSerializer(comment, context={'request': request})
 
@@ -203,25 +234,15 @@ def unlike_comment(request, pk):
     try:
         comment = get_object_or_404(Comment, pk=pk)
 
-        # 查找并删除点赞记录
-        like_record = CommentLike.objects.filter(
-            comment=comment,
-            user=request.auth_user
-        ).first()
+        # 删除点赞记录并更新评论点赞数（同一事务）
+        removed, comment.likes = comment_likes.unlike(comment.id, request.auth_user.id)
 
-        if not like_record:
+        if not removed:
             return Response({
                 'code': 400,
                 'message': '您还没有点赞过这条评论'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        like_record.delete()
-
-        # 更新评论点赞数
-        comment.likes = F('likes') - 1
-        comment.save()
-        comment.refresh_from_db()
-
         # 使用序列化器获取最新数据
         serializer = CommentSerializer(comment, context={'request': request})
 
@@ -254,9 +275,16 @@ def get_my_comments(request):
         if search:
             queryset = queryset.filter(content__icontains=search)
 
-        paginator = PageNumberPagination()
-        paginator.page_size = page_size
-        page_data = paginator.paginate_queryset(queryset, request)
+        # 带 cursor 或 limit 参数时按 (created_at, id) 键集分页，不统计总数
+        if KeysetPagination.requested(request):
+            paginator = KeysetPagination()
+            page_data = paginator.paginate_queryset(queryset, request)
+            extra = paginator.get_pagination_data()
+        else:
+            paginator = PageNumberPagination()
+            paginator.page_size = page_size
+            page_data = paginator.paginate_queryset(queryset, request)
+            extra = {'total': queryset.count()}
 
         serializer = CommentSerializer(page_data, many=True, context={'request': request})
 
@@ -264,8 +292,13 @@ def get_my_comments(request):
             'code': status.HTTP_200_OK,
             'message': '获取评论列表成功',
             'data': serializer.data,
-            'total': queryset.count()
+            **extra
         })
+    except InvalidCursor as e:
+        return Response({
+            'code': status.HTTP_400_BAD_REQUEST,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             'code': status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -322,11 +355,17 @@ def admin_comment_list(request):
             except ValueError:
                 pass
 
-        # 计算分页
-        total = queryset.count()
-        start = (page - 1) * page_size
-        end = page * page_size
-        comments = queryset[start:end]
+        # 计算分页：带 cursor 或 limit 参数时按 (created_at, id) 键集分页，不统计总数
+        if KeysetPagination.requested(request):
+            paginator = KeysetPagination(page_size=page_size)
+            comments = paginator.paginate_queryset(queryset, request)
+            extra = paginator.get_pagination_data()
+        else:
+            total = queryset.count()
+            start = (page - 1) * page_size
+            end = page * page_size
+            comments = queryset[start:end]
+            extra = {'total': total}
 
         serializer = CommentSerializer(comments, many=True, context={'request': request})
 
@@ -334,8 +373,13 @@ def admin_comment_list(request):
             'code': 200,  # 使用数字而不是 status 常量
             'message': '获取评论列表成功',
             'data': serializer.data,
-            'total': total
+            **extra
         })
+    except InvalidCursor as e:
+        return Response({
+            'code': 400,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             'code': 500,  # 使用数字而不是 status 常量
@@ -349,7 +393,8 @@ def admin_delete_comment(request, pk):
     """管理员删除单个评论"""
     try:
         comment = get_object_or_404(Comment, pk=pk)
-        comment.delete()
+        with batch_updates():
+            comment.delete()
         return Response({
             'code': 200,
             'message': '评论删除成功'
@@ -378,7 +423,9 @@ def admin_batch_delete_comments(request):
                 'message': '请选择要删除的评论'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        Comment.objects.filter(id__in=comment_ids).delete()
+        # 所选评论及级联删除的回复引起的计数变化按文章、父评论聚合更新
+        with batch_updates():
+            Comment.objects.filter(id__in=comment_ids).delete()
         return Response({
             'code': 200,
             'message': '批量删除成功'
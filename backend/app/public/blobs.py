@@ -0,0 +1,244 @@
+# app/public/blobs.py
+"""
+按内容寻址的文件存储
+
+上传的文件边写入临时文件边计算 SHA-256，相同内容只保留一份，路径为
+blobs/<摘要前两位>/<摘要三四位>/<摘要><扩展名>。文件内容不会再变化，地址可以长期缓存。
+
+多条记录可能共享同一个文件，因此替换或删除记录时不直接删除文件，
+由 collect_garbage 统计各模型字段中的引用后回收无引用的文件。
+"""
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError
+from django.utils import timezone
+
+from .models import Blob
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可在 settings.BLOB_STORAGE 中覆盖
+DEFAULT_CONFIG = {
+    'DIRECTORY': 'blobs',
+    # 保存文件路径（或包含路径的地址）的字段："应用.模型.字段"
+    'REFERENCES': [
+        'builder.Builder.image',
+        'builder.Builder.model',
+        'builder.ChunkedUpload.file_path',
+        'article.Article.cover_image',
+        'public.Image.file',
+        'user.CustomUser.avatar',
+    ],
+    # 正文中可能引用文件地址的字段（例如文章中插入的图片）
+    'CONTENT_REFERENCES': [
+        'article.Article.content',
+    ],
+    'GRACE_HOURS': 24,  # 上传后尚未被记录引用的文件保留时间
+}
+
+BUFFER_SIZE = 64 * 1024
+
+_BLOB_PATH_RE = re.compile(r'blobs/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(?:\.[0-9A-Za-z]{1,15})?')
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'BLOB_STORAGE', {}))
+    return config
+
+
+def is_blob(path):
+    """路径是否指向内容寻址存储中的文件"""
+    return bool(path) and str(path).startswith(get_config()['DIRECTORY'] + '/')
+
+
+def blob_path(digest, ext=''):
+    return f"{get_config()['DIRECTORY']}/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def _absolute(path):
+    return os.path.join(settings.MEDIA_ROOT, path)
+
+
+def _temp_dir():
+    path = os.path.join(settings.MEDIA_ROOT, get_config()['DIRECTORY'], 'tmp')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _extension(name):
+    ext = os.path.splitext(name or '')[1].lower()
+    return ext if re.fullmatch(r'\.[0-9a-z]{1,15}', ext) else ''
+
+
+def _commit(temp_path, digest, size, ext):
+    """把已计算摘要的临时文件放入存储；内容已存在时删除临时文件，返回存储路径"""
+    now = timezone.now()
+    blob = Blob.objects.filter(digest=digest).first()
+    if blob is not None and os.path.exists(_absolute(blob.path)):
+        os.remove(temp_path)
+        Blob.objects.filter(pk=blob.pk).update(last_used_at=now)
+        return blob.path
+
+    path = blob.path if blob is not None else blob_path(digest, ext)
+    os.makedirs(os.path.dirname(_absolute(path)), exist_ok=True)
+    os.chmod(temp_path, settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+    os.replace(temp_path, _absolute(path))
+
+    if blob is not None:
+        # 记录存在但文件丢失，用本次上传的内容恢复
+        Blob.objects.filter(pk=blob.pk).update(size=size, last_used_at=now)
+        return path
+    try:
+        Blob.objects.create(digest=digest, path=path, size=size)
+    except IntegrityError:
+        # 并发上传了相同内容，以先写入的记录为准
+        existing = Blob.objects.get(digest=digest)
+        if existing.path != path:
+            os.remove(_absolute(path))
+        return existing.path
+    return path
+
+
+def store(file, name=None):
+    """
+    保存上传文件（UploadedFile、File 或任意可 read 的对象），返回相对于 MEDIA_ROOT 的路径
+    扩展名取自 name 或 file.name
+    """
+    ext = _extension(name or getattr(file, 'name', ''))
+    if hasattr(file, 'seek'):
+        try:
+            file.seek(0)
+        except Exception:
+            pass
+    chunks = file.chunks() if hasattr(file, 'chunks') else iter(lambda: file.read(BUFFER_SIZE), b'')
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=_temp_dir(), suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in chunks:
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        return _commit(temp_path, digest.hexdigest(), size, ext)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def store_local_file(path, name=None, digest=None):
+    """
+    把本地文件移入存储（与 MEDIA_ROOT 在同一文件系统时直接移动，否则复制），返回存储路径
+    已知完整 SHA-256 时可通过 digest 传入，避免重复读取
+    """
+    if digest is None:
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(BUFFER_SIZE), b''):
+                sha256.update(block)
+        digest = sha256.hexdigest()
+    size = os.path.getsize(path)
+    fd, temp_path = tempfile.mkstemp(dir=_temp_dir(), suffix='.part')
+    os.close(fd)
+    shutil.move(path, temp_path)
+    return _commit(temp_path, digest, size, _extension(name or path))
+
+
+def release(path):
+    """
+    记录不再使用某个文件时调用
+    内容寻址的文件可能被其他记录共享，留给垃圾回收处理；其他旧文件直接删除
+    返回是否立即删除了文件
+    """
+    if not path or is_blob(path):
+        return False
+    if default_storage.exists(path):
+        default_storage.delete(path)
+        return True
+    return False
+
+
+def referenced_paths():
+    """统计各引用字段中出现的存储路径及次数"""
+    config = get_config()
+    counts = Counter()
+    prefix = config['DIRECTORY'] + '/'
+    for label in config['REFERENCES'] + config['CONTENT_REFERENCES']:
+        app_label, model_name, field = label.split('.')
+        model = apps.get_model(app_label, model_name)
+        values = model._default_manager.filter(**{f'{field}__contains': prefix}).values_list(field, flat=True)
+        for value in values.iterator():
+            for path in set(_BLOB_PATH_RE.findall(str(value))):
+                counts[path] += 1
+    return counts
+
+
+def collect_garbage(grace_hours=None, dry_run=False):
+    """
+    标记-清除：更新每个文件的引用次数，删除无引用且超过宽限期未使用的文件
+    返回 {'blobs': 文件总数, 'deleted': 删除数量, 'freed': 释放字节数}
+    """
+    config = get_config()
+    grace_hours = config['GRACE_HOURS'] if grace_hours is None else grace_hours
+    cutoff = timezone.now() - timedelta(hours=grace_hours)
+    counts = referenced_paths()
+
+    changed = []
+    total = 0
+    for blob in Blob.objects.only('id', 'path', 'reference_count').iterator():
+        total += 1
+        count = counts.get(blob.path, 0)
+        if count != blob.reference_count:
+            blob.reference_count = count
+            changed.append(blob)
+    if not dry_run:
+        Blob.objects.bulk_update(changed, ['reference_count'], batch_size=500)
+
+    deleted = 0
+    freed = 0
+    orphans = Blob.objects.filter(last_used_at__lt=cutoff)
+    for blob in list(orphans.only('id', 'path', 'size')):
+        if blob.path in counts:
+            continue
+        if not dry_run:
+            # 条件删除：回收期间刚被再次上传的内容会更新 last_used_at，不会被删除
+            if not Blob.objects.filter(pk=blob.pk, last_used_at__lt=cutoff).delete()[0]:
+                continue
+            try:
+                os.remove(_absolute(blob.path))
+            except FileNotFoundError:
+                pass
+        deleted += 1
+        freed += blob.size
+
+    if not dry_run:
+        _cleanup_temp_files(grace_hours)
+    if deleted:
+        logger.info(f"回收无引用文件 {deleted} 个，释放 {freed} 字节")
+    return {'blobs': total, 'deleted': deleted, 'freed': freed}
+
+
+def _cleanup_temp_files(grace_hours):
+    """删除中断上传留下的临时文件"""
+    cutoff = time.time() - grace_hours * 3600
+    for entry in os.scandir(_temp_dir()):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
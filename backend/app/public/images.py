@@ -0,0 +1,251 @@
+# app/public/images.py
+"""
+图片缩略图与 WebP 版本
+
+封面、头像和建筑图片按配置的宽度生成缩小版本（原格式和 WebP 各一份），
+首次请求时生成并保存在 MEDIA_ROOT/CACHE_DIR 下，之后直接读取磁盘缓存。
+缓存文件路径为 <CACHE_DIR>/<版本名>/<原图路径>.<输出扩展名>，原图被替换后重新生成，
+原图被删除后由 cleanup_variants 清理。
+"""
+
+import logging
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.utils._os import safe_join
+from PIL import Image as PILImage, ImageOps
+
+from .blobs import is_blob
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可在 settings.IMAGE_VARIANTS 中覆盖
+DEFAULT_CONFIG = {
+    'URL_PREFIX': '/images/',          # 与 probject/urls.py 一致
+    'CACHE_DIR': 'derivatives',        # 生成的图片保存在 MEDIA_ROOT 下的该目录
+    'SIZES': {                         # 版本名 -> 最大宽度，每个尺寸另有 <版本名>_webp
+        'thumb': 320,
+        'medium': 960,
+    },
+    'WEBP': True,
+    'QUALITY': 82,
+    'WEBP_QUALITY': 80,
+    'MAX_PIXELS': 40_000_000,          # 超过该像素数的原图不处理，直接使用原图
+    'MAX_AGE': 3600 * 24,              # 非内容寻址的原图可能被覆盖，缓存时间较短
+    'IMMUTABLE_MAX_AGE': 3600 * 24 * 365,
+    # MEDIA_ROOT 下允许生成缩略图的目录
+    'DIRECTORIES': ['blobs/', 'articles/', 'avatars/', 'buildings/', 'builders/', 'images/'],
+}
+
+SOURCE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.tif', '.tiff'}
+
+# 输出格式 -> 扩展名；JPEG 和 WebP 保留原格式，其余格式的缩略图统一为 PNG
+OUTPUT_EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'IMAGE_VARIANTS', {}))
+    return config
+
+
+def variant_specs(config=None):
+    """所有版本：版本名 -> (最大宽度, 是否输出 WebP)"""
+    config = config or get_config()
+    specs = {}
+    for name, width in config['SIZES'].items():
+        specs[name] = (width, False)
+        if config['WEBP']:
+            specs[f'{name}_webp'] = (width, True)
+    return specs
+
+
+def source_path(name, config=None):
+    """
+    原图在 MEDIA_ROOT 中的绝对路径
+    只允许 DIRECTORIES 中的目录和常见位图扩展名，否则返回 None
+    """
+    config = config or get_config()
+    name = (name or '').replace('\\', '/')
+    if os.path.splitext(name)[1].lower() not in SOURCE_EXTENSIONS:
+        return None
+    if not any(name.startswith(directory) for directory in config['DIRECTORIES']):
+        return None
+    try:
+        return safe_join(settings.MEDIA_ROOT, name)
+    except Exception:
+        return None
+
+
+def _output_format(source_ext, webp):
+    if webp:
+        return 'WEBP'
+    if source_ext in ('.jpg', '.jpeg'):
+        return 'JPEG'
+    if source_ext == '.webp':
+        return 'WEBP'
+    return 'PNG'
+
+
+def cache_name(variant, name, config=None):
+    """缩略图相对于 MEDIA_ROOT 的路径，variant 不存在时返回 None"""
+    config = config or get_config()
+    spec = variant_specs(config).get(variant)
+    if spec is None:
+        return None
+    fmt = _output_format(os.path.splitext(name)[1].lower(), spec[1])
+    return f"{config['CACHE_DIR']}/{variant}/{name}{OUTPUT_EXTENSIONS[fmt]}"
+
+
+def render(path, width, fmt, config=None):
+    """把原图按最大宽度缩小（不放大）并编码为指定格式，返回 PIL 图像对象和保存参数"""
+    config = config or get_config()
+    image = PILImage.open(path)
+    if image.width * image.height > config['MAX_PIXELS']:
+        raise ValueError('图片尺寸过大')
+    image = ImageOps.exif_transpose(image)
+    if image.width > width:
+        image = image.resize((width, max(1, round(image.height * width / image.width))), PILImage.LANCZOS)
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if fmt == 'JPEG':
+        image = image.convert('RGB')
+        options = {'quality': config['QUALITY'], 'optimize': True, 'progressive': True}
+    elif fmt == 'WEBP':
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        options = {'quality': config['WEBP_QUALITY'], 'method': 4}
+    else:
+        if image.mode not in ('RGB', 'RGBA', 'L', 'LA', 'P'):
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        options = {'optimize': True}
+    return image, options
+
+
+def get_variant(variant, name):
+    """
+    返回缩略图的相对路径，缓存不存在或原图已更新时重新生成
+    版本名或原图无效时返回 None；原图无法处理时抛出异常
+    """
+    config = get_config()
+    spec = variant_specs(config).get(variant)
+    source = source_path(name, config)
+    if spec is None or source is None:
+        return None
+    try:
+        source_mtime = os.stat(source).st_mtime
+    except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+        return None
+
+    relative = cache_name(variant, name, config)
+    target = os.path.join(settings.MEDIA_ROOT, relative)
+    try:
+        if os.stat(target).st_mtime >= source_mtime:
+            return relative
+    except FileNotFoundError:
+        pass
+
+    width, webp = spec
+    fmt = _output_format(os.path.splitext(name)[1].lower(), webp)
+    started = time.monotonic()
+    image, options = render(source, width, fmt, config)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # 先写临时文件再替换，并发请求同一张图时不会读到写了一半的文件
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            image.save(out, fmt, **options)
+        os.chmod(temp_path, settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+        os.replace(temp_path, target)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    logger.debug(f"生成图片 {relative}，耗时 {(time.monotonic() - started) * 1000:.0f}ms")
+    return relative
+
+
+def generate_variants(name):
+    """生成一张图片的所有版本（用于预先生成），返回生成的相对路径列表"""
+    generated = []
+    for variant in variant_specs():
+        relative = get_variant(variant, name)
+        if relative:
+            generated.append(relative)
+    return generated
+
+
+def _media_url(name):
+    return f"{settings.URL_BASE}/{settings.MEDIA_URL.strip('/')}/{name}"
+
+
+def image_variants(name):
+    """
+    图片各版本的地址，供接口输出 srcset：
+    {'original': 原图, 'thumb': ..., 'medium': ..., 'thumb_webp': ..., 'medium_webp': ...,
+     'srcset': 'thumb 地址 320w, medium 地址 960w', 'srcset_webp': ...}
+    外部地址或无法处理的格式只返回 original
+    """
+    if not name:
+        return None
+    name = str(name)
+    if name.startswith(('http://', 'https://')):
+        return {'original': name}
+    config = get_config()
+    variants = {'original': _media_url(name)}
+    if source_path(name, config) is None:
+        return variants
+
+    prefix = f"{settings.URL_BASE}/{config['URL_PREFIX'].strip('/')}"
+    srcset = {False: [], True: []}
+    for variant, (width, webp) in variant_specs(config).items():
+        url = f'{prefix}/{variant}/{name}'
+        variants[variant] = url
+        srcset[webp].append(f'{url} {width}w')
+    variants['srcset'] = ', '.join(srcset[False])
+    if config['WEBP']:
+        variants['srcset_webp'] = ', '.join(srcset[True])
+    return variants
+
+
+def cache_control(name):
+    """内容寻址的原图不会变化，缩略图可以长期缓存"""
+    config = get_config()
+    if is_blob(name):
+        return f"public, max-age={config['IMMUTABLE_MAX_AGE']}, immutable"
+    return f"public, max-age={config['MAX_AGE']}"
+
+
+def cleanup_variants():
+    """删除原图已不存在或版本已从配置中移除的缩略图，返回删除的文件数"""
+    config = get_config()
+    root = os.path.join(settings.MEDIA_ROOT, config['CACHE_DIR'])
+    if not os.path.isdir(root):
+        return 0
+    specs = variant_specs(config)
+    removed = 0
+    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+        relative_dir = os.path.relpath(dirpath, root).replace(os.sep, '/')
+        variant, _, source_dir = relative_dir.partition('/')
+        for filename in filenames:
+            if filename.endswith('.part'):
+                # 正在写入的临时文件，超过一小时视为中断后遗留
+                path = os.path.join(dirpath, filename)
+                if os.path.getmtime(path) < time.time() - 3600:
+                    os.remove(path)
+                continue
+            # 缓存文件名为 原图文件名 + 输出扩展名
+            name = f'{source_dir}/{os.path.splitext(filename)[0]}'
+            source = source_path(name, config) if variant in specs else None
+            if source is None or not os.path.exists(source):
+                try:
+                    os.remove(os.path.join(dirpath, filename))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        if dirpath != root and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+    if removed:
+        logger.info(f"清理无效的图片缩略图 {removed} 个")
+    return removed
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from app.public.blobs import collect_garbage
+
+
+class Command(BaseCommand):
+    help = '统计上传文件的引用并回收无引用的文件'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=None, help='无引用文件的保留时间（小时），默认读取配置')
+        parser.add_argument('--dry-run', action='store_true', help='只统计，不删除文件')
+
+    def handle(self, *args, **options):
+        result = collect_garbage(grace_hours=options['grace_hours'], dry_run=options['dry_run'])
+        action = '可回收' if options['dry_run'] else '已回收'
+        self.stdout.write(self.style.SUCCESS(
+            f"共 {result['blobs']} 个文件，{action} {result['deleted']} 个，"
+            f"释放 {result['freed'] / 1024 / 1024:.1f} MB"
+        ))
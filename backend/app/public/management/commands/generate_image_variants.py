@@ -0,0 +1,41 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from app.public.images import cleanup_variants, generate_variants, source_path
+
+# 保存图片路径的字段："应用.模型.字段"
+IMAGE_FIELDS = [
+    'article.Article.cover_image',
+    'builder.Builder.image',
+    'user.CustomUser.avatar',
+    'public.Image.file',
+]
+
+
+class Command(BaseCommand):
+    help = '预先生成已有图片的缩略图和 WebP 版本（否则在首次请求时生成）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cleanup', action='store_true', help='同时清理原图已不存在的缩略图')
+
+    def handle(self, *args, **options):
+        names = set()
+        for label in IMAGE_FIELDS:
+            app_label, model_name, field = label.split('.')
+            model = apps.get_model(app_label, model_name)
+            values = model._default_manager.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            names.update(str(value) for value in values.values_list(field, flat=True).iterator())
+
+        generated = failed = 0
+        for name in sorted(names):
+            if source_path(name) is None:
+                continue
+            try:
+                generated += len(generate_variants(name))
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f'{name}: {e}')
+
+        if options['cleanup']:
+            self.stdout.write(f'清理缩略图 {cleanup_variants()} 个')
+        self.stdout.write(self.style.SUCCESS(f'共 {len(names)} 张图片，生成或确认 {generated} 个版本，失败 {failed} 张'))
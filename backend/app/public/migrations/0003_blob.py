@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public', '0002_alter_image_description_alter_image_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True, verbose_name='SHA-256 摘要')),
+                ('path', models.CharField(help_text='相对于 MEDIA_ROOT 的路径', max_length=255, verbose_name='存储路径')),
+                ('size', models.BigIntegerField(verbose_name='文件大小')),
+                ('reference_count', models.PositiveIntegerField(default=0, help_text='最近一次垃圾回收时统计的引用次数', verbose_name='引用次数')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True, help_text='最近一次上传该内容的时间，回收时保留宽限期内使用过的文件', verbose_name='最后使用时间')),
+            ],
+            options={
+                'verbose_name': '文件内容',
+                'verbose_name_plural': '文件内容',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public', '0003_blob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['created_at', 'id'], name='public_imag_created_bbc715_idx'),
+        ),
+    ]
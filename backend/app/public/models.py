@@ -1,3 +1,6 @@
+import os
+
+from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from app.user.models import CustomUser
@@ -59,21 +62,79 @@ class Image(models.Model):
         verbose_name = _("图片")
         verbose_name_plural = _("图片")
         ordering = ['-created_at']
+        indexes = [
+            # 图片列表按 (created_at, id) 键集分页
+            models.Index(fields=['created_at', 'id']),
+        ]
 
     def __str__(self):
         """返回图片对象的字符串表示"""
         return self.name or f"Image_{self.id}"
 
+    @property
+    def url(self):
+        """返回图片的访问地址（file 保存的是相对于 MEDIA_ROOT 的路径）"""
+        if self.file:
+            return f"{settings.URL_BASE}/{settings.MEDIA_URL.strip('/')}/{self.file}"
+        return ''
+
     @property
     def file_size(self):
-        """返回文件大小"""
+        """返回文件大小，文件不存在时为 0"""
         if self.file:
-            return self.file.size
+            try:
+                return os.path.getsize(os.path.join(settings.MEDIA_ROOT, self.file))
+            except OSError:
+                pass
         return 0
 
     @property
     def file_extension(self):
         """返回文件扩展名"""
         if self.file:
-            return self.file.name.split('.')[-1].lower()
-        return ''
\ No newline at end of file
+            return self.file.split('.')[-1].lower()
+        return ''
+
+class Blob(models.Model):
+    """按内容寻址存储的文件，相同内容只保存一份，见 app/public/blobs.py"""
+
+    digest = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name=_("SHA-256 摘要")
+    )
+
+    path = models.CharField(
+        max_length=255,
+        verbose_name=_("存储路径"),
+        help_text=_("相对于 MEDIA_ROOT 的路径")
+    )
+
+    size = models.BigIntegerField(
+        verbose_name=_("文件大小")
+    )
+
+    reference_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("引用次数"),
+        help_text=_("最近一次垃圾回收时统计的引用次数")
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_("创建时间")
+    )
+
+    last_used_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name=_("最后使用时间"),
+        help_text=_("最近一次上传该内容的时间，回收时保留宽限期内使用过的文件")
+    )
+
+    class Meta:
+        verbose_name = _("文件内容")
+        verbose_name_plural = _("文件内容")
+
+    def __str__(self):
+        return self.path
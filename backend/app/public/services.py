@@ -1,13 +1,11 @@
 import os
 from typing import Optional, List
-from datetime import datetime
 from django.core.files.uploadedfile import UploadedFile
 from django.core.exceptions import ValidationError
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 from PIL import Image as PILImage
 from io import BytesIO
 
+from .blobs import store
 from .models import Image
 
 
@@ -32,8 +30,7 @@ class ImageService:
         try:
             self._validate_image(file)
             filename = file.name
-            file_path = f'images/{datetime.now().strftime("%Y/%m")}/{filename}'
-            path = default_storage.save(file_path, ContentFile(file.read()))
+            path = store(file)
 
             image = Image.objects.create(
                 file=path,
@@ -44,6 +41,5 @@ class ImageService:
             )
             return image
         except Exception as e:
-            if 'path' in locals():
-                default_storage.delete(path)
+            # 文件可能与其他记录共享，未被引用时由垃圾回收删除
             raise Exception(f"创建图片记录失败: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,18 @@
+# app/public/tasks.py
+
+from .blobs import collect_garbage
+from .images import cleanup_variants
+
+
+def collect_orphan_blobs():
+    """
+    回收不再被任何建筑、文章、图片或头像引用的文件
+    """
+    return collect_garbage()
+
+
+def cleanup_image_variants():
+    """
+    删除原图已被回收的图片缩略图
+    """
+    return cleanup_variants()
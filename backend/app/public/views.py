@@ -1,13 +1,23 @@
+import logging
+
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from django.core.paginator import Paginator
+from django.conf import settings
+from django.http import HttpResponseNotFound, HttpResponseRedirect
+from django.views.decorators.http import require_safe
+from django.views.static import serve
 
 from app.user.decorators import jwt_required
+from probject.pagination import InvalidCursor, KeysetPagination
+from .images import cache_control, get_variant, image_variants, source_path
 from .models import Image
 from .services import ImageService
 
+logger = logging.getLogger(__name__)
+
 image_service = ImageService()
 
 @api_view(['POST'])
@@ -44,7 +54,8 @@ def upload_image(request):
             "data": {
                 "id": image.id,
                 "name": image.name,
-                "url": image.file.url,
+                "url": image.url,
+                "variants": image_variants(image.file),
                 "type": image.image_type,
                 "description": image.description,
                 "created_at": image.created_at.strftime("%Y-%m-%d %H:%M:%S")
@@ -64,6 +75,7 @@ def get_image_list(request):
     请求参数：
     - page: 页码（默认1）
     - page_size: 每页数量（默认20）
+    - cursor / limit: 按上传时间键集分页，cursor 取自上一页的 next_cursor（传入时忽略 page）
     - type: 图片类型（可选）
     - creator_id: 创建者ID（可选）
     """
@@ -80,9 +92,15 @@ def get_image_list(request):
         if creator_id:
             query = query.filter(creator_id=creator_id)
 
-        # 分页
-        paginator = Paginator(query, page_size)
-        images = paginator.page(page)
+        # 分页：带 cursor 或 limit 参数时按 (created_at, id) 键集分页，不统计总数
+        if KeysetPagination.requested(request):
+            paginator = KeysetPagination(page_size=page_size)
+            images = paginator.paginate_queryset(query, request)
+            pagination = paginator.get_pagination_data()
+        else:
+            paginator = Paginator(query, page_size)
+            images = paginator.page(page)
+            pagination = {"total": paginator.count, "page": page, "page_size": page_size}
 
         # 构建响应数据
         image_list = []
@@ -90,7 +108,8 @@ def get_image_list(request):
             image_list.append({
                 "id": image.id,
                 "name": image.name,
-                "url": image.file.url,
+                "url": image.url,
+                "variants": image_variants(image.file),
                 "type": image.image_type,
                 "description": image.description,
                 "created_at": image.created_at.strftime("%Y-%m-%d %H:%M:%S"),
@@ -104,12 +123,15 @@ def get_image_list(request):
             "code": 200,
             "message": "获取成功",
             "data": {
-                "total": paginator.count,
-                "page": page,
-                "page_size": page_size,
+                **pagination,
                 "images": image_list
             }
         })
+    except InvalidCursor as e:
+        return Response({
+            "code": 400,
+            "message": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             "code": 500,
@@ -134,7 +156,8 @@ def get_image_detail(request, image_id):
             "data": {
                 "id": image.id,
                 "name": image.name,
-                "url": image.file.url,
+                "url": image.url,
+                "variants": image_variants(image.file),
                 "type": image.image_type,
                 "description": image.description,
                 "created_at": image.created_at.strftime("%Y-%m-%d %H:%M:%S"),
@@ -238,7 +261,8 @@ def get_user_type_image(request, user_id, image_type):
             "message": "获取成功",
             "data": {
                 "id": image.id,
-                "url": image.file.url,
+                "url": image.url,
+                "variants": image_variants(image.file),
                 "created_at": image.created_at.strftime("%Y-%m-%d %H:%M:%S")
             }
         })
@@ -246,4 +270,24 @@ def get_user_type_image(request, user_id, image_type):
         return Response({
             "code": 500,
             "message": f"获取失败: {str(e)}"
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@require_safe
+def serve_image_variant(request, variant, name):
+    """
+    提供图片的缩略图或 WebP 版本，首次请求时生成并缓存到磁盘
+    支持 If-Modified-Since；原图无法处理时重定向到原图
+    """
+    if source_path(name) is None:
+        return HttpResponseNotFound('图片不存在')
+    try:
+        relative = get_variant(variant, name)
+    except Exception as e:
+        logger.warning(f"生成图片 {variant}/{name} 失败: {e}")
+        return HttpResponseRedirect(f"{settings.MEDIA_URL.rstrip('/')}/{name}")
+    if relative is None:
+        return HttpResponseNotFound('图片不存在')
+    response = serve(request, relative, document_root=settings.MEDIA_ROOT)
+    response['Cache-Control'] = cache_control(name)
+    return response
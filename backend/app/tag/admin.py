@@ -0,0 +1,10 @@
+# admin.py
+from django.contrib import admin
+from .models import Tag
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ['name', 'builder_count', 'article_count', 'created_at']
+    search_fields = ['name']
+    readonly_fields = ['builder_count', 'article_count', 'created_at']
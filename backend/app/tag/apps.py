@@ -0,0 +1,14 @@
+from app.apps import AppConfig
+
+
+# app/tag/apps.py
+
+
+class TagConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'app.tag'
+    verbose_name = '标签管理'
+
+    def ready(self):
+        # 注册标签同步信号
+        from . import signals  # noqa: F401
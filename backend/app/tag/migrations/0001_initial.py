@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('builder', '0002_alter_builder_options_remove_builder_image_id_and_more'),
+        ('article', '0005_article_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='标签名')),
+                ('builder_count', models.PositiveIntegerField(default=0, verbose_name='建筑数')),
+                ('article_count', models.PositiveIntegerField(default=0, verbose_name='已发布文章数')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '标签',
+                'verbose_name_plural': '标签',
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['-builder_count'], name='tag_tag_builder_c01df4_idx'), models.Index(fields=['-article_count'], name='tag_tag_article_fa8535_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BuilderTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('builder', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='builder.builder', verbose_name='建筑')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='builder_links', to='tag.tag', verbose_name='标签')),
+            ],
+            options={
+                'verbose_name': '建筑标签',
+                'verbose_name_plural': '建筑标签',
+                'indexes': [models.Index(fields=['tag', 'builder'], name='tag_builder_tag_id_1e475c_idx')],
+                'unique_together': {('builder', 'tag')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ArticleTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='article.article', verbose_name='文章')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='article_links', to='tag.tag', verbose_name='标签')),
+            ],
+            options={
+                'verbose_name': '文章标签',
+                'verbose_name_plural': '文章标签',
+                'indexes': [models.Index(fields=['tag', 'article'], name='tag_article_tag_id_c13134_idx')],
+                'unique_together': {('article', 'tag')},
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+# 从 Builder.tags / Article.tags 字符串回填标签表和关联表，并计算标签计数
+# 标签解析规则是创建时的副本，不引用 app.tag.services，之后修改服务代码不会改变迁移的行为
+
+from django.db import migrations
+from django.db.models import Count, Q
+
+TAG_NAME_MAX_LENGTH = 100
+
+
+def parse_tags(value):
+    # 逗号（含全角逗号）分隔，去空白、截断、去重并保持原顺序
+    names = []
+    for name in (value or '').replace('\uff0c', ',').split(','):
+        name = name.strip()[:TAG_NAME_MAX_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def backfill_tags(apps, schema_editor):
+    Tag = apps.get_model('tag', 'Tag')
+    BuilderTag = apps.get_model('tag', 'BuilderTag')
+    ArticleTag = apps.get_model('tag', 'ArticleTag')
+    Builder = apps.get_model('builder', 'Builder')
+    Article = apps.get_model('article', 'Article')
+
+    builder_names = {
+        pk: parse_tags(tags) for pk, tags in Builder.objects.exclude(tags__isnull=True).values_list('id', 'tags')
+    }
+    article_names = {
+        pk: parse_tags(tags) for pk, tags in Article.objects.exclude(tags__isnull=True).values_list('id', 'tags')
+    }
+
+    all_names = set()
+    for names in list(builder_names.values()) + list(article_names.values()):
+        all_names.update(names)
+    Tag.objects.bulk_create([Tag(name=name) for name in sorted(all_names)], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.values_list('name', 'id'))
+
+    BuilderTag.objects.bulk_create([
+        BuilderTag(builder_id=pk, tag_id=tag_ids[name])
+        for pk, names in builder_names.items() for name in names
+    ], batch_size=500, ignore_conflicts=True)
+    ArticleTag.objects.bulk_create([
+        ArticleTag(article_id=pk, tag_id=tag_ids[name])
+        for pk, names in article_names.items() for name in names
+    ], batch_size=500, ignore_conflicts=True)
+
+    for tag in Tag.objects.annotate(
+        builders=Count('builder_links', distinct=True),
+        articles=Count('article_links', filter=Q(article_links__article__status='published'), distinct=True),
+    ):
+        Tag.objects.filter(pk=tag.pk).update(builder_count=tag.builders, article_count=tag.articles)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tag', '0001_initial'),
+        ('builder', '0002_alter_builder_options_remove_builder_image_id_and_more'),
+        ('article', '0005_article_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
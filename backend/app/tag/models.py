@@ -0,0 +1,54 @@
+# app/tag/models.py
+
+from django.db import models
+
+from app.article.models import Article
+from app.builder.models import Builder
+
+
+class Tag(models.Model):
+    """标签，建筑和文章共用；计数随关联变化增量维护"""
+    name = models.CharField(max_length=100, unique=True, verbose_name='标签名')
+    builder_count = models.PositiveIntegerField(default=0, verbose_name='建筑数')
+    article_count = models.PositiveIntegerField(default=0, verbose_name='已发布文章数')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+
+    class Meta:
+        verbose_name = '标签'
+        verbose_name_plural = '标签'
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['-builder_count']),
+            models.Index(fields=['-article_count']),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class BuilderTag(models.Model):
+    """建筑与标签的关联"""
+    builder = models.ForeignKey(Builder, on_delete=models.CASCADE, related_name='tag_links', verbose_name='建筑')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='builder_links', verbose_name='标签')
+
+    class Meta:
+        verbose_name = '建筑标签'
+        verbose_name_plural = '建筑标签'
+        unique_together = ['builder', 'tag']
+        indexes = [
+            models.Index(fields=['tag', 'builder']),
+        ]
+
+
+class ArticleTag(models.Model):
+    """文章与标签的关联"""
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='tag_links', verbose_name='文章')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='article_links', verbose_name='标签')
+
+    class Meta:
+        verbose_name = '文章标签'
+        verbose_name_plural = '文章标签'
+        unique_together = ['article', 'tag']
+        indexes = [
+            models.Index(fields=['tag', 'article']),
+        ]
@@ -0,0 +1,122 @@
+# app/tag/services.py
+
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Tag, BuilderTag, ArticleTag
+
+TAG_NAME_MAX_LENGTH = 100
+
+
+def parse_tags(value):
+    """把逗号分隔的标签字符串解析为去重后的标签名列表（保持原顺序）"""
+    names = []
+    for name in (value or '').replace('，', ',').split(','):
+        name = name.strip()[:TAG_NAME_MAX_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def get_or_create_tags(names):
+    """批量获取或创建标签，返回 {标签名: Tag}"""
+    if not names:
+        return {}
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in tags]
+    if missing:
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        tags.update({tag.name: tag for tag in Tag.objects.filter(name__in=missing)})
+    return tags
+
+
+def _count_subquery(link_model, **filters):
+    counts = link_model.objects.filter(tag=OuterRef('pk'), **filters).values('tag').annotate(
+        total=Count('id')
+    ).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def refresh_tag_counts(tag_ids=None):
+    """
+    重新计算指定标签的建筑数和已发布文章数（走关联表索引，只更新受影响的标签）
+    tag_ids 为 None 时更新全部标签
+    """
+    queryset = Tag.objects.all()
+    if tag_ids is not None:
+        tag_ids = list(tag_ids)
+        if not tag_ids:
+            return 0
+        queryset = queryset.filter(id__in=tag_ids)
+    return queryset.update(
+        builder_count=_count_subquery(BuilderTag),
+        article_count=_count_subquery(ArticleTag, article__status='published'),
+    )
+
+
+def _sync_links(link_model, owner_field, owner_id, names):
+    """让关联表与标签名列表一致，返回受影响的标签 id 集合"""
+    tags = get_or_create_tags(names)
+    wanted = {tag.id for tag in tags.values()}
+    current = set(link_model.objects.filter(**{owner_field: owner_id}).values_list('tag_id', flat=True))
+
+    removed = current - wanted
+    added = wanted - current
+    if removed:
+        link_model.objects.filter(**{owner_field: owner_id, 'tag_id__in': removed}).delete()
+    if added:
+        link_model.objects.bulk_create(
+            [link_model(**{owner_field: owner_id, 'tag_id': tag_id}) for tag_id in added],
+            ignore_conflicts=True
+        )
+    return current | wanted
+
+
+@transaction.atomic
+def sync_builder_tags(builder):
+    """根据 Builder.tags 同步建筑标签关联并更新计数"""
+    tag_ids = _sync_links(BuilderTag, 'builder_id', builder.pk, parse_tags(builder.tags))
+    refresh_tag_counts(tag_ids)
+
+
+@transaction.atomic
+def sync_article_tags(article):
+    """根据 Article.tags 同步文章标签关联并更新计数（文章状态变化也会影响计数）"""
+    tag_ids = _sync_links(ArticleTag, 'article_id', article.pk, parse_tags(article.tags))
+    refresh_tag_counts(tag_ids)
+
+
+def filter_builders_by_tags(queryset, names):
+    """筛选带有任一指定标签的建筑"""
+    names = [name.strip() for name in names if name and name.strip()]
+    if not names:
+        return queryset
+    return queryset.filter(id__in=BuilderTag.objects.filter(tag__name__in=names).values('builder_id'))
+
+
+def filter_articles_by_tags(queryset, names):
+    """筛选带有任一指定标签的文章"""
+    names = [name.strip() for name in names if name and name.strip()]
+    if not names:
+        return queryset
+    return queryset.filter(id__in=ArticleTag.objects.filter(tag__name__in=names).values('article_id'))
+
+
+def builder_tag_names(builders=None):
+    """
+    获取建筑标签名列表，按使用次数倒序
+    指定 builders 查询集时只返回这些建筑用到的标签
+    """
+    if builders is None:
+        queryset = Tag.objects.filter(builder_count__gt=0)
+    else:
+        queryset = Tag.objects.filter(
+            id__in=BuilderTag.objects.filter(builder__in=builders).values('tag_id')
+        )
+    return list(queryset.order_by('-builder_count', 'name').values_list('name', flat=True))
+
+
+def article_tag_names():
+    """获取已发布文章用到的标签名列表"""
+    return list(Tag.objects.filter(article_count__gt=0).order_by('name').values_list('name', flat=True))
@@ -0,0 +1,37 @@
+# app/tag/signals.py
+
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from app.article.models import Article
+from app.builder.models import Builder
+from .models import BuilderTag, ArticleTag
+from .services import sync_builder_tags, sync_article_tags, refresh_tag_counts
+
+
+# 标签字符串变化时同步关联表
+@receiver(post_save, sender=Builder)
+def sync_builder_tag_links(sender, instance, **kwargs):
+    sync_builder_tags(instance)
+
+
+@receiver(post_save, sender=Article)
+def sync_article_tag_links(sender, instance, **kwargs):
+    sync_article_tags(instance)
+
+
+# 删除前记下关联的标签，删除后（关联已级联删除）重新计数
+@receiver(pre_delete, sender=Builder)
+def remember_builder_tags(sender, instance, **kwargs):
+    instance._tag_ids = list(BuilderTag.objects.filter(builder=instance).values_list('tag_id', flat=True))
+
+
+@receiver(pre_delete, sender=Article)
+def remember_article_tags(sender, instance, **kwargs):
+    instance._tag_ids = list(ArticleTag.objects.filter(article=instance).values_list('tag_id', flat=True))
+
+
+@receiver(post_delete, sender=Builder)
+@receiver(post_delete, sender=Article)
+def refresh_deleted_tag_counts(sender, instance, **kwargs):
+    refresh_tag_counts(getattr(instance, '_tag_ids', []))
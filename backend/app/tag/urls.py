@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('cloud/', views.get_tag_cloud, name='get_tag_cloud'),  # GET 标签云
+]
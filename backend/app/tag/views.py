@@ -0,0 +1,24 @@
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from .models import Tag
+
+
+@api_view(['GET'])
+def get_tag_cloud(request):
+    """
+    获取标签云（带使用次数）
+    type=builder 按建筑数排序，type=article 按已发布文章数排序，默认 builder
+    """
+    tag_type = request.GET.get('type', 'builder')
+    count_field = 'article_count' if tag_type == 'article' else 'builder_count'
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 50)), 500))
+    except ValueError:
+        limit = 50
+
+    tags = Tag.objects.filter(**{f'{count_field}__gt': 0}).order_by(f'-{count_field}', 'name')[:limit]
+    return Response({
+        "code": 200,
+        "data": list(tags.values('id', 'name', 'builder_count', 'article_count'))
+    })
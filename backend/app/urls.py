@@ -7,6 +7,7 @@ urlpatterns = [
     path('comment/', include('app.comment.urls')),
     path('analytics/', include('app.analytics.urls')),
     path('public/', include('app.public.urls')),
+    path('tag/', include('app.tag.urls')),
          
 
 
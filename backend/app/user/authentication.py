@@ -0,0 +1,206 @@
+# app/user/authentication.py
+
+import copy
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+logger = logging.getLogger(__name__)
+
+# 解析结果在请求对象上的缓存属性名
+_RESOLVED_ATTR = '_resolved_auth_user'
+
+# 默认配置，可在 settings.AUTH_USER_CACHE 中覆盖
+DEFAULT_USER_CACHE = {
+    'ENABLED': True,
+    'TIMEOUT': 300,         # Redis 中缓存用户对象的时间（秒）
+    'LOCAL_TIMEOUT': 30,    # 进程内缓存时间（秒）
+    'LOCAL_MAX_SIZE': 1000, # 进程内最多缓存的用户数
+}
+
+
+class TokenRevoked(AuthenticationFailed):
+    """令牌已在黑名单中"""
+    default_detail = '令牌已失效'
+    default_code = 'token_revoked'
+
+
+def get_user_cache_config():
+    config = dict(DEFAULT_USER_CACHE)
+    config.update(getattr(settings, 'AUTH_USER_CACHE', {}))
+    return config
+
+
+def _version_key(user_id):
+    return f'auth:user:{user_id}:version'
+
+
+def _user_key(user_id, version):
+    return f'auth:user:{user_id}:{version}'
+
+
+class _LocalUserCache:
+    """进程内用户缓存，条目带版本号，版本不一致或过期即视为未命中"""
+
+    def __init__(self):
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is None:
+                return None
+            item_version, expires_at, user = item
+            if item_version != version or expires_at < time.monotonic():
+                del self._items[user_id]
+                return None
+            return user
+
+    def set(self, user_id, version, user, timeout, max_size):
+        with self._lock:
+            self._items[user_id] = (version, time.monotonic() + timeout, user)
+            self._items.move_to_end(user_id)
+            while len(self._items) > max_size:
+                self._items.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._items.pop(user_id, None)
+
+
+_local_users = _LocalUserCache()
+
+
+def invalidate_cached_user(user_id):
+    """
+    使用户的认证缓存失效，由用户模型的 post_save/post_delete 信号调用（见 signals.py）
+    写入新的版本号，各进程在下次请求时都会重新加载用户
+    """
+    _local_users.discard(user_id)
+    try:
+        cache.set(_version_key(user_id), uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.warning(f"更新用户缓存版本失败: {e}")
+
+
+def _load_user(user_id):
+    User = get_user_model()
+    try:
+        return User.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+    except User.DoesNotExist:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+
+def get_cached_user(user_id, version=None):
+    """
+    按用户 id 和缓存版本获取用户，依次查进程内缓存、Redis、数据库
+    返回副本，视图直接修改 request.auth_user 时不会污染缓存中的对象
+    """
+    config = get_user_cache_config()
+    if version is None:
+        try:
+            version = cache.get(_version_key(user_id), '0')
+        except Exception as e:
+            logger.warning(f"读取用户缓存版本失败: {e}")
+            return _load_user(user_id)
+
+    user = _local_users.get(user_id, version)
+    if user is None:
+        user_key = _user_key(user_id, version)
+        try:
+            user = cache.get(user_key)
+        except Exception as e:
+            logger.warning(f"读取用户缓存失败: {e}")
+            user = None
+        if user is None:
+            user = _load_user(user_id)
+            try:
+                cache.set(user_key, user, config['TIMEOUT'])
+            except Exception as e:
+                logger.warning(f"写入用户缓存失败: {e}")
+        _local_users.set(user_id, version, user, config['LOCAL_TIMEOUT'], config['LOCAL_MAX_SIZE'])
+    return copy.copy(user)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """用户对象走认证缓存的 JWTAuthentication，校验规则与 simplejwt 一致"""
+
+    def get_user(self, validated_token, version=None):
+        if not get_user_cache_config()['ENABLED']:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_cached_user(user_id, version)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+def authenticate_token(token):
+    """
+    验证 access token 并返回对应用户（jwt_required 使用）
+    黑名单和用户缓存版本在一次 Redis 往返中读取；
+    令牌在黑名单中时抛出 TokenRevoked，令牌无效或用户不可用时抛出 InvalidToken / AuthenticationFailed
+    """
+    auth = CachedJWTAuthentication()
+    validated_token = auth.get_validated_token(token)
+
+    blacklist_key = f'blacklist:{token}'
+    user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+    version_key = _version_key(user_id)
+    values = cache.get_many([blacklist_key, version_key])
+    if values.get(blacklist_key):
+        raise TokenRevoked()
+
+    return auth.get_user(validated_token, version=values.get(version_key, '0'))
+
+
+def resolve_request_user(request):
+    """
+    获取当前请求的登录用户（可选认证，失败时返回 None）
+    已经过 jwt_required 的请求直接使用 request.auth_user；
+    否则解析 Bearer 令牌，结果缓存在请求对象上，同一请求只验证一次
+    """
+    if request is None:
+        return None
+
+    user = getattr(request, 'auth_user', None)
+    if user is not None:
+        return user
+
+    if hasattr(request, _RESOLVED_ATTR):
+        return getattr(request, _RESOLVED_ATTR)
+
+    user = None
+    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+    if auth_header.startswith('Bearer '):
+        token = auth_header.split(' ')[1]
+        try:
+            user = authenticate_token(token)
+        except Exception:
+            user = None
+
+    setattr(request, _RESOLVED_ATTR, user)
+    return user
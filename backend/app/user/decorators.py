@@ -1,10 +1,10 @@
 # decorators.py
 from functools import wraps
 from django.http import JsonResponse
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
 from probject.status_code import UNAUTHORIZED, FORBIDDEN, STATUS_MESSAGES
-from django.core.cache import cache
+from app.user.authentication import authenticate_token, TokenRevoked
+from app.user.sessions import touch_session
 
 def jwt_required(func):
     """JWT认证注解"""
@@ -23,22 +23,22 @@ def jwt_required(func):
         try:
             token = auth_header.split(' ')[1]
 
-            # 检查黑名单
-            if cache.get(f'blacklist:{token}'):
-                return JsonResponse({
-                    'code': UNAUTHORIZED,
-                    'message': '令牌已失效'
-                }, status=UNAUTHORIZED)
-
-            # JWT验证
-            auth = JWTAuthentication()
-            validated_token = auth.get_validated_token(token)
-            user = auth.get_user(validated_token)
+            # JWT验证（黑名单检查、用户缓存）
+            user = authenticate_token(token)
 
             # 将用户和令牌附加到请求对象
             request.auth_user = user
             request.auth_token = token
 
+            # 刷新设备会话的最后活跃时间（节流）
+            touch_session(user.id, request.META.get('HTTP_X_DEVICE_ID', 'default'))
+
+        except TokenRevoked:
+            return JsonResponse({
+                'code': UNAUTHORIZED,
+                'message': '令牌已失效'
+            }, status=UNAUTHORIZED)
+
         except (InvalidToken, AuthenticationFailed) as e:
             return JsonResponse({
                 'code': UNAUTHORIZED,
@@ -41,6 +41,11 @@ class CustomUser(AbstractUser):
             return self.avatar
         return f"{settings.URL_BASE}/media/{self.avatar}"
 
+    def get_avatar_variants(self):
+        """获取头像各尺寸版本的URL（srcset），外部头像只返回原地址"""
+        from app.public.images import image_variants
+        return image_variants(self.avatar)
+
     class Meta:
         verbose_name = '用户'
         verbose_name_plural = '用户'
\ No newline at end of file
@@ -0,0 +1,189 @@
+# app/user/sessions.py
+
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import AccessToken
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可在 settings.USER_SESSIONS 中覆盖
+DEFAULT_CONFIG = {
+    'TTL': 3600 * 24 * 30,  # 会话在没有活动后保留的时间（秒），与 access token 有效期一致
+    'TOUCH_INTERVAL': 60,   # 同一设备两次刷新最后活跃时间的最小间隔（秒）
+}
+
+# 进程内记录最近一次刷新活跃时间，避免每个请求都写 Redis
+_last_touch = {}
+_touch_lock = threading.Lock()
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'USER_SESSIONS', {}))
+    return config
+
+
+def _client():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _index_key(user_id):
+    """有序集合：成员为设备ID，分数为最后活跃时间"""
+    return f'sessions:{user_id}'
+
+
+def _data_key(user_id):
+    """哈希：设备ID -> 会话信息（令牌、登录时间、IP、UA）"""
+    return f'sessions:{user_id}:data'
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _prune(client, user_id, now, ttl):
+    """删除超过 TTL 未活跃的会话，只涉及该用户自己的键"""
+    stale = client.zrangebyscore(_index_key(user_id), '-inf', now - ttl)
+    if stale:
+        pipe = client.pipeline()
+        pipe.zrem(_index_key(user_id), *stale)
+        pipe.hdel(_data_key(user_id), *stale)
+        pipe.execute()
+    return stale
+
+
+def register_session(user_id, device_id, token, request=None):
+    """登录时登记设备会话，同一设备重复登录时覆盖原记录"""
+    config = get_config()
+    now = time.time()
+    try:
+        expires_at = AccessToken(token)['exp']
+    except Exception:
+        expires_at = now + config['TTL']
+    data = {
+        'token': token,
+        'created_at': now,
+        'expires_at': expires_at,
+        'ip_address': request.META.get('REMOTE_ADDR') if request else None,
+        'user_agent': request.META.get('HTTP_USER_AGENT', '')[:255] if request else '',
+    }
+    try:
+        client = _client()
+        pipe = client.pipeline()
+        pipe.zadd(_index_key(user_id), {device_id: now})
+        pipe.hset(_data_key(user_id), device_id, json.dumps(data))
+        pipe.expire(_index_key(user_id), config['TTL'])
+        pipe.expire(_data_key(user_id), config['TTL'])
+        pipe.execute()
+        _prune(client, user_id, now, config['TTL'])
+    except Exception as e:
+        logger.warning(f"登记用户 {user_id} 会话失败: {e}")
+
+
+def touch_session(user_id, device_id):
+    """刷新设备的最后活跃时间（按 TOUCH_INTERVAL 节流，只更新已登记的会话）"""
+    config = get_config()
+    now = time.time()
+    key = (user_id, device_id)
+    with _touch_lock:
+        if now - _last_touch.get(key, 0) < config['TOUCH_INTERVAL']:
+            return
+        _last_touch[key] = now
+        if len(_last_touch) > 10000:
+            _last_touch.clear()
+    try:
+        pipe = _client().pipeline()
+        pipe.zadd(_index_key(user_id), {device_id: now}, xx=True)
+        pipe.expire(_index_key(user_id), config['TTL'])
+        pipe.expire(_data_key(user_id), config['TTL'])
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"刷新用户 {user_id} 会话活跃时间失败: {e}")
+
+
+def list_sessions(user_id, current_token=None):
+    """按最后活跃时间倒序返回用户的会话列表，current_token 对应的会话标记为当前会话"""
+    config = get_config()
+    try:
+        client = _client()
+        _prune(client, user_id, time.time(), config['TTL'])
+        entries = client.zrevrange(_index_key(user_id), 0, -1, withscores=True)
+        devices = [_decode(device_id) for device_id, _ in entries]
+        values = client.hmget(_data_key(user_id), devices) if devices else []
+    except Exception as e:
+        logger.warning(f"读取用户 {user_id} 会话失败: {e}")
+        return []
+
+    sessions = []
+    for device_id, (_, last_active), value in zip(devices, entries, values):
+        data = json.loads(_decode(value)) if value else {}
+        sessions.append({
+            'device_id': device_id,
+            'last_active': last_active,
+            'created_at': data.get('created_at'),
+            'ip_address': data.get('ip_address'),
+            'user_agent': data.get('user_agent'),
+            'is_current': current_token is not None and data.get('token') == current_token,
+        })
+    return sessions
+
+
+def _blacklist(sessions, now):
+    """把会话令牌加入黑名单，保留到令牌过期后 60 秒"""
+    for data in sessions:
+        token = data.get('token')
+        if not token:
+            continue
+        timeout = max(int(data.get('expires_at', now) - now), 0) + 60
+        cache.set(f'blacklist:{token}', '1', timeout=timeout)
+
+
+def _remove(user_id, device_ids):
+    """从会话登记中移除设备，返回 (移除的数量, 被移除会话的信息列表)"""
+    pipe = _client().pipeline()
+    pipe.hmget(_data_key(user_id), device_ids)
+    pipe.zrem(_index_key(user_id), *device_ids)
+    pipe.hdel(_data_key(user_id), *device_ids)
+    values, removed, _ = pipe.execute()
+    return removed, [json.loads(_decode(value)) for value in values if value]
+
+
+def remove_session(user_id, device_id):
+    """从会话登记中移除设备（令牌由调用方处理），返回是否存在"""
+    try:
+        return bool(_remove(user_id, [device_id])[0])
+    except Exception as e:
+        logger.warning(f"移除用户 {user_id} 会话失败: {e}")
+        return False
+
+
+def revoke_session(user_id, device_id):
+    """撤销指定设备的会话并使其令牌失效，返回是否存在"""
+    try:
+        removed, sessions = _remove(user_id, [device_id])
+    except Exception as e:
+        logger.warning(f"撤销用户 {user_id} 会话失败: {e}")
+        return False
+    _blacklist(sessions, time.time())
+    return bool(removed)
+
+
+def revoke_all_sessions(user_id, except_device=None):
+    """撤销用户的所有会话（可保留当前设备），返回撤销的会话数"""
+    try:
+        devices = {_decode(device_id) for device_id in _client().zrange(_index_key(user_id), 0, -1)}
+        devices.discard(except_device)
+        if not devices:
+            return 0
+        removed, sessions = _remove(user_id, list(devices))
+    except Exception as e:
+        logger.warning(f"撤销用户 {user_id} 全部会话失败: {e}")
+        return 0
+    _blacklist(sessions, time.time())
+    return removed
@@ -0,0 +1,17 @@
+# app/user/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .models import CustomUser
+
+
+# 用户认证缓存失效：视图、后台管理、shell 中的 save()/delete() 都会触发
+# 提交后再失效，避免其他请求在提交前重新加载到旧数据并缓存到新版本下
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_cache(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
@@ -26,6 +26,7 @@ urlpatterns = [
     path('refresh-token/', views.refresh_auth_token, name='refresh_token'),
     path('active-sessions/', views.get_active_sessions, name='active_sessions'),
     path('active-sessions/revoke/', views.revoke_session, name='revoke_session'),
+    path('active-sessions/revoke-all/', views.revoke_all_sessions, name='revoke_all_sessions'),
 
     # urls.py 中添加：
     path('google-login/', views.google_login, name='google_login'),
@@ -1,11 +1,8 @@
 # app/user/utils.py
-import os
-import uuid
-from datetime import datetime
 from typing import Tuple, Optional
 from django.core.files.uploadedfile import UploadedFile
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+
+from app.public.blobs import store, release, is_blob
 
 def validate_image(file: UploadedFile) -> Tuple[bool, Optional[str]]:
     """
@@ -28,18 +25,12 @@ def save_image(file: UploadedFile, directory: str = 'images') -> Tuple[bool, str
     保存图片文件
     参数:
         file: 上传的文件
-        directory: 存储目录
+        directory: 保留参数，文件按内容寻址保存，相同内容只保存一份
     返回:
         (是否成功, 文件路径或错误信息, 完整URL)
     """
     try:
-        # 生成文件路径
-        ext = os.path.splitext(file.name)[1]
-        filename = f"{uuid.uuid4()}{ext}"
-        upload_path = f'{directory}/{datetime.now().strftime("%Y/%m")}/{filename}'
-
-        # 保存文件
-        saved_path = default_storage.save(upload_path, ContentFile(file.read()))
+        saved_path = store(file)
         return True, saved_path, None
     except Exception as e:
         return False, str(e), None
@@ -47,12 +38,9 @@ def save_image(file: UploadedFile, directory: str = 'images') -> Tuple[bool, str
 def delete_file(file_path: str) -> bool:
     """
     删除文件
-    返回: 是否删除成功
+    返回: 是否删除成功（内容寻址的文件可能被共享，交给垃圾回收处理，视为成功）
     """
-    if file_path and default_storage.exists(file_path):
-        try:
-            default_storage.delete(file_path)
-            return True
-        except Exception:
-            return False
-    return False
\ No newline at end of file
+    try:
+        return release(file_path) or is_blob(file_path)
+    except Exception:
+        return False
\ No newline at end of file
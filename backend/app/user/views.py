@@ -23,9 +23,11 @@ from rest_framework.permissions import IsAdminUser, AllowAny
 from rest_framework.response import Response
 
 from app.user.decorators import jwt_required, admin_required
+from app.user import sessions
 from probject import settings
 from .models import CustomUser  # 确保使用继承AbstractUser的自定义用户模型
 from probject.status_code import STATUS_MESSAGES, SUCCESS, ERROR, INVALID_PARAMS, UNAUTHORIZED
+from probject.pagination import InvalidCursor, KeysetPagination
 from rest_framework_simplejwt.tokens import RefreshToken
 from app.public.services import ImageService
 from .utils import validate_image, delete_file, save_image
@@ -263,9 +265,9 @@ def login_user(request):
         refresh = RefreshToken.for_user(user)
         access_token = str(refresh.access_token)
 
-        # 存储登录状态（示例：记录设备登录）
+        # 登记设备会话
         device_id = request.META.get('HTTP_X_DEVICE_ID', 'default')
-        cache.set(f"user:{user.id}:{device_id}", access_token, timeout=3600 * 24 * 30)
+        sessions.register_session(user.id, device_id, access_token, request)
 
         # 构造响应数据
         user_data = {
@@ -320,8 +322,8 @@ def logout_user(request):
 
         cache.set(f'blacklist:{token}', '1', timeout=exp_time)
 
-        # 删除设备登录状态（可选）
-        cache.delete(f'user:{request.auth_user.id}:{device_id}')
+        # 删除设备会话
+        sessions.remove_session(request.auth_user.id, device_id)
 
         return Response(
             {
@@ -365,6 +367,7 @@ def user_list(request):
             "is_active": user.is_active,
             "date_joined": user.date_joined.strftime("%Y-%m-%d %H:%M:%S"),
             "avatar": user.get_full_avatar_url(),  # 修改这里
+            "avatar_variants": user.get_avatar_variants(),
         })
 
     return Response(
@@ -402,6 +405,7 @@ def get_user_profile(request):
         "is_staff": user.is_staff,
 
         "avatar": user.get_full_avatar_url(),  # 修改这里
+        "avatar_variants": user.get_avatar_variants(),
         "date_joined": user.date_joined.strftime("%Y-%m-%d %H:%M:%S"),
         "last_login": user.last_login.strftime("%Y-%m-%d %H:%M:%S") if user.last_login else None
     }
@@ -477,8 +481,8 @@ def change_password(request):
     user.set_password(new_password)
     user.save()
 
-    # 清除所有登录会话
-    cache.delete_pattern(f"user:{user.id}:*")
+    # 撤销所有登录会话
+    sessions.revoke_all_sessions(user.id)
 
     return Response({
         "code": 200,
@@ -527,7 +531,8 @@ def upload_avatar(request):
             "code": 200,
             "message": "头像上传成功",
             "data": {
-                "avatar_url": user.get_full_avatar_url()
+                "avatar_url": user.get_full_avatar_url(),
+                "avatar_variants": user.get_avatar_variants()
             }
         })
 
@@ -603,20 +608,23 @@ def refresh_auth_token(request):
 def get_active_sessions(request):
     """获取当前用户的活跃会话"""
     user = request.auth_user
-    pattern = f"user:{user.id}:*"
-    sessions = []
-
-    for key in cache.keys(pattern):
-        device_id = key.split(':')[-1]
-        sessions.append({
-            "device_id": device_id,
-            "last_active": cache.get(key)
+    session_list = []
+
+    for session in sessions.list_sessions(user.id, current_token=request.auth_token):
+        session_list.append({
+            "device_id": session['device_id'],
+            "last_active": datetime.fromtimestamp(session['last_active']).strftime("%Y-%m-%d %H:%M:%S"),
+            "login_time": datetime.fromtimestamp(session['created_at']).strftime("%Y-%m-%d %H:%M:%S")
+            if session['created_at'] else None,
+            "ip_address": session['ip_address'],
+            "user_agent": session['user_agent'],
+            "is_current": session['is_current'],
         })
 
     return Response({
         "code": 200,
         "message": "获取成功",
-        "data": sessions
+        "data": session_list
     })
 
 
@@ -633,8 +641,7 @@ def revoke_session(request):
             "message": "缺少设备ID"
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    cache_key = f"user:{user.id}:{device_id}"
-    if cache.delete(cache_key):
+    if sessions.revoke_session(user.id, device_id):
         return Response({
             "code": 200,
             "message": "会话已撤销"
@@ -646,6 +653,25 @@ def revoke_session(request):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['POST'])
+@jwt_required
+def revoke_all_sessions(request):
+    """
+    退出所有设备
+    keep_current 为 true（默认）时保留当前设备的会话
+    """
+    user = request.auth_user
+    keep_current = str(request.data.get('keep_current', 'true')).lower() not in ('false', '0')
+    except_device = request.META.get('HTTP_X_DEVICE_ID', 'default') if keep_current else None
+
+    revoked = sessions.revoke_all_sessions(user.id, except_device=except_device)
+    return Response({
+        "code": 200,
+        "message": "已退出其他设备" if keep_current else "已退出所有设备",
+        "data": {"revoked": revoked}
+    })
+
+
 @api_view(['GET'])
 @jwt_required
 @permission_classes([IsAdminUser])
@@ -762,6 +788,9 @@ def google_login(request):
         refresh = RefreshToken.for_user(user)
         access_token = str(refresh.access_token)
 
+        # 登记设备会话
+        sessions.register_session(user.id, request.META.get('HTTP_X_DEVICE_ID', 'default'), access_token, request)
+
         return Response({
             'code': 200,
             'message': '登录成功',
@@ -809,6 +838,7 @@ def get_current_user(request):
                 "email": user.email,
                 "name": user.username,
                 "avatar": user.get_full_avatar_url(),  # 修改这里
+                "avatar_variants": user.get_avatar_variants(),
                 "is_active": user.is_active,
                 "is_staff": user.is_staff,
                 "signature": user.signature,
@@ -831,6 +861,7 @@ def admin_user_list(request):
     """
     管理员获取用户列表（支持分页和搜索）
     GET /api/user/admin/users/?page=1&page_size=10&search=xxx
+    按注册时间键集分页：GET /api/user/admin/users/?limit=10&cursor=xxx（cursor 取自上一页的 next_cursor）
     """
     print("Current user:", request.auth_user)
     print("Is staff:", request.auth_user.is_staff)
@@ -849,13 +880,19 @@ def admin_user_list(request):
                 Q(email__icontains=search)
             )
 
-        # 计算总数
-        total = query.count()
+        # 分页：带 cursor 或 limit 参数时按 (date_joined, id) 键集分页，不统计总数
+        if KeysetPagination.requested(request):
+            paginator = KeysetPagination(ordering=('-date_joined', '-id'), page_size=page_size)
+            users = paginator.paginate_queryset(query, request)
+            pagination = paginator.get_pagination_data()
+        else:
+            # 计算总数
+            total = query.count()
 
-        # 分页
-        start = (page - 1) * page_size
-        end = page * page_size
-        users = query[start:end]
+            start = (page - 1) * page_size
+            end = page * page_size
+            users = query[start:end]
+            pagination = {"total": total, "page": page, "page_size": page_size}
 
         # 构造响应数据
         user_list = []
@@ -869,6 +906,7 @@ def admin_user_list(request):
                 "last_login": user.last_login.strftime("%Y-%m-%d %H:%M:%S") if user.last_login else None,
                 "date_joined": user.date_joined.strftime("%Y-%m-%d %H:%M:%S"),
                 "avatar": user.get_full_avatar_url(),
+                "avatar_variants": user.get_avatar_variants(),
                 "signature": user.signature
             })
 
@@ -876,12 +914,15 @@ def admin_user_list(request):
             "code": 200,
             "message": "获取成功",
             "data": {
-                "total": total,
-                "page": page,
-                "page_size": page_size,
+                **pagination,
                 "users": user_list
             }
         })
+    except InvalidCursor as e:
+        return Response({
+            "code": 400,
+            "message": str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             "code": 500,
@@ -1012,8 +1053,8 @@ def admin_reset_user_password(request, user_id):
         user.set_password(new_password)
         user.save()
 
-        # 清除用户所有登录会话
-        cache.delete_pattern(f"user:{user.id}:*")
+        # 撤销用户所有登录会话
+        sessions.revoke_all_sessions(user.id)
 
         return Response({
             "code": 200,
@@ -0,0 +1,146 @@
+# probject/counters.py
+
+import logging
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+logger = logging.getLogger(__name__)
+
+# 已注册的计数器，供定时任务统一刷新
+_registry = {}
+
+
+class BufferedCounter:
+    """
+    Redis 缓冲计数器
+    每次计数只在 Redis 哈希上执行 HINCRBY，定时任务再把累计的增量用一条 UPDATE 写回数据库；
+    读取时把尚未写回的增量合并到返回数据中，保证计数实时准确；
+    写回时记录各行的原值，读取方据此判断读到的数据库值是否已包含正在刷新的批次，不会重复累加。
+
+    用法：
+        article_views = BufferedCounter('article.Article', 'views')
+        article_views.incr(article.id)
+        data['views'] += article_views.pending(article.id, article.views)
+    同一机制可用于 Article.likes、Comment.likes 等整数字段。
+    """
+
+    def __init__(self, model_label, field):
+        self.model_label = model_label
+        self.field = field
+        self.key = f"counter:{model_label.lower()}:{field}"
+        self.flushing_key = f"{self.key}:flushing"
+        self.base_key = f"{self.key}:base"
+        _registry[self.key] = self
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def _client(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    def incr(self, pk, amount=1):
+        """累加计数，Redis 不可用时直接更新数据库"""
+        try:
+            self._client().hincrby(self.key, pk, amount)
+        except Exception as e:
+            logger.warning(f"计数器 {self.key} 写入 Redis 失败，直接更新数据库: {e}")
+            self.model.objects.filter(pk=pk).update(**{self.field: F(self.field) + amount})
+
+    def pending_many(self, stored):
+        """
+        获取多个对象尚未写回数据库的增量 {pk: delta}
+        stored 为调用方读到的数据库值 {pk: value}，用于判断正在刷新的批次是否已包含在其中
+        """
+        stored = {pk: value for pk, value in stored.items() if pk is not None}
+        if not stored:
+            return {}
+        pks = list(stored)
+        try:
+            # MULTI 保证三个哈希取自同一时刻，不会与刷新任务的改名交错
+            pipe = self._client().pipeline(transaction=True)
+            pipe.hmget(self.key, pks)
+            pipe.hmget(self.flushing_key, pks)
+            pipe.hmget(self.base_key, pks)
+            current, flushing, base = pipe.execute()
+        except Exception as e:
+            logger.warning(f"读取计数器 {self.key} 失败: {e}")
+            return {}
+
+        result = {}
+        for pk, a, b, c in zip(pks, current, flushing, base):
+            delta = int(a or 0)
+            # 刷新批次写回前会记录各行的原值；读到的仍是原值说明该批次尚未包含在内，
+            # 已写回（读到的值已变化）的不再重复累加
+            if b is not None and (c is None or int(c) == stored[pk]):
+                delta += int(b)
+            if delta:
+                result[pk] = delta
+        return result
+
+    def pending(self, pk, stored):
+        """获取单个对象尚未写回数据库的增量，stored 为读到的数据库值"""
+        return self.pending_many({pk: stored}).get(pk, 0)
+
+    def flush(self):
+        """把累计的增量写回数据库，返回更新的行数"""
+        client = self._client()
+        lock_key = f"{self.key}:lock"
+        # 同一计数器同时只允许一个刷新任务执行
+        if not client.set(lock_key, 1, nx=True, ex=300):
+            return 0
+        try:
+            updated = 0
+            # 上一批次写回后保留到本次刷新，供读取时比对；上次刷新中断时未写回的行在此补写
+            if client.exists(self.flushing_key):
+                updated += self._apply_batch(client)
+                client.delete(self.flushing_key, self.base_key)
+            if not client.exists(self.key):
+                return updated
+            # 把当前哈希原子地改名后再处理，改名之后的新计数会写入新的哈希，不会丢失
+            client.rename(self.key, self.flushing_key)
+            return updated + self._apply_batch(client)
+        finally:
+            client.delete(lock_key)
+
+    def _apply_batch(self, client):
+        """把刷新批次写回数据库；已记录原值时只补写仍等于原值的行，重复执行不会重复累加"""
+        deltas = {}
+        for pk, delta in client.hgetall(self.flushing_key).items():
+            delta = int(delta)
+            if delta:
+                deltas[int(pk)] = delta
+        if not deltas:
+            return 0
+
+        base = {int(pk): int(value) for pk, value in client.hgetall(self.base_key).items()}
+        with transaction.atomic():
+            stored = dict(
+                self.model.objects.select_for_update().filter(pk__in=deltas.keys()).values_list('pk', self.field)
+            )
+            if base:
+                deltas = {pk: delta for pk, delta in deltas.items() if pk in stored and stored[pk] == base.get(pk)}
+            elif stored:
+                # 先记录原值再提交，读取方据此判断读到的值是否已包含本批次
+                client.hset(self.base_key, mapping=stored)
+            if not deltas:
+                return 0
+            whens = [When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()]
+            return self.model.objects.filter(pk__in=deltas.keys()).update(**{
+                self.field: F(self.field) + Case(*whens, default=Value(0), output_field=IntegerField())
+            })
+
+
+def flush_all_counters():
+    """刷新所有已注册的计数器，返回 {计数器: 更新行数}"""
+    results = {}
+    for key, counter in _registry.items():
+        try:
+            results[key] = counter.flush()
+        except Exception as e:
+            logger.error(f"刷新计数器 {key} 失败: {e}")
+            results[key] = None
+    return results
@@ -0,0 +1,139 @@
+# probject/likes.py
+
+import logging
+
+from django.apps import apps
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+logger = logging.getLogger(__name__)
+
+# 已注册的点赞服务，供定时任务统一校正计数
+_registry = {}
+
+
+class LikeService:
+    """
+    点赞服务：点赞记录的插入/删除与目标计数列的增减在同一事务中完成
+    - 点赞依靠 (目标, 用户) 唯一约束做幂等插入，并发重复点赞不会报错，也不会重复计数
+    - 计数列用 F() 原子增减，不小于 0；数据库支持 RETURNING 时同一条 UPDATE 直接返回新值
+    - reconcile() 按点赞记录批量重算计数列，由定时任务调用
+    - 计数列用 UPDATE 修改，不触发模型信号；依赖计数的缓存通过 on_change(target_id) 回调失效，
+      点赞数有变化时调用（批量校正时 target_id 为 None）
+
+    用法：
+        article_likes = LikeService('article.Article', 'article.ArticleLike', 'article',
+                                    on_change=lambda target_id: invalidate_tags('article:published'))
+        created, likes = article_likes.like(article.id, user.id)
+        removed, likes = article_likes.unlike(article.id, user.id)
+    """
+
+    def __init__(self, model_label, like_label, target_field, count_field='likes', on_change=None):
+        self.model_label = model_label
+        self.like_label = like_label
+        self.target_field = target_field
+        self.count_field = count_field
+        self.on_change = on_change
+        self.key = f"{model_label.lower()}:{count_field}"
+        _registry[self.key] = self
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def like_model(self):
+        return apps.get_model(self.like_label)
+
+    def _record_filter(self, target_id, user_id):
+        return {f'{self.target_field}_id': target_id, 'user_id': user_id}
+
+    def like(self, target_id, user_id):
+        """点赞，返回 (是否新增, 最新点赞数)；已点赞过时不做任何修改"""
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    self.like_model.objects.create(**self._record_filter(target_id, user_id))
+            except IntegrityError:
+                # 已有记录（包括并发请求刚刚插入的），按幂等处理
+                return False, self.current(target_id)
+            likes = self._add(target_id, 1)
+            self._changed(target_id)
+            return True, likes
+
+    def unlike(self, target_id, user_id):
+        """取消点赞，返回 (是否删除, 最新点赞数)；未点赞过时不做任何修改"""
+        with transaction.atomic():
+            deleted, _ = self.like_model.objects.filter(**self._record_filter(target_id, user_id)).delete()
+            if not deleted:
+                return False, self.current(target_id)
+            likes = self._add(target_id, -1)
+            self._changed(target_id)
+            return True, likes
+
+    def _changed(self, target_id):
+        if self.on_change is not None:
+            self.on_change(target_id)
+
+    def is_liked(self, target_id, user_id):
+        return self.like_model.objects.filter(**self._record_filter(target_id, user_id)).exists()
+
+    def current(self, target_id):
+        return self.model.objects.filter(pk=target_id).values_list(self.count_field, flat=True).first() or 0
+
+    def _supports_returning(self):
+        if connection.vendor == 'postgresql':
+            return True
+        if connection.vendor == 'sqlite':
+            import sqlite3
+            return sqlite3.sqlite_version_info >= (3, 35, 0)
+        return False
+
+    def _add(self, target_id, delta):
+        """计数列原子增减，返回更新后的值"""
+        model = self.model
+        if not self._supports_returning():
+            model.objects.filter(pk=target_id).update(
+                **{self.count_field: Greatest(F(self.count_field) + delta, 0)}
+            )
+            return self.current(target_id)
+
+        quote = connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        column = quote(model._meta.get_field(self.count_field).column)
+        pk = quote(model._meta.pk.column)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET {column} = CASE WHEN {column} + %s < 0 THEN 0 ELSE {column} + %s END '
+                f'WHERE {pk} = %s RETURNING {column}',
+                [delta, delta, target_id],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def reconcile(self, dry_run=False):
+        """按点赞记录重算计数列，一条 UPDATE 只修正不一致的行，返回不一致的行数"""
+        totals = self.like_model.objects.filter(**{self.target_field: OuterRef('pk')}).order_by().values(
+            self.target_field
+        ).annotate(total=Count('id')).values('total')
+        actual = Coalesce(Subquery(totals, output_field=IntegerField()), Value(0))
+        drifted = self.model.objects.annotate(actual=actual).exclude(**{self.count_field: F('actual')})
+        if dry_run:
+            return drifted.count()
+        fixed = self.model.objects.filter(pk__in=drifted.values('pk')).update(**{self.count_field: actual})
+        if fixed:
+            self._changed(None)
+        return fixed
+
+
+def reconcile_all_likes(dry_run=False):
+    """校正所有已注册的点赞计数，返回 {计数: 修正行数}"""
+    results = {}
+    for key, service in _registry.items():
+        try:
+            results[key] = service.reconcile(dry_run=dry_run)
+        except Exception as e:
+            logger.error(f"校正点赞计数 {key} 失败: {e}")
+            results[key] = None
+    return results
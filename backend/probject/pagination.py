@@ -0,0 +1,234 @@
+# probject/pagination.py
+
+import base64
+import json
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# 默认配置，可在 settings.KEYSET_PAGINATION 中覆盖
+DEFAULT_CONFIG = {
+    'PAGE_SIZE': 20,
+    'MAX_PAGE_SIZE': 100,
+    'COUNT_LIMIT': 10000,  # 近似总数最多统计的行数，超过时返回该上限并标记为不精确
+}
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'KEYSET_PAGINATION', {}))
+    return config
+
+
+class InvalidCursor(ValueError):
+    """游标格式错误"""
+
+
+def _encode(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def _decode(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode((cursor + '=' * (-len(cursor) % 4)).encode()))
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise InvalidCursor('无效的游标')
+    if not isinstance(payload, dict):
+        raise InvalidCursor('无效的游标')
+    return payload
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """
+    键集（游标）分页：按 (created_at, id) 这类唯一的排序键取“上一页最后一行之后”的数据，
+    不使用 OFFSET，也不默认执行 count()，翻到多深的页面耗时都相同。
+
+    - 游标是不透明的字符串，由响应中的 next_cursor / previous_cursor 给出，原样传回 ?cursor= 即可
+    - ?limit= 指定每页数量（兼容 page_size）
+    - ?with_count=1 时返回近似总数 count 和 count_exact（最多统计 COUNT_LIMIT 行）
+    - 也可以对已排好序的列表分页（如全文检索的相关度排序结果），此时游标记录的是位置
+
+    接口与 DRF 的分页类一致：paginate_queryset 返回当前页数据，get_paginated_response 生成响应；
+    也可以用 get_pagination_data 取得分页字段后并入接口原有的响应格式。
+    """
+    ordering = ('-created_at', '-id')
+    page_size = None
+    max_page_size = None
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    count_query_param = 'with_count'
+
+    def __init__(self, ordering=None, page_size=None, max_page_size=None):
+        config = get_config()
+        self.ordering = tuple(ordering or self.ordering)
+        if self.ordering[-1].lstrip('-') not in ('id', 'pk'):
+            # 排序键必须唯一，最后补上主键
+            self.ordering += ('-id' if self.ordering[-1].startswith('-') else 'id',)
+        self.page_size = page_size or self.page_size or config['PAGE_SIZE']
+        self.max_page_size = max_page_size or self.max_page_size or config['MAX_PAGE_SIZE']
+        self.count_limit = config['COUNT_LIMIT']
+
+    @classmethod
+    def requested(cls, request):
+        """请求中带 cursor 或 limit 参数时使用键集分页（与评论树接口的约定一致）"""
+        params = request.query_params if hasattr(request, 'query_params') else request.GET
+        return cls.cursor_query_param in params or cls.page_size_query_param in params
+
+    def get_page_size(self, request):
+        params = self.request.query_params
+        value = params.get(self.page_size_query_param) or params.get('page_size')
+        if not value:
+            return self.page_size
+        try:
+            return max(1, min(int(value), self.max_page_size))
+        except ValueError:
+            raise InvalidCursor('每页数量必须是整数')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_page_size(request)
+        self.count = None
+        self.count_exact = True
+        self.next_cursor = self.previous_cursor = None
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        payload = _decode(cursor) if cursor else {}
+        self.reverse = bool(payload.get('r'))
+
+        if isinstance(queryset, (list, tuple)):
+            return self._paginate_list(queryset, payload)
+
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count, self.count_exact = self._approximate_count(queryset)
+
+        self.model = queryset.model
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(name[1:] if name.startswith('-') else f'-{name}' for name in ordering)
+        queryset = queryset.order_by(*ordering)
+        if 'k' in payload:
+            queryset = queryset.filter(self._after(self._decode_keys(payload['k'])))
+
+        # 多取一条用来判断是否还有更多数据
+        rows = list(queryset[:self.limit + 1])
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if self.reverse:
+            rows.reverse()
+
+        if rows:
+            has_next, has_previous = (True, has_more) if self.reverse else (has_more, bool(cursor))
+            if has_next:
+                self.next_cursor = _encode({'k': self._keys(rows[-1])})
+            if has_previous:
+                self.previous_cursor = _encode({'k': self._keys(rows[0]), 'r': 1})
+        return rows
+
+    def _paginate_list(self, items, payload):
+        self.count = len(items)
+        try:
+            offset = max(0, int(payload.get('o', 0)))
+        except (TypeError, ValueError):
+            raise InvalidCursor('无效的游标')
+        if self.reverse:
+            offset = max(0, offset - self.limit)
+        rows = list(items[offset:offset + self.limit])
+        if offset + self.limit < len(items):
+            self.next_cursor = _encode({'o': offset + self.limit})
+        if offset > 0:
+            self.previous_cursor = _encode({'o': offset, 'r': 1})
+        return rows
+
+    def _approximate_count(self, queryset):
+        """只统计前 COUNT_LIMIT + 1 行，大表上的代价有上限"""
+        count = queryset.order_by()[:self.count_limit + 1].count()
+        if count > self.count_limit:
+            return self.count_limit, False
+        return count, True
+
+    def _fields(self):
+        return [name.lstrip('-') for name in self.ordering]
+
+    def _keys(self, row):
+        return [_json_value(getattr(row, name)) for name in self._fields()]
+
+    def _decode_keys(self, values):
+        names = self._fields()
+        if not isinstance(values, list) or len(values) != len(names):
+            raise InvalidCursor('无效的游标')
+        decoded = []
+        for name, value in zip(names, values):
+            try:
+                field = self.model._meta.pk if name == 'pk' else self.model._meta.get_field(name)
+                value = field.to_python(value)
+            except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+                raise InvalidCursor('无效的游标')
+            if value is None:
+                raise InvalidCursor('无效的游标')
+            decoded.append(value)
+        return decoded
+
+    def _after(self, values):
+        """
+        排在游标之后的行：(a, b, id) 依次比较，等价于
+        a < x OR (a = x AND b < y) OR (a = x AND b = y AND id < z)（降序时，升序取 >）
+        """
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') != self.reverse else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return condition
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_pagination_data(self):
+        """分页相关字段，供并入接口原有的响应格式"""
+        data = {
+            'next_cursor': self.next_cursor,
+            'previous_cursor': self.previous_cursor,
+            'has_more': self.next_cursor is not None,
+            'limit': self.limit,
+        }
+        if self.count is not None:
+            data['count'] = self.count
+            data['count_exact'] = self.count_exact
+        return data
+
+    def get_paginated_response(self, data):
+        return Response(dict(
+            self.get_pagination_data(),
+            next=self._link(self.next_cursor),
+            previous=self._link(self.previous_cursor),
+            results=data,
+        ))
+
+
+def select_paginator(request, page_class, ordering=None):
+    """
+    带 cursor 或 limit 参数的请求使用键集分页，否则沿用原有的页码分页类
+    键集分页的默认每页数量和上限取自页码分页类
+    """
+    if KeysetPagination.requested(request):
+        return KeysetPagination(
+            ordering=ordering,
+            page_size=getattr(page_class, 'page_size', None),
+            max_page_size=getattr(page_class, 'max_page_size', None),
+        )
+    return page_class()
@@ -0,0 +1,164 @@
+# probject/response_cache.py
+
+import hashlib
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+# 默认配置，可在 settings.RESPONSE_CACHE 中覆盖
+DEFAULT_CONFIG = {
+    'ENABLED': True,
+    'TIMEOUT': 300,        # 缓存时间（秒），标签失效之外的兜底
+    'LOCK_TIMEOUT': 10,    # 单飞锁的过期时间（秒），应大于视图最长执行时间
+    'WAIT_TIMEOUT': 3,     # 未拿到锁的请求等待结果的最长时间（秒），超时后自行计算
+    'POLL_INTERVAL': 0.05,
+    'KEY_PREFIX': 'respcache',
+}
+
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, 'RESPONSE_CACHE', {}))
+    return config
+
+
+def _tag_key(tag):
+    return f"{get_config()['KEY_PREFIX']}:tag:{tag}"
+
+
+def tag_versions(tags):
+    """
+    读取各标签的当前版本号（一次 get_many），缓存键包含这些版本号，标签失效后旧缓存自然不再命中
+    标签版本不存在时以当前毫秒时间初始化，避免被淘汰后重置为旧值而命中过期缓存
+    """
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, int(time.time() * 1000), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump(tags):
+    for tag in tags:
+        key = _tag_key(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), None)
+        except Exception as e:
+            logger.warning(f"更新响应缓存标签 {tag} 失败: {e}")
+
+
+def invalidate_tags(*tags):
+    """
+    使带有这些标签的响应缓存失效
+    在事务中调用时等到提交后再执行，避免并发请求在提交前把旧数据重新写入缓存
+    """
+    tags = [tag for tag in tags if tag]
+    if tags:
+        transaction.on_commit(lambda: _bump(tags))
+
+
+def _request_user_id(request):
+    from app.user.authentication import resolve_request_user
+    user = resolve_request_user(request)
+    return user.id if user else 0
+
+
+def cache_key(request, name, tags, vary_on_user=False):
+    """视图名 + 路径 + 排序后的查询参数（+ 用户）+ 各标签版本号"""
+    params = sorted((key, value) for key in request.GET for value in request.GET.getlist(key))
+    parts = [request.path, repr(params)]
+    if vary_on_user:
+        parts.append(str(_request_user_id(request)))
+    parts.extend(str(version) for version in tag_versions(tags))
+    digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+    return f"{get_config()['KEY_PREFIX']}:{name}:{digest}"
+
+
+def _cacheable(response):
+    """只缓存成功的 DRF 响应（HTTP 状态和响应体中的 code 都为 200）"""
+    if not isinstance(response, Response) or response.status_code != 200 or response.exception:
+        return False
+    data = response.data
+    return not isinstance(data, dict) or data.get('code', 200) == 200
+
+
+def _to_response(entry, hit):
+    data, status_code = entry
+    response = Response(data, status=status_code)
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
+
+
+def cached_view(tags=(), timeout=None, vary_on_user=False):
+    """
+    公开 GET 接口的读穿透缓存，放在 @api_view 之下使用：
+
+        @api_view(['GET'])
+        @cached_view(tags=['builder'])
+        def get_building_categories(request): ...
+
+    - 缓存键随查询参数变化；vary_on_user=True 时按当前用户区分（响应中含 is_liked 等字段）
+    - tags 为依赖的数据标签，数据变化时由信号调用 invalidate_tags 使缓存失效
+    - 缓存未命中时用单飞锁保证同一键只有一个请求执行视图，其他请求等待结果，防止缓存击穿
+    - 只缓存 200 响应；缓存不可用时直接执行视图
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__name__}'
+
+        @wraps(func)
+        def wrapper(request, *args, **kwargs):
+            config = get_config()
+            if not config['ENABLED'] or request.method != 'GET':
+                return func(request, *args, **kwargs)
+            try:
+                key = cache_key(request, name, tags, vary_on_user)
+                entry = cache.get(key)
+            except Exception as e:
+                logger.warning(f"读取响应缓存失败: {e}")
+                return func(request, *args, **kwargs)
+            if entry is not None:
+                return _to_response(entry, hit=True)
+
+            lock_key = f'{key}:lock'
+            locked = False
+            try:
+                locked = cache.add(lock_key, 1, config['LOCK_TIMEOUT'])
+                if not locked:
+                    # 其他请求正在计算同一结果，等待其写入缓存
+                    deadline = time.monotonic() + config['WAIT_TIMEOUT']
+                    while time.monotonic() < deadline:
+                        time.sleep(config['POLL_INTERVAL'])
+                        entry = cache.get(key)
+                        if entry is not None:
+                            return _to_response(entry, hit=True)
+            except Exception as e:
+                logger.warning(f"响应缓存加锁失败: {e}")
+
+            try:
+                response = func(request, *args, **kwargs)
+                if _cacheable(response):
+                    try:
+                        cache.set(key, (response.data, response.status_code), timeout or config['TIMEOUT'])
+                    except Exception as e:
+                        logger.warning(f"写入响应缓存失败: {e}")
+                    response['X-Cache'] = 'MISS'
+                return response
+            finally:
+                if locked:
+                    try:
+                        cache.delete(lock_key)
+                    except Exception:
+                        pass
+        return wrapper
+    return decorator
@@ -0,0 +1,20 @@
+# probject/serializers.py
+
+from django.db import models
+from rest_framework import serializers
+
+
+class BatchListSerializer(serializers.ListSerializer):
+    """
+    批量列表序列化器
+    序列化前先调用子序列化器的 prepare_batch(items)，
+    让子序列化器为整页数据一次性预取所需信息，避免逐行查询
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        items = list(iterable)
+        prepare_batch = getattr(self.child, 'prepare_batch', None)
+        if prepare_batch is not None:
+            prepare_batch(items)
+        return super().to_representation(items)
@@ -33,6 +33,7 @@ INSTALLED_APPS = [
     'app.comment.apps.CommentConfig',
     'app.analytics.apps.AnalyticsConfig',
     'app.public.apps.PublicConfig',
+    'app.tag.apps.TagConfig',
     'django_celery_beat',
     'sslserver',
     'django_extensions',
@@ -104,7 +105,12 @@ CORS_ALLOW_HEADERS = [
     'content-type',
     'x-csrftoken',
     'x-requested-with',
+    'range',
+    'if-none-match',
+    'if-range',
 ]
+# 让前端模型查看器能读取分段下载相关的响应头
+CORS_EXPOSE_HEADERS = ['content-range', 'accept-ranges', 'content-length', 'etag']
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=30),
@@ -113,6 +119,82 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# jwt_required 认证用户缓存配置，见 app/user/authentication.py
+AUTH_USER_CACHE = {
+    'ENABLED': True,
+    'TIMEOUT': 300,         # Redis 中缓存用户对象的时间（秒）
+    'LOCAL_TIMEOUT': 30,    # 进程内缓存时间（秒），同样按用户缓存版本校验
+    'LOCAL_MAX_SIZE': 1000,
+}
+
+# 模型文件分片上传配置，见 app/builder/uploads.py
+CHUNKED_UPLOAD = {
+    'TEMP_DIR': os.path.join(BASE_DIR, 'tmp', 'uploads'),
+    'CHUNK_SIZE': 5 * 1024 * 1024,
+    'MAX_FILE_SIZE': 1024 * 1024 * 1024,
+    'EXPIRE_HOURS': 24,
+}
+
+# 模型文件（GLB/GLTF）带摘要地址与缓存配置，见 app/builder/assets.py
+MODEL_ASSETS = {
+    'DIRECTORIES': ['blobs/', 'builders/models/', 'models/'],
+    'MAX_AGE': 3600 * 24 * 365,
+}
+
+# GLB 模型优化（细节层级版本和预览）配置，见 app/builder/optimization.py
+MODEL_OPTIMIZATION = {
+    'VARIANTS': {
+        'lod0': {'ratio': 1.0, 'texture_size': None},   # 只量化和去除无用数据
+        'lod1': {'ratio': 0.5, 'texture_size': 2048},
+        'lod2': {'ratio': 0.15, 'texture_size': 1024},
+        'preview': {'ratio': 0.03, 'texture_size': 256},
+    },
+    'BATCH_SIZE': 5,
+}
+
+# 建筑标注（AR/3D 标记）配置，见 app/builder/markers.py
+BUILDER_MARKERS = {
+    'MAX_MARKERS': 500,
+    'PRECISION': 6,
+}
+
+# 按内容寻址的上传文件存储配置，见 app/public/blobs.py
+BLOB_STORAGE = {
+    'DIRECTORY': 'blobs',
+    'GRACE_HOURS': 24,  # 无引用的文件至少保留的时间，避免删除刚上传、尚未保存到记录中的文件
+}
+
+# 图片缩略图和 WebP 版本配置，见 app/public/images.py
+IMAGE_VARIANTS = {
+    'CACHE_DIR': 'derivatives',
+    'SIZES': {
+        'thumb': 320,    # 列表、卡片、头像
+        'medium': 960,   # 详情页
+    },
+    'WEBP': True,
+}
+
+# 键集（游标）分页配置，见 probject/pagination.py
+KEYSET_PAGINATION = {
+    'PAGE_SIZE': 20,
+    'MAX_PAGE_SIZE': 100,
+    'COUNT_LIMIT': 10000,
+}
+
+# 公开 GET 接口响应缓存配置，见 probject/response_cache.py
+RESPONSE_CACHE = {
+    'ENABLED': True,
+    'TIMEOUT': 300,
+    'LOCK_TIMEOUT': 10,
+    'WAIT_TIMEOUT': 3,
+}
+
+# 用户设备会话登记配置，见 app/user/sessions.py
+USER_SESSIONS = {
+    'TTL': 3600 * 24 * 30,  # 会话无活动后自动过期的时间（秒）
+    'TOUCH_INTERVAL': 60,   # 刷新最后活跃时间的最小间隔（秒）
+}
+
 CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
@@ -149,7 +231,7 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.BasicAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'app.user.authentication.CachedJWTAuthentication',  # 用户对象走认证缓存
         'rest_framework.authentication.BasicAuthentication',
     ],
 }
@@ -165,4 +247,73 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'app.analytics.tasks.update_popular_content',
         'schedule': crontab(hour='*/1'),
     },
-}
\ No newline at end of file
+    'flush_buffered_counters': {
+        'task': 'app.analytics.tasks.flush_buffered_counters',
+        'schedule': crontab(minute='*'),
+    },
+    'reconcile_like_counts': {
+        'task': 'app.analytics.tasks.reconcile_like_counts',
+        'schedule': crontab(hour=4, minute=15),
+    },
+    'rollup_api_traffic': {
+        'task': 'app.analytics.tasks.rollup_api_traffic',
+        'schedule': crontab(minute='*'),
+    },
+    'prune_api_traffic': {
+        'task': 'app.analytics.tasks.prune_api_traffic',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'cleanup_chunked_uploads': {
+        'task': 'app.builder.tasks.cleanup_chunked_uploads',
+        'schedule': crontab(minute=15),
+    },
+    'collect_orphan_blobs': {
+        'task': 'app.public.tasks.collect_orphan_blobs',
+        'schedule': crontab(hour=4, minute=30),
+    },
+    'cleanup_image_variants': {
+        'task': 'app.public.tasks.cleanup_image_variants',
+        'schedule': crontab(hour=4, minute=45),
+    },
+    'optimize_models': {
+        'task': 'app.builder.tasks.optimize_models',
+        'schedule': crontab(minute='*'),
+    },
+    'cleanup_model_variants': {
+        'task': 'app.builder.tasks.cleanup_model_variants',
+        'schedule': crontab(hour=4, minute=0),
+    },
+}
+
+# API访问日志缓冲写入配置，见 app/analytics/log_buffer.py
+ANALYTICS_LOG_BUFFER = {
+    'ENABLED': True,
+    'BACKEND': 'memory',        # 多进程部署时可改为 'redis' 共享队列
+    'MAX_SIZE': 10000,
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 2.0,
+    'REDIS_KEY': 'analytics:access_logs',
+}
+
+# API访问统计结果缓存时间（秒），汇总任务执行后自动失效
+ANALYTICS_STATISTICS_CACHE_TIMEOUT = 300
+
+# API流量分钟/小时汇总与数据保留配置，见 app/analytics/rollup.py
+ANALYTICS_ROLLUP = {
+    'LAG_MINUTES': 2,               # 汇总到当前时间之前若干分钟，等待缓冲区写入
+    'CHUNK_MINUTES': 60,
+    'MAX_LOGS_PER_RUN': 200000,
+    'RAW_RETENTION_DAYS': 30,       # 原始访问日志保留天数
+    'MINUTE_RETENTION_DAYS': 7,
+    'HOUR_RETENTION_DAYS': 365,
+    'PRUNE_BATCH_SIZE': 5000,
+}
+
+# 热门内容热度计算配置，见 app/analytics/scoring.py
+POPULAR_CONTENT_SCORING = {
+    'WEIGHTS': {'views': 1, 'likes': 3, 'comments': 5},
+    'DECAY': 'hyperbolic',      # hyperbolic / exponential / none
+    'DECAY_RATE': 0.1,          # hyperbolic: 分数 / (1 + 天数 * DECAY_RATE)
+    'HALF_LIFE_DAYS': 7,        # exponential: 每 HALF_LIFE_DAYS 天分数减半
+    'CONTENT_TYPES': ['article', 'builder', 'comment'],
+}
@@ -4,9 +4,16 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from app.builder.views import serve_model_asset
+from app.public.views import serve_image_variant
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('app/', include('app.urls')),  # 包含 app 路由
+    # 带内容摘要的模型文件地址，支持 Range 和长期缓存，见 app/builder/assets.py
+    path('assets/<str:digest>/<path:name>', serve_model_asset, name='model_asset'),
+    # 图片缩略图和 WebP 版本，首次请求时生成，见 app/public/images.py
+    path('images/<str:variant>/<path:name>', serve_image_variant, name='image_variant'),
 ]
 
 
@@ -31,6 +31,17 @@ export const getAllModels = async () => {
     }
 }
 
+// 地图视口内的建筑：bbox 为 Leaflet 的 toBBoxString()，缩放级别较低时返回聚合结果
+export const getMapBuildings = async ({ bbox, zoom }) => {
+    try {
+        const response = await apiClient.get('builder/map/', { params: { bbox, zoom } });
+        return response.data;
+    } catch (error) {
+        console.error('Error fetching map buildings:', error);
+        throw error;
+    }
+}
+
 export const getAllModelsPaginated = async (params) => {
     try {
         console.log("Sending params:", params); // 添加日志
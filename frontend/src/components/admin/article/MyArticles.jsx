@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { Table, Card, Button, Space, Tag, Modal, message, Input, Select } from 'antd';
 import { EditOutlined, DeleteOutlined, EyeOutlined, LikeOutlined, FilterOutlined, CheckOutlined, RollbackOutlined } from '@ant-design/icons';
 import { useNavigate } from 'react-router-dom';
-import { getMyArticles, deleteArticle, submitDraft, updateArticle } from '@/api/articleApi';
+import { getMyArticles, getArticleDetail, deleteArticle, submitDraft, updateArticle } from '@/api/articleApi';
 import EditArticleModal from './EditArticleModal';
 
 const { Search } = Input;
@@ -80,9 +80,18 @@ const MyArticles = () => {
         });
     };
 
-    const handleEdit = (article) => {
-        setCurrentArticle(article);
-        setEditModalVisible(true);
+    const handleEdit = async (article) => {
+        try {
+            // 列表只返回摘要，编辑前获取完整正文
+            const response = await getArticleDetail(article.id);
+            if (response?.code !== 200) {
+                throw new Error(response?.message || '获取文章详情失败');
+            }
+            setCurrentArticle(response.data);
+            setEditModalVisible(true);
+        } catch (error) {
+            message.error('获取文章详情失败：' + (error.response?.data?.message || error.message || '未知错误'));
+        }
     };
 
     const handleDelete = async (id) => {
@@ -29,7 +29,6 @@ function MapClickHandler({ isSelectingLocation, onLocationSelect }) {
 }
 
 const HeritageMap = () => {
-    const [mapZoom, setMapZoom] = useState(4);
     const [showForm, setShowForm] = useState(false);
     const [isSelectingLocation, setIsSelectingLocation] = useState(false);
     const [selectedLocation, setSelectedLocation] = useState(null);
@@ -45,14 +44,13 @@ const HeritageMap = () => {
                 center={[35.8617, 104.1954]}
                 zoom={4}
                 className="h-full w-full"
-                onZoomEnd={(e) => setMapZoom(e.target._zoom)}
                 zoomControl={false}
             >
                 <TileLayer
                     url="https://webrd02.is.autonavi.com/appmaptile?lang=zh_cn&size=1&scale=1&style=8&x={x}&y={y}&z={z}"
                     attribution="&copy; 高德地图"
                 />
-                <HeritageMarkers mapZoom={mapZoom} />
+                <HeritageMarkers />
                 <MapClickHandler
                     isSelectingLocation={isSelectingLocation}
                     onLocationSelect={handleLocationSelect}
@@ -1,39 +1,62 @@
-import { useEffect, useState, useMemo } from 'react';
-import { Marker, Popup } from 'react-leaflet';
+import { useCallback, useEffect, useRef, useState } from 'react';
+import { Marker, Popup, useMap, useMapEvents } from 'react-leaflet';
 import { Button, Card, Tag, Spin, notification } from 'antd';
 import L from 'leaflet';
-import { getAllModels } from '@/api/builderApi';
+import { getMapBuildings } from '@/api/builderApi';
 
-const HeritageMarkers = ({ mapZoom }) => {
+// 地图停止移动后延迟请求，避免拖动过程中频繁请求
+const FETCH_DELAY = 300;
+
+const HeritageMarkers = () => {
+    const map = useMap();
     const [sites, setSites] = useState([]);
+    const [clusters, setClusters] = useState([]);
     const [isLoading, setIsLoading] = useState(true);
+    const timerRef = useRef(null);
+    const requestRef = useRef(0);
 
-    // 获取遗址数据
-    useEffect(() => {
-        const fetchSites = async () => {
-            try {
-                const response = await getAllModels();
-                const sitesData = Array.isArray(response)
-                    ? response
-                    : Array.isArray(response.data)
-                        ? response.data
-                        : [];
-                setSites(sitesData);
-            } catch (error) {
-                console.error('Failed to fetch sites:', error);
+    // 只获取当前视口内的遗址，缩放级别较低时后端返回聚合结果
+    const fetchSites = useCallback(async () => {
+        const requestId = ++requestRef.current;
+        try {
+            const response = await getMapBuildings({
+                bbox: map.getBounds().toBBoxString(),
+                zoom: map.getZoom(),
+            });
+            // 忽略已过期的响应（地图在请求期间又移动过）
+            if (requestId !== requestRef.current) return;
+            setSites(response.data?.markers || []);
+            setClusters(response.data?.clusters || []);
+        } catch (error) {
+            console.error('Failed to fetch sites:', error);
+            if (requestId === requestRef.current) {
                 setSites([]);
-            } finally {
+                setClusters([]);
+            }
+        } finally {
+            if (requestId === requestRef.current) {
                 setIsLoading(false);
             }
-        };
+        }
+    }, [map]);
 
+    useEffect(() => {
         fetchSites();
-    }, []);
+        return () => clearTimeout(timerRef.current);
+    }, [fetchSites]);
 
-    // 根据缩放级别过滤可见遗址
-    const visibleSites = useMemo(() => (
-        mapZoom >= 4 ? sites : []
-    ), [mapZoom, sites]);
+    // 移动和缩放结束后重新获取
+    useMapEvents({
+        moveend: () => {
+            clearTimeout(timerRef.current);
+            timerRef.current = setTimeout(fetchSites, FETCH_DELAY);
+        },
+    });
+
+    // 点击聚合点时放大到该区域
+    const handleClusterClick = (cluster) => {
+        map.setView([cluster.latitude, cluster.longitude], Math.min(map.getZoom() + 2, map.getMaxZoom()));
+    };
 
     // 处理 DeepSeek 点击事件
     const handleDeepSeekClick = (siteName) => {
@@ -62,19 +85,6 @@ const HeritageMarkers = ({ mapZoom }) => {
         });
     };
 
-    // 解析坐标
-    const parseCoordinates = (address) => {
-        try {
-            const cleaned = address.replace(/\s/g, '');
-            const coords = JSON.parse(cleaned);
-            return Array.isArray(coords) && coords.length === 2
-                ? coords
-                : [35.8617, 104.1954];
-        } catch {
-            return [35.8617, 104.1954];
-        }
-    };
-
     if (isLoading) {
         return (
             <Spin
@@ -84,9 +94,22 @@ const HeritageMarkers = ({ mapZoom }) => {
         );
     }
 
-    return visibleSites.map((site) => {
+    const clusterMarkers = clusters.map((cluster) => (
+        <Marker
+            key={`cluster-${cluster.geohash}`}
+            position={[cluster.latitude, cluster.longitude]}
+            icon={L.divIcon({
+                className: 'heritage-cluster',
+                html: `<div class="flex items-center justify-center w-8 h-8 bg-gradient-to-br from-red-500 to-pink-500 text-white text-xs font-semibold rounded-full shadow-md">${cluster.count}</div>`,
+                iconSize: [32, 32],
+            })}
+            eventHandlers={{ click: () => handleClusterClick(cluster) }}
+        />
+    ));
+
+    const siteMarkers = sites.map((site) => {
         try {
-            const coordinates = parseCoordinates(site.address);
+            const coordinates = [site.latitude, site.longitude];
             const tags = site.tags?.split(',').filter(Boolean) || [];
 
             const articleLink = site.article_id
@@ -176,6 +199,8 @@ const HeritageMarkers = ({ mapZoom }) => {
             return null;
         }
     });
+
+    return [...clusterMarkers, ...siteMarkers];
 };
 
-export default HeritageMarkers;
\ No newline at end of file
+export default HeritageMarkers;